@@ -0,0 +1,255 @@
+"""Benchmark of the `face` and `group` functions against the local fake YouFace API
+(`benchmarks/fake_server.py`), measuring the throughput and the p50/p99 latency of the sync and
+async variant of each function, at the same concurrency (threads for sync, tasks for async).
+
+    python benchmarks/bench_api.py --calls 500 --concurrency 16 --latency fixed:0.005
+
+With a zero latency, the results measure the SDK and HTTP stack overhead. The functions are
+called through a `YKFaceClient`, or with `--no-client` through the module-level functions
+configured with `BaseUrl` and `Key`, as callers without a client use them.
+
+The batch functions (`verify_many`, `identify_many`, ...) handle `--batch-size` items per call,
+with `--concurrency` requests in flight, and their calls run one at a time; their calls/s
+column counts batches.
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from yk_face import BaseUrl, Key, YKFaceClient, face, group, transport
+from yk_face.compression import RequestCompression
+from yk_face.upload import BinaryUpload
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_server import FakeYouFace  # noqa: E402  pylint: disable=wrong-import-position
+
+GROUP_ID = 'bench'
+GALLERY_SIZE = 100
+BATCH_GROUP_ID = 'bench_batch'
+
+
+def _percentile(latencies: List[float], quantile: float) -> float:
+    return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+
+def _report(name: str, mode: str, elapsed: float, latencies: List[float]):
+    latencies.sort()
+    print(f"{name:<26}{mode:<7}{len(latencies) / elapsed:>10.0f}"
+          f"{_percentile(latencies, 0.5) * 1e3:>10.2f}{_percentile(latencies, 0.99) * 1e3:>10.2f}")
+
+
+def _run_sync(func: Callable, calls: int, concurrency: int) -> Tuple[float, List[float]]:
+    def timed(_):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, range(calls)))
+    return time.perf_counter() - start, latencies
+
+
+async def _run_async(func: Callable, calls: int, concurrency: int) -> Tuple[float, List[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed():
+        async with semaphore:
+            start = time.perf_counter()
+            await func()
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed() for _ in range(calls)))
+    return time.perf_counter() - start, list(latencies)
+
+
+def _cases(face_api, group_api, image: str, template: str) -> Dict[str, Tuple[Callable, Callable]]:
+    """ Sync and async call of each benchmarked function. Functions that add persons or groups
+        use a new ID on every call, and the ones that remove them remove those IDs. """
+    ids = itertools.count()
+    added_persons, created_groups = [], []
+
+    def new_person() -> str:
+        person_id = f'new{next(ids)}'
+        added_persons.append(person_id)
+        return person_id
+
+    def new_group() -> str:
+        group_id = f'group{next(ids)}'
+        created_groups.append(group_id)
+        return group_id
+
+    return {
+        'face.process': (
+            lambda: face_api.process(image),
+            lambda: face_api.process_async(image)),
+        'face.verify': (
+            lambda: face_api.verify(template, template),
+            lambda: face_api.verify_async(template, template)),
+        'face.verify_id': (
+            lambda: face_api.verify_id(template, 'person0', GROUP_ID),
+            lambda: face_api.verify_id_async(template, 'person0', GROUP_ID)),
+        'face.identify': (
+            lambda: face_api.identify(template, GROUP_ID, candidate_list_length=5),
+            lambda: face_api.identify_async(template, GROUP_ID, candidate_list_length=5)),
+        'face.verify_images': (
+            lambda: face_api.verify_images(image, image),
+            lambda: face_api.verify_images_async(image, image)),
+        'group.list_ids': (
+            lambda: group_api.list_ids(GROUP_ID),
+            lambda: group_api.list_ids_async(GROUP_ID)),
+        'group.get_person_template': (
+            lambda: group_api.get_person_template(GROUP_ID, 'person0'),
+            lambda: group_api.get_person_template_async(GROUP_ID, 'person0')),
+        'group.add_person': (
+            lambda: group_api.add_person(GROUP_ID, new_person(), template),
+            lambda: group_api.add_person_async(GROUP_ID, new_person(), template)),
+        'group.remove_person': (
+            lambda: group_api.remove_person(GROUP_ID, added_persons.pop()),
+            lambda: group_api.remove_person_async(GROUP_ID, added_persons.pop())),
+        'group.create': (
+            lambda: group_api.create(new_group()),
+            lambda: group_api.create_async(new_group())),
+        'group.delete': (
+            lambda: group_api.delete(created_groups.pop()),
+            lambda: group_api.delete_async(created_groups.pop())),
+    }
+
+
+def _batch_cases(
+        face_api,
+        group_api,
+        image: str,
+        template: str,
+        batch_size: int,
+        concurrency: int,
+        directory: str) -> Dict[str, Tuple[Optional[Callable], Callable]]:
+    """ Sync and async call of each benchmarked batch function, handling `batch_size` items.
+        `add_persons` and `import_` (re)add the same persons to `BATCH_GROUP_ID`, and `import_`
+        reads a snapshot of the `GROUP_ID` persons exported beforehand. `process_many_async`
+        has no sync variant. """
+    templates = [template] * batch_size
+    images = [image] * batch_size
+    persons = {f'batch{index}': template for index in range(batch_size)}
+    export_path = os.path.join(directory, 'export.snapshot')
+    import_path = os.path.join(directory, 'import.snapshot')
+    group_api.export(GROUP_ID, import_path, concurrency=concurrency)
+
+    async def process_many():
+        async for _ in face_api.process_many_async(images, concurrency=concurrency):
+            pass
+
+    return {
+        'face.verify_many': (
+            lambda: face_api.verify_many(template, templates),
+            lambda: face_api.verify_many_async(template, templates, concurrency=concurrency)),
+        'face.identify_many': (
+            lambda: face_api.identify_many(templates, GROUP_ID, concurrency=concurrency),
+            lambda: face_api.identify_many_async(templates, GROUP_ID, concurrency=concurrency)),
+        'face.verify_images_many': (
+            lambda: face_api.verify_images_many(image, images, concurrency=concurrency),
+            lambda: face_api.verify_images_many_async(image, images, concurrency=concurrency)),
+        'face.process_many_async': (None, process_many),
+        'group.add_persons': (
+            lambda: group_api.add_persons(BATCH_GROUP_ID, persons, concurrency=concurrency),
+            lambda: group_api.add_persons_async(BATCH_GROUP_ID, persons,
+                                                concurrency=concurrency)),
+        'group.export': (
+            lambda: group_api.export(GROUP_ID, export_path, concurrency=concurrency),
+            lambda: group_api.export_async(GROUP_ID, export_path, concurrency=concurrency)),
+        'group.import_': (
+            lambda: group_api.import_(import_path, BATCH_GROUP_ID, concurrency=concurrency),
+            lambda: group_api.import_async(import_path, BATCH_GROUP_ID,
+                                           concurrency=concurrency)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=300, help="calls per function and mode")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', default='fixed:0', help="check benchmarks/fake_server.py")
+    parser.add_argument('--template-size', type=int, default=2048)
+    parser.add_argument('--image-size', type=int, default=50_000)
+    parser.add_argument('--only', help="benchmark only the functions containing this text")
+    parser.add_argument('--compression', choices=('gzip', 'zstd'),
+                        help="compress the request bodies")
+    parser.add_argument('--binary-upload', choices=('multipart', 'octet-stream'),
+                        help="upload the images as raw bytes")
+    parser.add_argument('--no-client', action='store_true',
+                        help="call the module-level functions instead of a YKFaceClient")
+    parser.add_argument('--batch-size', type=int, default=16, help="items per batch call")
+    arguments = parser.parse_args()
+
+    image = base64.b64encode(os.urandom(arguments.image_size)).decode()
+    with FakeYouFace(arguments.latency, arguments.template_size) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        compression = RequestCompression(arguments.compression) if arguments.compression else None
+        binary_upload = BinaryUpload(arguments.binary_upload) if arguments.binary_upload else None
+        if arguments.no_client:
+            client = None
+            BaseUrl.set(server.base_url)
+            Key.set('bench')
+            transport.set_compression(compression)
+            transport.set_binary_upload(binary_upload)
+            face_api, group_api = face, group
+        else:
+            client = YKFaceClient(server.base_url, key='bench', pool_size=arguments.concurrency,
+                                  compression=compression, binary_upload=binary_upload)
+            face_api, group_api = client.face, client.group
+        template = face_api.process(image)[0]['template']
+        group_api.create(GROUP_ID)
+        group_api.create(BATCH_GROUP_ID)
+        for index in range(GALLERY_SIZE):
+            group_api.add_person(GROUP_ID, f'person{index}', template)
+
+        print(f"{'function':<26}{'mode':<7}{'calls/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        cases = _cases(face_api, group_api, image, template)
+        for name, (sync_call, async_call) in cases.items():
+            if arguments.only and arguments.only not in name:
+                continue
+            _bench(client, name, sync_call, async_call, arguments.calls, arguments.concurrency)
+
+        batch_cases = _batch_cases(face_api, group_api, image, template, arguments.batch_size,
+                                   arguments.concurrency, directory)
+        batch_calls = max(1, arguments.calls // arguments.batch_size)
+        for name, (sync_call, async_call) in batch_cases.items():
+            if arguments.only and arguments.only not in name:
+                continue
+            _bench(client, name, sync_call, async_call, batch_calls, 1)
+        if client is not None:
+            client.close()
+
+
+def _bench(
+        client: Optional[YKFaceClient],
+        name: str,
+        sync_call: Optional[Callable],
+        async_call: Callable,
+        calls: int,
+        concurrency: int):
+    if sync_call is not None:
+        elapsed, latencies = _run_sync(sync_call, calls, concurrency)
+        _report(name, 'sync', elapsed, latencies)
+    elapsed, latencies = asyncio.run(_bench_async(client, async_call, calls, concurrency))
+    _report(name, 'async', elapsed, latencies)
+
+
+async def _bench_async(client: Optional[YKFaceClient], func: Callable, calls: int,
+                       concurrency: int):
+    try:
+        return await _run_async(func, calls, concurrency)
+    finally:
+        if client is not None:
+            await client.aclose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Microbenchmark of the per-call client-side serialization cost, with and without fast
+serialization. It does not perform any request.
+
+    python benchmarks/bench_serialization.py
+"""
+import json
+import timeit
+from yk_face import serialization
+
+TEMPLATE = 'A' * 2732  # Size of a base64 encoded 2KB template.
+IMAGE = 'A' * 200_000
+PROCESS_RESPONSE = json.dumps([{
+    'biometric_type': 'Face', 'x': 10, 'y': 20, 'width': 120, 'height': 160, 'template': TEMPLATE,
+    'quality_metrics': {f'metric{index}': index / 10 for index in range(16)},
+    'biometric_points': {f'point{index}': [index, index + 1] for index in range(68)},
+}]).encode()
+
+CALLS = {
+    'verify': lambda: serialization.verify_request(TEMPLATE, TEMPLATE),
+    'identify': lambda: serialization.identify_request(TEMPLATE, 'group', -1.0, 5),
+    'verify_id': lambda: serialization.verify_id_request(TEMPLATE, 'person', 'group'),
+    'process': lambda: serialization.process_request(IMAGE, ['detect', 'templify'], []),
+}
+
+
+def _encode(fast: bool, build) -> bytes:
+    payload = build()
+    if fast:
+        return serialization.dumps(payload)
+    return json.dumps(payload).encode()
+
+
+def _decode(fast: bool):
+    return serialization.loads(PROCESS_RESPONSE) if fast else json.loads(PROCESS_RESPONSE)
+
+
+def _measure(func, number: int) -> float:
+    """ Best per-call time, in microseconds, of 5 repetitions. """
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main(number: int = 2000):
+    """Print the per-call encode (and process response decode) time of both modes.
+    :param number:
+        Calls per repetition.
+    :return:
+    """
+    print(f"{'call':<18}{'default (us)':>14}{'fast (us)':>12}{'speedup':>10}")
+    rows = [(f'{name} request', lambda fast, build=build: _encode(fast, build))
+            for name, build in CALLS.items()]
+    rows.append(('process response', _decode))
+    for name, call in rows:
+        timings = []
+        for fast in (False, True):
+            serialization.set_fast_serialization(fast)
+            timings.append(_measure(lambda fast=fast: call(fast), number))
+        serialization.set_fast_serialization(False)
+        print(f"{name:<18}{timings[0]:>14.2f}{timings[1]:>12.2f}{timings[0] / timings[1]:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""Local stand-in of the YouFace API, for benchmarks and offline experiments.
+
+It implements the `face/process`, `face/verify`, `face/verify_id`, `face/identify` and
+`gallery/...` routes over HTTP/1.1 with keep-alive, keeping the galleries in memory. Every
+response is delayed by a configurable latency distribution, and the process responses carry
+templates of a configurable size. Request bodies compressed with gzip or zstd and binary image
+uploads (check `yk_face.upload`) are accepted, unless disabled with `--no-compression` and
+`--no-binary-upload`, in which case they are answered with 415.
+
+    python benchmarks/fake_server.py --port 8080 --latency lognormal:0.02,0.5
+
+Latency specifications:
+    fixed:SECONDS             always SECONDS
+    uniform:LOW,HIGH          uniformly distributed between LOW and HIGH seconds
+    lognormal:MEDIAN,SIGMA    log-normally distributed around MEDIAN seconds
+"""
+import argparse
+import base64
+import gzip
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def latency_model(spec: str) -> Callable[[], float]:
+    """Build a latency sampler from a specification (check the module documentation).
+    :param spec:
+        Latency specification, e.g. 'fixed:0.01'.
+    :return:
+        Function returning a latency in seconds.
+    """
+    kind, _, arguments = spec.partition(':')
+    values = [float(value) for value in arguments.split(',')] if arguments else []
+    if kind == 'fixed' and len(values) == 1:
+        return lambda: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Invalid latency specification: {spec}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: 'FakeYouFace'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._handle('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._handle('POST')
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        self._handle('DELETE')
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self, method: str):
+        length = int(self.headers.get('Content-Length') or 0)
+        content = self._decompress(self.rfile.read(length)) if length else b''
+        if content is None:
+            self._respond(415, {'message': 'unsupported content encoding'})
+            return
+        content_type = self.headers.get('Content-Type', 'application/json')
+        if content_type.startswith('application/json'):
+            body = json.loads(content) if content else None
+        elif self.server.binary_upload and content_type.startswith(
+                ('multipart/form-data', 'application/octet-stream')):
+            body = self._binary_upload(content_type, content)
+        else:
+            self._respond(415, {'message': 'unsupported content type'})
+            return
+        delay = self.server.latency()
+        if delay > 0:
+            time.sleep(delay)
+        parts = self.path.strip('/').split('/')
+        try:
+            status, payload = self.server.route(method, parts, body)
+        except KeyError:
+            status, payload = 404, {'message': 'not found'}
+        self._respond(status, payload)
+
+    def _decompress(self, content: bytes) -> Optional[bytes]:
+        encoding = self.headers.get('Content-Encoding', 'identity')
+        if encoding == 'identity':
+            return content
+        if not self.server.compression:
+            return None
+        if encoding == 'gzip':
+            return gzip.decompress(content)
+        if encoding == 'zstd' and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(content)
+        return None
+
+    def _binary_upload(self, content_type: str, content: bytes) -> dict:
+        """ Process request of a binary upload, in the JSON form. """
+        if content_type.startswith('application/octet-stream'):
+            image, options = content, json.loads(self.headers['X-Process-Options'])
+        else:
+            boundary = content_type.split('boundary=', 1)[1].strip('"').encode()
+            parts = {}
+            for part in content.split(b'--' + boundary)[1:-1]:
+                head, _, value = part.partition(b'\r\n\r\n')
+                name = head.split(b'name="', 1)[1].split(b'"', 1)[0].decode()
+                parts[name] = value[:-2]  # without the CRLF before the next boundary
+            image, options = parts['image'], json.loads(parts['options'])
+        return {'image': base64.b64encode(image).decode(), **options}
+
+    def _respond(self, status: int, payload):
+        self.send_response(status)
+        if payload is None:
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        content = json.dumps(payload).encode()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeYouFace(ThreadingHTTPServer):
+    """Fake YouFace API server, run in a background thread."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+            self,
+            latency: str = 'fixed:0',
+            template_size: int = 2048,
+            faces: int = 1,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            compression: bool = True,
+            binary_upload: bool = True):
+        # pylint: disable=too-many-arguments
+        """Class initializer.
+        :param latency:
+            Latency specification of the responses.
+        :param template_size:
+            Size of the templates returned by face/process, in bytes before base64 encoding.
+        :param faces:
+            Number of faces returned by face/process.
+        :param host:
+            Address to listen on.
+        :param port:
+            Port to listen on, or 0 for a free port.
+        :param compression:
+            Accept request bodies compressed with gzip or zstd.
+        :param binary_upload:
+            Accept binary image uploads.
+        """
+        super().__init__((host, port), _Handler)
+        self.latency = latency_model(latency)
+        self.faces = faces
+        self.compression = compression
+        self.binary_upload = binary_upload
+        self.template = base64.b64encode(os.urandom(template_size)).decode()
+        self.galleries: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the API, to be used with `BaseUrl.set` or `YKFaceClient`."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self) -> 'FakeYouFace':
+        """Serve requests in a background thread.
+        :return:
+            The server.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving requests and close the socket.
+        :return:
+        """
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def route(self, method: str, parts: list, body):
+        """Answer a request.
+        :param method:
+            HTTP method.
+        :param parts:
+            Path segments, e.g. ['face', 'verify'] or ['gallery', group_id, person_id].
+        :param body:
+            Decoded JSON body, if any.
+        :return:
+            (status code, JSON payload or None) tuple.
+        """
+        if parts[0] == 'face':
+            return 200, getattr(self, f'_face_{parts[1]}')(body)
+        with self._lock:
+            if len(parts) == 2:
+                return self._gallery(method, parts[1])
+            return self._person(method, parts[1], parts[2], body)
+
+    def _face_process(self, body):
+        entry = {
+            'biometric_type': 'Face', 'x': 10, 'y': 20, 'width': 120, 'height': 160,
+            'template': self.template,
+            'quality_metrics': {f'metric{index}': index / 10 for index in range(16)},
+            'biometric_points': {f'point{index}': [index, index + 1] for index in range(68)},
+        }
+        if 'templify' not in body.get('processings', ['templify']):
+            del entry['template']
+        return [entry] * self.faces
+
+    @staticmethod
+    def _score(template: str, another_template: str) -> float:
+        return 1.0 if template == another_template else 0.5
+
+    def _face_verify(self, body):
+        return {'score': self._score(body['first_template'], body['second_template'])}
+
+    def _face_verify_id(self, body):
+        with self._lock:
+            template = self.galleries[body['gallery_id']][body['template_id']]
+        return {'score': self._score(body['template'], template)}
+
+    def _face_identify(self, body):
+        with self._lock:
+            persons = list(self.galleries[body['gallery_id']].items())
+        candidates = [
+            {'template_id': person_id, 'score': self._score(body['template'], template)}
+            for person_id, template in persons
+        ]
+        candidates = [candidate for candidate in candidates
+                      if candidate['score'] >= body['minimum_score']]
+        candidates.sort(key=lambda candidate: -candidate['score'])
+        return candidates[:body['candidate_list_length']]
+
+    def _gallery(self, method: str, group_id: str):
+        if method == 'POST':
+            self.galleries.setdefault(group_id, {})
+            return 204, None
+        if method == 'DELETE':
+            del self.galleries[group_id]
+            return 204, None
+        return 200, list(self.galleries[group_id])
+
+    def _person(self, method: str, group_id: str, person_id: str, body):
+        gallery = self.galleries[group_id]
+        if method == 'POST':
+            gallery[person_id] = body['template']
+            return 204, None
+        if method == 'DELETE':
+            del gallery[person_id]
+            return 204, None
+        return 200, {'template': gallery[person_id]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', default='fixed:0')
+    parser.add_argument('--template-size', type=int, default=2048)
+    parser.add_argument('--faces', type=int, default=1)
+    parser.add_argument('--no-compression', dest='compression', action='store_false')
+    parser.add_argument('--no-binary-upload', dest='binary_upload', action='store_false')
+    arguments = parser.parse_args()
+    server = FakeYouFace(arguments.latency, arguments.template_size, arguments.faces,
+                         arguments.host, arguments.port, arguments.compression,
+                         arguments.binary_upload)
+    print(f"Serving the fake YouFace API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
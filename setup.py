@@ -16,10 +16,17 @@ setup(
     packages=["yk_face"],
     install_requires=[
         'yk-face-api-model>=3.0.4,<4',
-        'yk-utils>=1.3.1,<2'
+        'yk-utils>=1.3.1,<2',
+        'requests',
+        'httpx',
     ],
     extras_require={
-      "tests": ['pytest'],
+      "tests": ['pytest', 'numpy', 'Pillow', 'h2', 'zstandard'],
+      "numpy": ['numpy'],
+      "images": ['Pillow'],
+      "fast": ['orjson'],
+      "http2": ['h2'],
+      "zstd": ['zstandard'],
     },
     classifiers=[
         "Programming Language :: Python :: 3",
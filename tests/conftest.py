@@ -0,0 +1,82 @@
+""" Shared fixtures of the offline tests """
+import asyncio
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import yk_face as YKF
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+class _VerifyHandler(BaseHTTPRequestHandler):
+    """ Minimal YouFace verify endpoint that records the client address of every request. """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.client_address, self.path, dict(self.headers)))
+        if self.path.endswith('face/verify') and json.loads(body)['first_template']:
+            status, payload = 200, json.dumps({'score': 0.5}).encode()
+        else:
+            status, payload = 409, b'{"message": "invalid template"}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """ HTTP/1.1 server of the verify endpoint, with its `base_url` and the recorded
+    `requests`. """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _VerifyHandler)
+    server.requests = []
+    server.base_url = f'http://127.0.0.1:{server.server_address[1]}/api'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def gallery(monkeypatch):
+    """ Replaces the transport of the group module with an in-memory gallery of 50 persons. """
+    np = pytest.importorskip('numpy')
+    rng = np.random.default_rng(3)
+    persons = {
+        f'person{index}': base64.b64encode(vector.astype('<f4').tobytes()).decode()
+        for index, vector in enumerate(rng.normal(size=(50, 64)))
+    }
+
+    def request(method, url, json=None, **kwargs):
+        parts = url.split('/')[1:]
+        if len(parts) == 1:
+            return list(persons) if method == 'GET' else None
+        if method == 'GET':
+            return {'template': persons[parts[1]]}
+        if method == 'POST':
+            if parts[1].startswith('invalid'):
+                raise ValueError(f"invalid person {parts[1]}")
+            persons[parts[1]] = json['template']
+        else:
+            del persons[parts[1]]
+        return None
+
+    async def request_async(method, url, json=None, **kwargs):
+        return request(method, url, json=json)
+
+    monkeypatch.setattr(YKF.group, 'request', request)
+    monkeypatch.setattr(YKF.group, 'request_async', request_async)
+    return persons
@@ -0,0 +1,37 @@
+""" Group add_persons Tests """
+import asyncio
+import pytest
+import yk_face as YKF
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_group_add_persons(use_async: bool, gallery, loop: asyncio.AbstractEventLoop):
+    """
+    Test sync and async add_persons: failures are collected and progress is reported.
+    """
+    persons = {f'new{index}': f'template{index}' for index in range(20)}
+    persons['invalid1'] = 'template'
+    reported = []
+
+    def progress(completed: int, total: int):
+        reported.append((completed, total))
+
+    if use_async:
+        errors = loop.run_until_complete(
+            YKF.group.add_persons_async('group', persons, concurrency=4, progress=progress)
+        )
+    else:
+        errors = YKF.group.add_persons('group', persons, concurrency=4, progress=progress)
+
+    assert list(errors) == ['invalid1']
+    assert isinstance(errors['invalid1'], ValueError)
+    assert all(gallery[f'new{index}'] == f'template{index}' for index in range(20))
+    assert reported == [(count, 21) for count in range(1, 22)]
+
+
+def test_group_add_persons_without_group_id():
+    """
+    Test that add_persons requires a group ID.
+    """
+    with pytest.raises(ValueError):
+        YKF.group.add_persons(None, {'person': 'template'})
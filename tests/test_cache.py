@@ -0,0 +1,180 @@
+""" Process and Verify Cache Tests """
+import asyncio
+import base64
+import pytest
+import yk_face as YKF
+from yk_face import transport
+
+
+@pytest.fixture
+def requests_sent(monkeypatch):
+    """ Replaces the transport of the face module with a fake one that records requests. """
+    sent = []
+
+    def request(method, url, json=None, **kwargs):
+        sent.append(json)
+        return [{'template': f'template{len(sent)}'}]
+
+    async def request_async(method, url, json=None, **kwargs):
+        return request(method, url, json=json)
+
+    monkeypatch.setattr(YKF.face, 'request', request)
+    monkeypatch.setattr(YKF.face, 'request_async', request_async)
+    yield sent
+    YKF.face.set_process_cache(None)
+
+
+def _image(content: bytes) -> str:
+    return base64.b64encode(content).decode()
+
+
+def test_process_cache_hits_on_same_image(requests_sent, loop: asyncio.AbstractEventLoop):
+    """
+    Test that the same image and processings are only sent once, for sync and async calls.
+    """
+    cache = YKF.LRUCache(maxsize=8)
+    YKF.face.set_process_cache(cache)
+
+    first = YKF.face.process(_image(b'image'))
+    first[0]['template'] = 'changed by the caller'
+    second = loop.run_until_complete(YKF.face.process_async(_image(b'image')))
+    third = YKF.face.process(_image(b'image'), processings=['detect'])
+
+    assert len(requests_sent) == 2
+    assert second == [{'template': 'template1'}]
+    assert third == [{'template': 'template2'}]
+    assert cache.info() == YKF.cache.CacheInfo(hits=1, misses=2, evictions=0, size=2, maxsize=8)
+
+
+def test_process_cache_evicts_least_recently_used(requests_sent):
+    """
+    Test that the cache is bounded and evicts the least recently used entry.
+    """
+    cache = YKF.LRUCache(maxsize=2)
+    YKF.face.set_process_cache(cache)
+
+    for content in (b'a', b'b', b'a', b'c', b'a', b'b'):
+        YKF.face.process(_image(content))
+
+    assert len(requests_sent) == 4
+    info = cache.info()
+    assert (info.hits, info.misses, info.evictions, info.size) == (2, 4, 2, 2)
+
+
+def test_process_cache_disabled_by_default(requests_sent):
+    """
+    Test that results are not cached unless a cache is set.
+    """
+    YKF.face.process(_image(b'image'))
+    YKF.face.process(_image(b'image'))
+    assert YKF.face.get_process_cache() is None
+    assert len(requests_sent) == 2
+
+
+@pytest.fixture
+def verify_requests(monkeypatch):
+    """ Replaces the transport of the face module with a fake verify server that records
+    requests. """
+    sent = []
+
+    def request(method, url, json=None, **kwargs):
+        sent.append(json)
+        return {'score': 0.25 * len(sent)}
+
+    async def request_async(method, url, json=None, **kwargs):
+        return request(method, url, json=json)
+
+    monkeypatch.setattr(YKF.face, 'request', request)
+    monkeypatch.setattr(YKF.face, 'request_async', request_async)
+    yield sent
+    YKF.face.set_verify_cache(None)
+
+
+def test_verify_cache_is_symmetric(verify_requests, loop: asyncio.AbstractEventLoop):
+    """
+    Test that verify(a, b) and verify(b, a) share a cache entry keyed by template digests, for
+    sync, async and verify_many calls.
+    """
+    cache = YKF.LRUCache(maxsize=8)
+    YKF.face.set_verify_cache(cache)
+    first, second = 'a' * 4096, 'b' * 4096
+
+    assert YKF.face.verify(first, second) == 0.25
+    assert loop.run_until_complete(YKF.face.verify_async(second, first)) == 0.25
+    assert YKF.face.verify_many(second, [first, 'c']) == [0.25, 0.5]
+    assert loop.run_until_complete(YKF.face.verify_many_async('c', [second, 'd'])) == [0.5, 0.75]
+    assert len(verify_requests) == 3
+    assert cache.info().hits == 3
+    assert all(len(digests) == 64 for _, digests in cache._entries)
+
+
+def test_verify_cache_disabled(verify_requests):
+    """
+    Test that scores are not cached unless a verify cache is set.
+    """
+    YKF.face.verify('a', 'b')
+    YKF.face.verify('a', 'b')
+    assert len(verify_requests) == 2
+
+
+def test_caches_are_not_shared_between_servers(monkeypatch):
+    """
+    Test that clients of different servers, or of the same server with different keys, do not
+    get each other's cached process, verify and identify results.
+    """
+    sent = []
+
+    def request(method, url, json=None, **kwargs):
+        client = transport.current_client()
+        sent.append(url)
+        tenant = f'{client.base_url}{client.key}'
+        if url == 'face/process':
+            return [{'template': tenant}]
+        if url == 'face/identify':
+            return [{'template_id': tenant, 'score': 0.9}]
+        return {'score': 0.5 if client.key == 'a' else 0.25}
+
+    monkeypatch.setattr(YKF.face, 'request', request)
+    for setter in (YKF.face.set_process_cache, YKF.face.set_verify_cache,
+                   YKF.face.set_identify_cache):
+        setter(YKF.LRUCache(maxsize=8))
+    clients = [
+        YKF.YKFaceClient('http://first', key='a'),
+        YKF.YKFaceClient('http://second', key='a'),
+        YKF.YKFaceClient('http://first', key='b'),
+    ]
+    try:
+        for _ in range(2):
+            for client in clients:
+                tenant = f'{client.base_url}{client.key}'
+                assert client.face.process(_image(b'image')) == [{'template': tenant}]
+                assert client.face.identify('template', 'staff') == \
+                    [{'template_id': tenant, 'score': 0.9}]
+                assert client.face.verify('a', 'b') == (0.5 if client.key == 'a' else 0.25)
+        assert len(sent) == 9
+    finally:
+        for setter in (YKF.face.set_process_cache, YKF.face.set_verify_cache,
+                       YKF.face.set_identify_cache):
+            setter(None)
+
+
+def test_cache_ttl_and_pop_if(monkeypatch):
+    """
+    Test that entries expire after the ttl and that pop_if removes the matching entries.
+    """
+    now = [100.0]
+    monkeypatch.setattr(YKF.cache.time, 'monotonic', lambda: now[0])
+    cache = YKF.LRUCache(maxsize=4, ttl=10)
+    cache.put(('group', 'a'), 'template_a')
+    cache.put(('group', 'b'), 'template_b')
+    cache.put(('other', 'a'), 'template_c')
+    now[0] += 5
+    assert cache.get(('group', 'a')) == 'template_a'
+    assert cache.pop(('group', 'b')) == 'template_b'
+    now[0] += 6
+    assert cache.get(('group', 'a')) is None
+    assert cache.info().misses == 1
+
+    cache.put(('group', 'a'), 'template_a')
+    assert cache.pop_if(lambda key: key[0] == 'group') == 1
+    assert len(cache) == 1
@@ -0,0 +1,94 @@
+""" YKFaceClient Tests """
+import asyncio
+import gc
+import warnings
+import weakref
+import pytest
+import yk_face as YKF
+from yk_utils.apis import YoonikApiException
+
+
+def test_client_reuses_connection(http_server):
+    """
+    Test that sync requests performed through the client share one kept-alive connection.
+    """
+    with YKF.YKFaceClient(http_server.base_url, key='secret') as client:
+        scores = [client.face.verify('a', 'b') for _ in range(5)]
+
+    assert scores == [0.5] * 5
+    assert len({address for address, _, _ in http_server.requests}) == 1
+    assert all(path == '/api/face/verify' for _, path, _ in http_server.requests)
+    assert all(headers['x-api-key'] == 'secret' for _, _, headers in http_server.requests)
+
+
+def test_client_reuses_connection_async(http_server, loop: asyncio.AbstractEventLoop):
+    """
+    Test that async requests performed through the client share the connection pool.
+    """
+    async def verify_many():
+        async with YKF.YKFaceClient(http_server.base_url, pool_size=2) as client:
+            for _ in range(3):
+                await asyncio.gather(*(client.face.verify_async('a', 'b') for _ in range(2)))
+
+    loop.run_until_complete(verify_many())
+    assert len(http_server.requests) == 6
+    assert len({address for address, _, _ in http_server.requests}) <= 2
+
+
+def test_client_closes_pools_of_previous_loops(http_server, loop: asyncio.AbstractEventLoop):
+    """
+    Test that the async pools replaced when the event loop changes are closed by aclose.
+    """
+    client = YKF.YKFaceClient(http_server.base_url)
+    other_loop = asyncio.new_event_loop()
+    try:
+        assert other_loop.run_until_complete(client.face.verify_async('a', 'b')) == 0.5
+        first_pool = client._async_client  # pylint: disable=protected-access
+        assert loop.run_until_complete(client.face.verify_async('a', 'b')) == 0.5
+        assert client._async_client is not first_pool  # pylint: disable=protected-access
+        assert not first_pool.is_closed
+
+        loop.run_until_complete(client.aclose())
+    finally:
+        other_loop.close()
+    assert first_pool.is_closed
+    assert not client._retired_clients  # pylint: disable=protected-access
+
+
+def test_client_drops_pools_of_closed_loops(http_server):
+    """
+    Test that the async pools of closed event loops are not kept by the client, so that their
+    connections are released by the garbage collector.
+    """
+    client = YKF.YKFaceClient(http_server.base_url)
+    pools = []
+    for _ in range(5):
+        loop = asyncio.new_event_loop()
+        try:
+            assert loop.run_until_complete(client.face.verify_async('a', 'b')) == 0.5
+            pools.append(weakref.ref(client._async_client))  # pylint: disable=protected-access
+        finally:
+            loop.close()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ResourceWarning)
+        gc.collect()
+    assert not client._retired_clients  # pylint: disable=protected-access
+    assert [pool() is None for pool in pools] == [True] * 4 + [False]
+
+
+def test_client_raises_api_exception(http_server):
+    """
+    Test that error responses are raised as YoonikApiException.
+    """
+    with YKF.YKFaceClient(http_server.base_url) as client:
+        with pytest.raises(YoonikApiException) as exception:
+            client.face.verify('', 'b')
+    assert exception.value.status_code == 409
+
+
+def test_client_with_invalid_pool_size():
+    """
+    Test that a pool size lower than 1 is rejected.
+    """
+    with pytest.raises(ValueError):
+        YKF.YKFaceClient('http://127.0.0.1', pool_size=0)
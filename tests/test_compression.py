@@ -0,0 +1,116 @@
+""" Request Compression Tests """
+import base64
+import gzip
+import os
+import pytest
+from yk_utils.apis import YoonikApiException
+import yk_face as YKF
+from yk_face import transport
+from yk_face.compression import RequestCompression
+from benchmarks.fake_server import FakeYouFace
+
+zstandard = pytest.importorskip('zstandard')
+
+IMAGE = base64.b64encode(os.urandom(3000)).decode()
+
+
+@pytest.fixture(scope='module')
+def server():
+    with FakeYouFace(template_size=64) as server:
+        yield server
+
+
+@pytest.fixture(scope='module')
+def rejecting_server():
+    with FakeYouFace(template_size=64, compression=False) as server:
+        yield server
+
+
+def _process(client, use_async: bool, loop):
+    if not use_async:
+        return client.face.process(IMAGE)
+
+    async def process():
+        try:
+            return await client.face.process_async(IMAGE)
+        finally:
+            await client.aclose()
+    return loop.run_until_complete(process())
+
+
+def test_encode_threshold_and_round_trip():
+    """
+    Test that only encoded bodies above the threshold are compressed, and that they decompress
+    to the original body.
+    """
+    body = b'{"image":"' + IMAGE.encode() + b'"}'
+    assert RequestCompression(threshold=len(body) + 1).encode(body, None) is None
+    assert RequestCompression().encode({'image': IMAGE}, None) is None
+    assert RequestCompression().encode(body, {'Content-Type': 'application/octet-stream'}) is None
+
+    data, headers = RequestCompression('gzip').encode(body, {'Content-Type': 'application/json'})
+    assert headers == {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+    assert gzip.decompress(data) == body and len(data) < len(body)
+
+    data, headers = RequestCompression('zstd', level=10).encode(body, None)
+    assert headers == {'Content-Encoding': 'zstd'}
+    assert zstandard.ZstdDecompressor().decompress(data) == body and len(data) < len(body)
+
+    with pytest.raises(ValueError):
+        RequestCompression('br')
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+@pytest.mark.parametrize('encoding', ['gzip', 'zstd'])
+def test_client_sends_compressed_bodies(server, use_async, encoding, loop):
+    """
+    Test that a server accepting compressed bodies receives them through a client.
+    """
+    compression = RequestCompression(encoding)
+    with YKF.YKFaceClient(server.base_url, compression=compression) as client:
+        faces = _process(client, use_async, loop)
+    assert len(base64.b64decode(faces[0]['template'])) == 64
+    assert compression.accepted is True
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_client_falls_back_to_uncompressed_bodies(rejecting_server, use_async, loop):
+    """
+    Test that bodies rejected with 415 are sent again uncompressed, and that compression is then
+    disabled.
+    """
+    compression = RequestCompression()
+    with YKF.YKFaceClient(rejecting_server.base_url, compression=compression) as client:
+        assert len(_process(client, use_async, loop)) == 1
+        assert compression.accepted is False
+        assert compression.encode(b'x' * 2048, None) is None
+        assert len(_process(client, use_async, loop)) == 1
+
+
+def test_module_functions_compress_and_keep_errors(monkeypatch):
+    """
+    Test compression without a client, and that other errors of compressed requests are raised
+    without a fallback.
+    """
+    calls = []
+
+    def request(method, url, data=None, json=None, headers=None, params=None):
+        # pylint: disable=too-many-arguments,unused-argument
+        calls.append(headers.get('Content-Encoding'))
+        if len(calls) == 1:
+            raise YoonikApiException(503, 'unavailable')
+        assert json is None and b'"image"' in gzip.decompress(data)
+        return [{'template': 'x'}]
+
+    monkeypatch.setattr(transport, '_request_encoded', request)
+    compression = RequestCompression()
+    transport.set_compression(compression)
+    try:
+        with pytest.raises(YoonikApiException):
+            YKF.face.process(IMAGE)
+        assert compression.accepted is None
+        assert YKF.face.process(IMAGE) == [{'template': 'x'}]
+    finally:
+        transport.set_compression(None)
+    assert calls == ['gzip', 'gzip']
+    assert compression.accepted is True
@@ -0,0 +1,115 @@
+""" Adaptive Concurrency Tests """
+import asyncio
+import pytest
+import yk_utils.apis
+from yk_utils.apis import YoonikApiException
+import yk_face as YKF
+from yk_face import transport
+from yk_face.concurrency import AdaptiveConcurrencyLimiter, LoadShedError
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """ Replaces yk_utils.apis with a fake server that records its peak concurrency and fails
+    with 503 while `state['overloaded']` is set. """
+    state = {'in_flight': 0, 'peak': 0, 'overloaded': False, 'delay': 0.005}
+
+    async def request_async(method, url, **kwargs):
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        try:
+            await asyncio.sleep(state['delay'])
+            if state['overloaded']:
+                raise YoonikApiException(503, 'overloaded')
+            return {'score': 0.5}
+        finally:
+            state['in_flight'] -= 1
+
+    monkeypatch.setattr(yk_utils.apis, 'request_async', request_async)
+    yield state
+    transport.set_concurrency_limiter(None)
+
+
+def _verify_all(count: int):
+    async def verify_all():
+        return await asyncio.gather(
+            *(YKF.face.verify_async('a', 'b') for _ in range(count)), return_exceptions=True
+        )
+    return verify_all()
+
+
+def test_limiter_bounds_and_grows(server, loop):
+    """
+    Test that in-flight requests never exceed the limit and that the limit grows while requests
+    succeed with the limit in use.
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8, latency_tolerance=100)
+    transport.set_concurrency_limiter(limiter)
+    results = loop.run_until_complete(_verify_all(100))
+    assert results == [0.5] * 100
+    assert 4 < limiter.limit <= 8
+    assert server['peak'] <= 8
+    assert limiter.info().in_flight == 0
+
+
+def test_limiter_backs_off_once_per_episode(server, loop):
+    """
+    Test that concurrent overload errors decrease the limit once.
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, max_limit=16)
+    transport.set_concurrency_limiter(limiter)
+    server['overloaded'] = True
+    results = loop.run_until_complete(_verify_all(16))
+    assert all(isinstance(result, YoonikApiException) for result in results)
+    assert limiter.limit == 8
+
+    results = loop.run_until_complete(_verify_all(8))
+    assert limiter.limit == 4
+
+
+def test_limiter_backs_off_on_latency(server, loop):
+    """
+    Test that requests much slower than the recent ones decrease the limit.
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4, min_samples=5,
+                                         latency_tolerance=5)
+    transport.set_concurrency_limiter(limiter)
+    loop.run_until_complete(_verify_all(20))
+    assert limiter.limit == 4
+    server['delay'] = 0.2
+    loop.run_until_complete(_verify_all(4))
+    assert limiter.limit == 2
+
+
+def test_limiter_sheds_excess_requests(server, loop):
+    """
+    Test that requests beyond the queue depth raise LoadShedError, and that cancelled requests
+    release their slots.
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2, max_queue=3)
+    transport.set_concurrency_limiter(limiter)
+    results = loop.run_until_complete(_verify_all(10))
+    assert sum(result == 0.5 for result in results) == 5
+    assert sum(isinstance(result, LoadShedError) for result in results) == 5
+    assert limiter.info().shed == 5
+
+    async def cancel_some():
+        tasks = [asyncio.ensure_future(YKF.face.verify_async('a', 'b')) for _ in range(4)]
+        await asyncio.sleep(0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return await YKF.face.verify_async('a', 'b')
+
+    assert loop.run_until_complete(cancel_some()) == 0.5
+    assert limiter.info()[1:3] == (0, 0)
+
+
+def test_limiter_validation():
+    """
+    Test the limiter arguments validation.
+    """
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(initial_limit=0)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(backoff_ratio=1)
@@ -34,13 +34,6 @@ def random_str(length: int = 190) -> str:
     return ''.join(random.choice(letters) for i in range(length))
 
 
-@pytest.fixture
-def loop():
-    loop = asyncio.new_event_loop()
-    yield loop
-    loop.close()
-
-
 @pytest.mark.parametrize('use_async', [(True,), (False,)])
 @pytest.mark.parametrize('configurations', [
     None,
@@ -597,3 +590,27 @@ def test_verify_images_with_invalid_images(
             YKF.face.verify_images(random_str(), random_str())
 
     assert exception.value.status_code == 409
+
+
+@pytest.mark.parametrize('use_async', [(True,), (False,)])
+def test_verify_images_many(
+        use_async: bool,
+        loop: asyncio.AbstractEventLoop):
+    """
+    Test sync and async verify_images_many request with valid and invalid candidates.
+    :param use_async: flag to use the async function
+    :param loop: event loop for the current test
+    :return:
+    """
+    candidates = [__image_file, random_str()]
+    if use_async:
+        results = loop.run_until_complete(
+            YKF.face.verify_images_many_async(__image_file, candidates)
+        )
+    else:
+        results = YKF.face.verify_images_many(__image_file, candidates)
+
+    assert type(results[0]) == float
+    assert results[0] > 0
+    assert isinstance(results[1], YoonikApiException)
+    assert results[1].status_code == 409
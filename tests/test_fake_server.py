@@ -0,0 +1,53 @@
+""" End-to-end Tests against the Local Fake YouFace API of the Benchmarks """
+import base64
+import pytest
+from yk_utils.apis import YoonikApiException
+import yk_face as YKF
+from benchmarks.fake_server import FakeYouFace, latency_model
+
+
+@pytest.fixture
+def server():
+    with FakeYouFace(template_size=64) as server:
+        yield server
+
+
+def test_fake_server_face_and_group_routes(server, loop):
+    """
+    Test the face and gallery routes of the fake server through a client, sync and async.
+    """
+    image = base64.b64encode(b'image').decode()
+    with YKF.YKFaceClient(server.base_url) as client:
+        template = client.face.process(image)[0]['template']
+        assert len(base64.b64decode(template)) == 64
+        client.group.create('group')
+        client.group.add_persons('group', {'alice': template, 'bob': 'other'})
+        assert sorted(client.group.list_ids('group')) == ['alice', 'bob']
+        assert client.face.verify_id(template, 'bob', 'group') == 0.5
+        assert client.face.identify(template, 'group', candidate_list_length=2) == [
+            {'template_id': 'alice', 'score': 1.0}, {'template_id': 'bob', 'score': 0.5}
+        ]
+
+        async def run():
+            score = await client.face.verify_images_async(image, image)
+            await client.group.remove_person_async('group', 'bob')
+            person_template = await client.group.get_person_template_async('group', 'alice')
+            await client.aclose()
+            return score, person_template
+
+        assert loop.run_until_complete(run()) == (1.0, template)
+        client.group.delete('group')
+        with pytest.raises(YoonikApiException) as exception:
+            client.group.list_ids('group')
+        assert exception.value.status_code == 404
+
+
+def test_latency_model():
+    """
+    Test the latency specifications.
+    """
+    assert latency_model('fixed:0.5')() == 0.5
+    assert 0.1 <= latency_model('uniform:0.1,0.2')() <= 0.2
+    assert latency_model('lognormal:0.01,0.5')() > 0
+    with pytest.raises(ValueError):
+        latency_model('normal:1')
@@ -0,0 +1,153 @@
+""" YKFaceClient HTTP/2 Tests """
+import asyncio
+import json
+import socket
+import threading
+import httpx
+import pytest
+import yk_face as YKF
+
+h2_connection = pytest.importorskip('h2.connection')
+h2_config = pytest.importorskip('h2.config')
+h2_events = pytest.importorskip('h2.events')
+
+
+class _H2Server:
+    """ Minimal cleartext HTTP/2 (prior knowledge) YouFace verify endpoint, recording the
+    connections and the number of streams that were open at the same time. """
+    def __init__(self):
+        self.socket = socket.create_server(('127.0.0.1', 0))
+        self.connections = 0
+        self.requests = 0
+        self.max_open_streams = 0
+        self._threads = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.socket.getsockname()[1]}/'
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self.socket.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock: socket.socket):
+        connection = h2_connection.H2Connection(h2_config.H2Configuration(client_side=False))
+        connection.initiate_connection()
+        sock.sendall(connection.data_to_send())
+        bodies = {}
+        with sock:
+            while True:
+                data = sock.recv(65535)
+                if not data:
+                    return
+                for event in connection.receive_data(data):
+                    if isinstance(event, h2_events.RequestReceived):
+                        bodies[event.stream_id] = b''
+                        self.max_open_streams = max(self.max_open_streams, len(bodies))
+                    elif isinstance(event, h2_events.DataReceived):
+                        bodies[event.stream_id] += event.data
+                        connection.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id
+                        )
+                    elif isinstance(event, h2_events.StreamEnded):
+                        self._respond(connection, event.stream_id, bodies.pop(event.stream_id))
+                sock.sendall(connection.data_to_send())
+
+    def _respond(self, connection, stream_id: int, body: bytes):
+        self.requests += 1
+        payload = json.dumps({'score': 0.5 if json.loads(body)['first_template'] else 0.0})
+        connection.send_headers(stream_id, [
+            (':status', '200'),
+            ('content-type', 'application/json'),
+            ('content-length', str(len(payload))),
+        ])
+        connection.send_data(stream_id, payload.encode(), end_stream=True)
+
+    def close(self):
+        self.socket.close()
+
+
+@pytest.fixture
+def h2_server():
+    server = _H2Server()
+    yield server
+    server.close()
+
+
+def test_http2_multiplexes_async_requests(h2_server, loop):
+    """
+    Test that concurrent async requests share one HTTP/2 connection.
+    """
+    async def verify_many():
+        async with YKF.YKFaceClient(h2_server.base_url, http2=True) as client:
+            return await asyncio.gather(*(client.face.verify_async('a', 'b') for _ in range(20)))
+
+    assert loop.run_until_complete(verify_many()) == [0.5] * 20
+    assert h2_server.requests == 20
+    assert h2_server.connections == 1
+    assert h2_server.max_open_streams > 1
+
+
+def test_http2_falls_back_to_http1(http_server, loop):
+    """
+    Test that the client falls back to HTTP/1.1 when the server does not support HTTP/2.
+    """
+    async def verify_many():
+        async with YKF.YKFaceClient(http_server.base_url, http2=True) as client:
+            first = await client.face.verify_async('a', 'b')
+            rest = await asyncio.gather(*(client.face.verify_async('a', 'b') for _ in range(3)))
+            return [first] + rest
+
+    assert loop.run_until_complete(verify_many()) == [0.5] * 4
+    assert len(http_server.requests) == 4
+
+
+def test_http2_fallback_does_not_resend_non_idempotent_requests(http_server, loop):
+    """
+    Test that a non-idempotent request failing on the HTTP/2 preface is not sent again over
+    HTTP/1.1, while the following idempotent requests still fall back.
+    """
+    async def add_then_verify():
+        async with YKF.YKFaceClient(http_server.base_url, http2=True) as client:
+            with pytest.raises(httpx.TransportError):
+                await client.group.add_person_async('group', 'person', 'template')
+            assert not http_server.requests
+            return await client.face.verify_async('a', 'b')
+
+    assert loop.run_until_complete(add_then_verify()) == 0.5
+    assert [path for _, path, _ in http_server.requests] == ['/api/face/verify']
+
+
+def test_http2_is_kept_when_the_server_fails(loop):
+    """
+    Test that a server that drops every connection does not make the client give up HTTP/2.
+    """
+    listener = socket.create_server(('127.0.0.1', 0))
+
+    def drop_connections():
+        while True:
+            try:
+                sock, _ = listener.accept()
+            except OSError:
+                return
+            sock.close()
+
+    threading.Thread(target=drop_connections, daemon=True).start()
+
+    async def verify():
+        async with YKF.YKFaceClient(
+                f'http://127.0.0.1:{listener.getsockname()[1]}/', http2=True) as client:
+            with pytest.raises(httpx.TransportError):
+                await client.face.verify_async('a', 'b')
+            return client._http2_rejected  # pylint: disable=protected-access
+
+    try:
+        assert loop.run_until_complete(verify()) is False
+    finally:
+        listener.close()
@@ -0,0 +1,74 @@
+""" Face identify_many and Identify Cache Tests """
+import asyncio
+import pytest
+import yk_face as YKF
+
+
+@pytest.fixture
+def identify_requests(monkeypatch):
+    """ Replaces the transport of the face module with a fake identify server that records
+    requests. Templates starting with 'invalid' are rejected. """
+    sent = []
+
+    def request(method, url, json=None, **kwargs):
+        sent.append(json['template'])
+        if json['template'].startswith('invalid'):
+            raise ValueError("invalid template")
+        return [{'template_id': json['template'], 'score': 0.9}]
+
+    async def request_async(method, url, json=None, **kwargs):
+        await asyncio.sleep(0)
+        return request(method, url, json=json)
+
+    monkeypatch.setattr(YKF.face, 'request', request)
+    monkeypatch.setattr(YKF.face, 'request_async', request_async)
+    yield sent
+    YKF.face.set_identify_cache(None)
+
+
+def _identify_many(use_async: bool, loop, templates, group_id='group'):
+    if use_async:
+        return loop.run_until_complete(
+            YKF.face.identify_many_async(templates, group_id, concurrency=3)
+        )
+    return YKF.face.identify_many(templates, group_id, concurrency=3)
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_identify_many(use_async: bool, identify_requests, loop):
+    """
+    Test that every template is identified, in order, with per-template errors.
+    """
+    templates = [f't{index}' for index in range(10)] + ['invalid']
+    results = _identify_many(use_async, loop, templates)
+    assert [result[0]['template_id'] for result in results[:10]] == templates[:10]
+    assert isinstance(results[10], ValueError)
+    with pytest.raises(ValueError):
+        _identify_many(use_async, loop, templates, group_id=None)
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_identify_cache_invalidated_by_mutations(use_async: bool, identify_requests, gallery, loop):
+    """
+    Test that cached results are used until the group is mutated through the SDK, and that
+    mutations of other groups do not invalidate them.
+    """
+    YKF.face.set_identify_cache(YKF.LRUCache())
+    templates = ['a', 'b', 'c']
+    first = _identify_many(use_async, loop, templates)
+    first[0][0]['score'] = 0.0
+    assert _identify_many(use_async, loop, templates) == [
+        [{'template_id': template, 'score': 0.9}] for template in templates
+    ]
+    assert len(identify_requests) == 3
+    # other options are cached separately
+    YKF.face.identify('a', 'group', candidate_list_length=2)
+    assert len(identify_requests) == 4
+
+    YKF.group.add_person('other', 'person', 'template')
+    _identify_many(use_async, loop, templates)
+    assert len(identify_requests) == 4
+
+    YKF.group.remove_person('group', 'person0')
+    _identify_many(use_async, loop, templates)
+    assert len(identify_requests) == 7
@@ -0,0 +1,139 @@
+""" Image Preprocessing Tests """
+import base64
+import io
+import pytest
+import yk_face as YKF
+
+Image = pytest.importorskip('PIL.Image')
+from yk_face.images import ImagePreprocessor  # noqa: E402 pylint: disable=C0413
+
+
+def _jpeg(width: int, height: int, orientation: int = 1) -> bytes:
+    image = Image.new('RGB', (width, height), (120, 80, 40))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=95, exif=exif)
+    return output.getvalue()
+
+
+@pytest.fixture
+def uploaded(monkeypatch):
+    """ Replaces the transport of the face module and records the uploaded images. """
+    images = []
+
+    def request(method, url, json=None, **kwargs):
+        images.append(base64.b64decode(json['image']))
+        return []
+
+    monkeypatch.setattr(YKF.face, 'request', request)
+    yield images
+    YKF.face.set_image_preprocessor(None)
+
+
+def test_preprocessor_downscales_large_images(uploaded, tmp_path):
+    """
+    Test that large images are downscaled, rotated according to EXIF and reported.
+    """
+    reported = []
+    preprocessor = ImagePreprocessor(max_edge=400, report=lambda *sizes: reported.append(sizes))
+    YKF.face.set_image_preprocessor(preprocessor)
+
+    path = tmp_path / 'large.jpg'
+    path.write_bytes(_jpeg(1600, 1200, orientation=6))
+    YKF.face.process(str(path))
+
+    with Image.open(io.BytesIO(uploaded[0])) as image:
+        assert image.size == (300, 400)
+        assert image.getexif().get(0x0112) is None
+    stats = preprocessor.stats()
+    assert (stats.images, stats.reencoded) == (1, 1)
+    assert stats.bytes_after == len(uploaded[0]) < stats.bytes_before == path.stat().st_size
+    assert reported == [(stats.bytes_before, stats.bytes_after)]
+
+
+def test_preprocessor_keeps_small_images(uploaded):
+    """
+    Test that images within the size limit are uploaded untouched.
+    """
+    preprocessor = ImagePreprocessor(max_edge=400)
+    YKF.face.set_image_preprocessor(preprocessor)
+
+    image = _jpeg(200, 100)
+    YKF.face.process(io.BytesIO(image))
+    YKF.face.process(base64.b64encode(image).decode())
+
+    assert uploaded == [image, image]
+    assert preprocessor.stats().reencoded == 0
+
+
+def test_preprocessor_with_invalid_arguments():
+    """
+    Test that invalid preprocessing arguments are rejected.
+    """
+    with pytest.raises(ValueError):
+        ImagePreprocessor(max_edge=0)
+    with pytest.raises(ValueError):
+        ImagePreprocessor(jpeg_quality=100)
+
+
+@pytest.mark.parametrize('wrap', [bytes, bytearray, memoryview])
+def test_process_with_image_buffers(wrap, uploaded):
+    """
+    Test that encoded image buffers are uploaded as they are.
+    """
+    image = _jpeg(64, 48)
+    YKF.face.process(wrap(image))
+    assert uploaded == [image]
+
+
+def test_process_with_numpy_buffers_and_frames(uploaded):
+    """
+    Test that numpy encoded buffers and RGB/BGR frames are accepted.
+    """
+    np = pytest.importorskip('numpy')
+    from yk_face.images import Frame  # pylint: disable=import-outside-toplevel
+
+    image = _jpeg(64, 48)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    frame[..., 0] = 200  # Red in RGB order, blue in BGR order.
+
+    YKF.face.process(np.frombuffer(image, dtype=np.uint8))
+    YKF.face.process(frame)
+    YKF.face.process(Frame(frame, 'BGR'))
+    YKF.face.process(frame[:, :, 0])
+    YKF.face.process(Image.new('RGB', (32, 16)))
+
+    assert uploaded[0] == image
+    decoded = [Image.open(io.BytesIO(data)) for data in uploaded[1:]]
+    assert [image.size for image in decoded] == [(64, 48), (64, 48), (64, 48), (32, 16)]
+    red, _, blue = decoded[0].getpixel((10, 10))
+    assert red > 180 and blue < 20
+    red, _, blue = decoded[1].getpixel((10, 10))
+    assert blue > 180 and red < 20
+    assert decoded[2].mode == 'L'
+
+
+def test_process_with_preprocessed_frame(uploaded):
+    """
+    Test that frames are downscaled and encoded once by the preprocessor.
+    """
+    np = pytest.importorskip('numpy')
+    preprocessor = ImagePreprocessor(max_edge=100)
+    YKF.face.set_image_preprocessor(preprocessor)
+
+    YKF.face.process(np.zeros((300, 200, 3), dtype=np.uint8))
+
+    assert Image.open(io.BytesIO(uploaded[0])).size == (67, 100)
+    assert preprocessor.stats() == (1, 1, 300 * 200 * 3, len(uploaded[0]))
+
+
+def test_process_with_invalid_frame(uploaded):
+    """
+    Test that frames of unsupported types are rejected.
+    """
+    np = pytest.importorskip('numpy')
+    with pytest.raises(TypeError):
+        YKF.face.process(np.zeros((10, 10, 2), dtype=np.uint8))
+    with pytest.raises(TypeError):
+        YKF.face.process(np.zeros((10, 10, 3), dtype=np.float32))
@@ -0,0 +1,120 @@
+""" Metrics Tests """
+import base64
+import logging
+import types
+import pytest
+from yk_utils.apis import YoonikApiException
+import yk_face as YKF
+from yk_face import transport
+from yk_face.metrics import MetricsCollector, RequestMetrics
+from yk_face.policy import RetryPolicy
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    """ Replaces the transport of the encoded requests with a fake server that fails with the
+    scripted status codes, and sets a metrics collector that records the reported calls. """
+    script, reported = [], []
+
+    def request(method, url, data=None, json=None, **kwargs):
+        assert isinstance(data, bytes) and json is None
+        status = script.pop(0) if script else 200
+        if status != 200:
+            raise YoonikApiException(status, 'error')
+        return [{'template': 'template'}] if url == 'face/process' else {'score': 0.5}
+
+    async def request_async(method, url, **kwargs):
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(transport, '_request_encoded', request)
+    monkeypatch.setattr(transport, '_request_encoded_async', request_async)
+    collector = MetricsCollector()
+    collector.add_callback(reported.append)
+    transport.set_metrics(collector)
+    yield collector, script, reported
+    transport.set_metrics(None)
+    transport.set_retry_policy(None)
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_metrics_record_calls(use_async: bool, collector, loop):
+    """
+    Test that calls, retries, errors and stages are recorded and reported to the callbacks.
+    """
+    collector, script, reported = collector
+    transport.set_retry_policy(RetryPolicy(backoff=0))
+    script.extend([503, 200, 400])
+    image = base64.b64encode(b'image').decode()
+    if use_async:
+        loop.run_until_complete(YKF.face.verify_async('a', 'b'))
+        with pytest.raises(YoonikApiException):
+            loop.run_until_complete(YKF.face.verify_async('a', 'b'))
+        loop.run_until_complete(YKF.face.process_async(image))
+    else:
+        YKF.face.verify('a', 'b')
+        with pytest.raises(YoonikApiException):
+            YKF.face.verify('a', 'b')
+        YKF.face.process(image)
+
+    assert [(metrics.endpoint, metrics.attempts, metrics.error_class) for metrics in reported] == [
+        ('verify', 2, None), ('verify', 1, 'http_400'), ('process', 1, None)
+    ]
+    assert all(isinstance(metrics, RequestMetrics) for metrics in reported)
+    assert reported[0].request_bytes == len(b'{"first_template":"a","second_template":"b"}')
+    assert reported[0].response_bytes is None
+    assert collector.in_flight('verify') == 0
+
+    text = collector.to_prometheus()
+    assert 'yk_face_request_duration_seconds_count{endpoint="verify"} 2' in text
+    assert 'yk_face_request_duration_seconds_bucket{endpoint="process",le="+Inf"} 1' in text
+    assert 'yk_face_retries_total{endpoint="verify"} 1' in text
+    assert 'yk_face_errors_total{endpoint="verify",error_class="http_400"} 1' in text
+    assert 'yk_face_requests_in_flight{endpoint="verify"} 0' in text
+    for stage in ('parse_image', 'serialize', 'http'):
+        assert f'yk_face_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert '# TYPE yk_face_request_size_bytes histogram' in text
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_failing_metrics_callback_is_logged(use_async: bool, collector, loop, caplog):
+    """
+    Test that an error raised by a metrics callback is logged instead of failing the request.
+    """
+    collector, _, reported = collector
+
+    def fail(request_metrics):
+        raise RuntimeError('callback failed')
+
+    collector.add_callback(fail)
+    collector.add_callback(reported.append)
+    with caplog.at_level(logging.ERROR, logger='yk_face.metrics'):
+        if use_async:
+            score = loop.run_until_complete(YKF.face.verify_async('a', 'b'))
+        else:
+            score = YKF.face.verify('a', 'b')
+    assert score == 0.5
+    assert len(reported) == 2
+    assert 'Metrics callback' in caplog.text
+    assert collector.in_flight('verify') == 0
+
+
+def test_metrics_response_size_through_client():
+    """
+    Test that response sizes are recorded for the requests performed through a client.
+    """
+    collector = MetricsCollector()
+    client = YKF.YKFaceClient(base_url='http://localhost:1', metrics=collector)
+    content = b'{"score":0.5}'
+    client._session.request = lambda *args, **kwargs: types.SimpleNamespace(
+        status_code=200, headers={'Content-Type': 'application/json'}, content=content
+    )
+    assert client.face.verify('a', 'b') == 0.5
+    assert 'yk_face_response_size_bytes_sum{endpoint="verify"} 13.0' in collector.to_prometheus()
+    assert transport.get_metrics() is None
+
+
+def test_metrics_disabled_exports_nothing():
+    """
+    Test that an empty collector exports an empty text.
+    """
+    assert MetricsCollector().to_prometheus() == ''
@@ -0,0 +1,90 @@
+""" Group Mirror Tests """
+import asyncio
+import base64
+import pytest
+import yk_face as YKF
+
+np = pytest.importorskip('numpy')
+from yk_face.mirror import GroupMirror  # noqa: E402 pylint: disable=C0413
+
+
+def _template(vector) -> str:
+    return base64.b64encode(np.asarray(vector, dtype='<f4').tobytes()).decode()
+
+
+def _identify(persons: dict, face_template: str, minimum_score: float, length: int) -> list:
+    """ Reference identify: scores every person one by one with the local scoring. """
+    from yk_face.scoring import LocalScoring  # pylint: disable=import-outside-toplevel
+    scoring = LocalScoring()
+    candidates = [{'template_id': person_id, 'score': scoring.verify(face_template, template)}
+                  for person_id, template in persons.items()]
+    candidates = [candidate for candidate in candidates if candidate['score'] >= minimum_score]
+    return sorted(candidates, key=lambda candidate: -candidate['score'])[:length]
+
+
+def test_mirror_identify_matches_reference(gallery, loop: asyncio.AbstractEventLoop):
+    """
+    Test that sync and async loaded mirrors identify the same candidates as a full scan.
+    """
+    probe = gallery['person7']
+    with GroupMirror.load('group', concurrency=4) as mirror, \
+            loop.run_until_complete(GroupMirror.load_async('group', concurrency=4)) as mirror_async:
+        assert len(mirror) == len(mirror_async) == 50
+        for minimum_score, length in ((-1.0, 5), (0.1, 50), (2.0, 3)):
+            expected = _identify(gallery, probe, minimum_score, length)
+            for candidates in (mirror.identify(probe, minimum_score, length),
+                               mirror_async.identify(probe, minimum_score, length)):
+                assert [c['template_id'] for c in candidates] == \
+                    [c['template_id'] for c in expected]
+                assert [c['score'] for c in candidates] == \
+                    pytest.approx([c['score'] for c in expected], abs=1e-5)
+        assert mirror.identify(probe)[0]['template_id'] == 'person7'
+
+
+def test_mirror_tracks_mutations(gallery):
+    """
+    Test that add_person and remove_person performed through the SDK update the mirror.
+    """
+    new_template = _template(np.ones(64))
+    with GroupMirror.load('group') as mirror:
+        YKF.group.add_person('group', 'new_person', new_template)
+        YKF.group.add_person('other_group', 'other_person', new_template)
+        YKF.group.remove_person('group', 'person0')
+
+        assert 'new_person' in mirror and 'person0' not in mirror
+        assert 'other_person' not in mirror
+        assert len(mirror) == 50
+        assert mirror.identify(new_template)[0]['template_id'] == 'new_person'
+        assert mirror.identify(gallery['person49'])[0]['template_id'] == 'person49'
+
+    YKF.group.remove_person('group', 'new_person')
+    assert 'new_person' in mirror
+
+
+def test_mirror_marks_itself_stale_on_failed_mutation(gallery):
+    """
+    Test that a mutation the mirror cannot apply does not fail the call, and marks the mirror
+    stale until it is refreshed.
+    """
+    with GroupMirror.load('group') as mirror:
+        YKF.group.add_person('group', 'short_person', _template(np.ones(8)))
+        assert 'short_person' not in mirror and mirror.stale
+        YKF.group.remove_person('group', 'short_person')
+        assert mirror.stale
+        mirror.refresh()
+        assert not mirror.stale
+
+
+def test_failing_mutation_listener_is_logged(gallery, caplog):
+    """
+    Test that errors of mutation listeners are logged instead of raised to the caller.
+    """
+    def listener(*args):
+        raise RuntimeError('listener failure')
+
+    YKF.group.add_mutation_listener(listener)
+    try:
+        YKF.group.add_person('group', 'new_person', gallery['person0'])
+    finally:
+        YKF.group.remove_mutation_listener(listener)
+    assert 'listener failure' in caplog.text
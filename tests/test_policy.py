@@ -0,0 +1,186 @@
+""" Retry and Hedging Policy Tests """
+import asyncio
+import threading
+import time
+import pytest
+import yk_utils.apis
+from yk_utils.apis import YoonikApiException
+import yk_face as YKF
+from yk_face import transport
+from yk_face.policy import RetryBudget, RetryPolicy
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """ Replaces yk_utils.apis with a fake server that answers with the scripted delays and
+    status codes, one per request, and then with a fast success. """
+    script, sent = [], []
+
+    def respond(url):
+        sent.append(url)
+        delay, status = script.pop(0) if script else (0, 200)
+        return delay, status
+
+    def result(status):
+        if status != 200:
+            raise YoonikApiException(status, 'error')
+        return {'score': 0.5}
+
+    def request(method, url, **kwargs):
+        delay, status = respond(url)
+        time.sleep(delay)
+        return result(status)
+
+    async def request_async(method, url, **kwargs):
+        delay, status = respond(url)
+        await asyncio.sleep(delay)
+        return result(status)
+
+    monkeypatch.setattr(yk_utils.apis, 'request', request)
+    monkeypatch.setattr(yk_utils.apis, 'request_async', request_async)
+    yield script, sent
+    transport.set_retry_policy(None)
+
+
+def _verify(use_async: bool, loop: asyncio.AbstractEventLoop) -> float:
+    if use_async:
+        return loop.run_until_complete(YKF.face.verify_async('a', 'b'))
+    return YKF.face.verify('a', 'b')
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_policy_retries_idempotent_requests(use_async: bool, server, loop):
+    """
+    Test that retryable failures are retried up to max_attempts.
+    """
+    script, sent = server
+    transport.set_retry_policy(RetryPolicy(max_attempts=3, backoff=0.001))
+
+    script.extend([(0, 503), (0, 502)])
+    assert _verify(use_async, loop) == 0.5
+    assert len(sent) == 3
+
+    script.extend([(0, 503)] * 3)
+    with pytest.raises(YoonikApiException):
+        _verify(use_async, loop)
+    assert len(sent) == 6
+
+    script.append((0, 409))
+    with pytest.raises(YoonikApiException):
+        _verify(use_async, loop)
+    assert len(sent) == 7
+
+
+def test_policy_does_not_retry_non_idempotent_requests(server):
+    """
+    Test that add_person and create are not retried.
+    """
+    script, sent = server
+    transport.set_retry_policy(RetryPolicy(backoff=0.001))
+    script.extend([(0, 503), (0, 503)])
+    with pytest.raises(YoonikApiException):
+        YKF.group.add_person('group', 'person', 'template')
+    with pytest.raises(YoonikApiException):
+        YKF.group.create('group')
+    assert len(sent) == 2
+
+
+def test_policy_retry_budget(server):
+    """
+    Test that retries stop when the budget is exhausted.
+    """
+    script, sent = server
+    budget = RetryBudget(ratio=0.0, initial=2)
+    transport.set_retry_policy(RetryPolicy(max_attempts=5, backoff=0.001, budget=budget))
+    script.extend([(0, 503)] * 5)
+    with pytest.raises(YoonikApiException):
+        YKF.face.verify('a', 'b')
+    assert len(sent) == 3
+    assert budget.tokens < 1
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_policy_hedges_slow_read_only_requests(use_async: bool, server, loop):
+    """
+    Test that a request slower than the p95 latency gets a hedged duplicate.
+    """
+    script, sent = server
+    policy = RetryPolicy(hedge=True, min_hedge_delay=0.01)
+    transport.set_retry_policy(policy)
+    for _ in range(policy.latencies.min_samples):
+        _verify(use_async, loop)
+    assert len(sent) == policy.latencies.min_samples
+
+    script.append((1.0, 200))
+    start = time.perf_counter()
+    assert _verify(use_async, loop) == 0.5
+    assert time.perf_counter() - start < 0.5
+    assert len(sent) == policy.latencies.min_samples + 2
+
+
+def test_policy_close_shuts_down_hedge_threads(server):
+    """
+    Test that closing the policy shuts down the threads of the synchronous hedged requests.
+    """
+    script, _ = server
+    with RetryPolicy(hedge=True, min_hedge_delay=0.01) as policy:
+        transport.set_retry_policy(policy)
+        for _ in range(policy.latencies.min_samples):
+            YKF.face.verify('a', 'b')
+        script.append((0.2, 200))
+        assert YKF.face.verify('a', 'b') == 0.5
+        executor = policy._executor  # pylint: disable=protected-access
+        threads = list(executor._threads)  # pylint: disable=protected-access
+        assert threads
+
+    assert policy._executor is None  # pylint: disable=protected-access
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_policy_hedging_does_not_bound_concurrency(monkeypatch):
+    """
+    Test that synchronous hedged requests from many threads are all in flight at once, instead
+    of queueing in the hedge thread pool.
+    """
+    state = {'in_flight': 0, 'peak': 0, 'delay': 0}
+    lock = threading.Lock()
+
+    def request(method, url, **kwargs):
+        with lock:
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+        time.sleep(state['delay'])
+        with lock:
+            state['in_flight'] -= 1
+        return {'score': 0.5}
+
+    monkeypatch.setattr(yk_utils.apis, 'request', request)
+    with RetryPolicy(hedge=True, min_hedge_delay=1.0) as policy:
+        transport.set_retry_policy(policy)
+        try:
+            for _ in range(policy.latencies.min_samples):
+                YKF.face.verify('a', 'b')
+            state['delay'], state['peak'] = 0.1, 0
+            threads = [threading.Thread(target=YKF.face.verify, args=('a', 'b'))
+                       for _ in range(48)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            transport.set_retry_policy(None)
+    assert state['peak'] == 48
+    assert elapsed < 0.5
+
+
+def test_endpoint_names():
+    """
+    Test the endpoint names of the face and group URLs.
+    """
+    assert transport.endpoint_name('POST', 'face/verify_id') == 'verify_id'
+    assert transport.endpoint_name('GET', 'gallery/group') == 'list_ids'
+    assert transport.endpoint_name('POST', 'gallery/group') == 'create'
+    assert transport.endpoint_name('GET', 'gallery/group/person') == 'get_person_template'
+    assert transport.endpoint_name('DELETE', 'gallery/group/person') == 'remove_person'
@@ -0,0 +1,108 @@
+""" Face process_many_async Tests """
+import asyncio
+import pytest
+import yk_face as YKF
+
+
+@pytest.fixture
+def fake_process(monkeypatch):
+    """ Replaces `face.process_async` with a fake that records the concurrency it observes. """
+    stats = {'in_flight': 0, 'max_in_flight': 0, 'calls': 0}
+
+    async def process_async(image, processings=None, configurations=None):
+        stats['calls'] += 1
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        await asyncio.sleep(0.001 * (image % 3))
+        stats['in_flight'] -= 1
+        if image < 0:
+            raise ValueError("invalid image")
+        return [{'template': str(image)}]
+
+    monkeypatch.setattr(YKF.face, 'process_async', process_async)
+    return stats
+
+
+async def _collect(async_iterator) -> dict:
+    return {index: result async for index, result in async_iterator}
+
+
+def test_process_many_async_bounds_concurrency(fake_process, loop: asyncio.AbstractEventLoop):
+    """
+    Test that every image is processed and no more than `concurrency` calls are in flight.
+    """
+    results = loop.run_until_complete(
+        _collect(YKF.face.process_many_async(range(20), concurrency=3))
+    )
+    assert sorted(results) == list(range(20))
+    assert all(results[index] == [{'template': str(index)}] for index in results)
+    assert fake_process['max_in_flight'] == 3
+
+
+def test_process_many_async_consumes_lazily(fake_process, loop: asyncio.AbstractEventLoop):
+    """
+    Test that images are only pulled from the input when a slot is free.
+    """
+    pulled = []
+
+    def images():
+        for image in range(10):
+            pulled.append(image)
+            yield image
+
+    async def first_result():
+        results = YKF.face.process_many_async(images(), concurrency=2)
+        result = await results.__anext__()
+        await results.aclose()
+        return result
+
+    loop.run_until_complete(first_result())
+    assert len(pulled) <= 2
+
+
+def test_process_many_async_holds_at_most_concurrency_images(
+        fake_process, loop: asyncio.AbstractEventLoop):
+    """
+    Test that no more than `concurrency` images are pulled and not yet consumed at any time.
+    """
+    state = {'pulled': 0, 'consumed': 0, 'max_held': 0}
+
+    def images():
+        for image in range(20):
+            state['pulled'] += 1
+            state['max_held'] = max(state['max_held'], state['pulled'] - state['consumed'])
+            yield image
+
+    async def consume_slowly():
+        async for _ in YKF.face.process_many_async(images(), concurrency=3):
+            state['consumed'] += 1
+            await asyncio.sleep(0.002)
+
+    loop.run_until_complete(consume_slowly())
+    assert state['consumed'] == 20
+    assert state['max_held'] == 3
+
+
+def test_process_many_async_yields_exceptions(fake_process, loop: asyncio.AbstractEventLoop):
+    """
+    Test that a failing image yields its exception without aborting the others.
+    Async iterables are also accepted as input.
+    """
+    async def images():
+        for image in (1, -1, 2):
+            yield image
+
+    results = loop.run_until_complete(
+        _collect(YKF.face.process_many_async(images(), concurrency=2))
+    )
+    assert isinstance(results[1], ValueError)
+    assert results[0] == [{'template': '1'}]
+    assert results[2] == [{'template': '2'}]
+
+
+def test_process_many_async_with_invalid_concurrency(loop: asyncio.AbstractEventLoop):
+    """
+    Test that a concurrency lower than 1 is rejected.
+    """
+    with pytest.raises(ValueError):
+        loop.run_until_complete(_collect(YKF.face.process_many_async([1], concurrency=0)))
@@ -0,0 +1,114 @@
+""" Rate Limiter Tests """
+import asyncio
+import threading
+import time
+import pytest
+import yk_utils.apis
+import yk_face as YKF
+from yk_face import transport
+from yk_face.ratelimit import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """ Replaces yk_utils.apis with a fake server that records when each request arrives. """
+    sent = []
+
+    def request(method, url, **kwargs):
+        sent.append((url, time.monotonic()))
+        return {'score': 0.5}
+
+    async def request_async(method, url, **kwargs):
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(yk_utils.apis, 'request', request)
+    monkeypatch.setattr(yk_utils.apis, 'request_async', request_async)
+    yield sent
+    transport.set_rate_limiter(None)
+
+
+def test_token_bucket_burst_then_rate():
+    """
+    Test that a bucket grants `burst` requests at once and then one every 1 / rate seconds.
+    """
+    bucket = TokenBucket(rate=10, burst=3)
+    delays = [bucket.reserve() for _ in range(5)]
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert delays[3] == pytest.approx(0.1, abs=0.01)
+    assert delays[4] == pytest.approx(0.2, abs=0.01)
+
+
+def test_rate_limiter_endpoint_rates():
+    """
+    Test that endpoint buckets only apply to their endpoint and add to the global bucket.
+    """
+    limiter = RateLimiter(endpoint_rates={'verify': (10, 1), 'identify': 5})
+    assert limiter.reserve('verify') == 0.0
+    assert limiter.reserve('verify') == pytest.approx(0.1, abs=0.01)
+    assert limiter.reserve('identify') == 0.0
+    assert limiter.reserve('identify') == pytest.approx(0.2, abs=0.01)
+    assert limiter.reserve('process') == 0.0
+    assert limiter.reserve('process') == 0.0
+
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_rate_limiter_paces_requests(use_async: bool, server, loop):
+    """
+    Test that requests are paced by the global rate limiter.
+    """
+    transport.set_rate_limiter(RateLimiter(rate=50, burst=2))
+    if use_async:
+        async def verify_all():
+            return await asyncio.gather(*(YKF.face.verify_async('a', 'b') for _ in range(6)))
+        loop.run_until_complete(verify_all())
+    else:
+        for _ in range(6):
+            YKF.face.verify('a', 'b')
+
+    times = [sent_at for _, sent_at in server]
+    assert len(times) == 6
+    # 2 requests at once, then one every 20ms
+    assert times[-1] - times[0] >= 0.07
+
+
+def test_rate_limiter_shared_by_threads_and_coroutines(server, loop):
+    """
+    Test that a client rate limiter is shared by the synchronous and asynchronous requests of the
+    client, and does not affect requests performed without it.
+    """
+    limiter = RateLimiter(endpoint_rates={'verify': (40, 1)})
+    client = YKF.YKFaceClient(base_url='http://localhost:1', rate_limiter=limiter)
+    calls = []
+
+    def request(*args, **kwargs):
+        calls.append(time.monotonic())
+        return {'score': 0.5}
+
+    async def request_async(*args, **kwargs):
+        return request()
+
+    client.request = request
+    client.request_async = request_async
+
+    threads = [threading.Thread(target=client.face.verify, args=('a', 'b')) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    async def verify_all():
+        await asyncio.gather(*(client.face.verify_async('a', 'b') for _ in range(3)))
+
+    loop.run_until_complete(verify_all())
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 6
+    assert max(calls) - min(calls) >= 5 * 0.025 - 0.01
+
+    start = time.monotonic()
+    YKF.face.verify('a', 'b')
+    assert time.monotonic() - start < 0.02
+    assert transport.get_rate_limiter(client) is limiter
+    assert transport.get_rate_limiter() is None
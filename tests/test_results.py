@@ -0,0 +1,84 @@
+""" FaceEntry Result Tests """
+import base64
+import sys
+import pytest
+import yk_face as YKF
+from yk_face.results import FaceEntry
+from benchmarks.fake_server import FakeYouFace
+
+IMAGE = base64.b64encode(b'image').decode()
+
+
+@pytest.fixture(scope='module')
+def server():
+    with FakeYouFace(template_size=1024, faces=2) as server:
+        yield server
+
+
+def _deep_size(value) -> int:
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_deep_size(key) + _deep_size(item)
+                                          for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_deep_size(item) for item in value)
+    if isinstance(value, FaceEntry):
+        return sys.getsizeof(value) + sum(_deep_size(getattr(value, name))
+                                          for name in FaceEntry.__slots__)
+    return sys.getsizeof(value)
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_process_as_entries(server, use_async, loop):
+    """
+    Test that process returns FaceEntry objects equivalent to the face entry dictionaries.
+    """
+    with YKF.YKFaceClient(server.base_url) as client:
+        faces = client.face.process(IMAGE)
+        if use_async:
+            async def process():
+                try:
+                    return await client.face.process_async(IMAGE, as_entries=True)
+                finally:
+                    await client.aclose()
+            entries = loop.run_until_complete(process())
+        else:
+            entries = client.face.process(IMAGE, as_entries=True)
+
+    assert len(entries) == 2 and all(isinstance(entry, FaceEntry) for entry in entries)
+    entry, face = entries[0], faces[0]
+    assert (entry.biometric_type, entry.x, entry.y, entry.width, entry.height) == \
+        ('Face', 10, 20, 120, 160)
+    assert entry.template == base64.b64decode(face['template'])
+    assert entry.template_base64 == face['template']
+    assert entry.quality_metrics == face['quality_metrics']
+    assert entry.biometric_points == face['biometric_points']
+    assert entry.to_dict() == face
+    assert FaceEntry.from_dict(face) == entry
+    assert _deep_size(entry) * 3 < _deep_size(face)
+    with pytest.raises(AttributeError):
+        entry.score = 1.0
+
+
+def test_face_entry_missing_and_extra_fields():
+    """
+    Test entries without template and analysis, and with fields unknown to FaceEntry.
+    """
+    entry = FaceEntry.from_dict({'biometric_type': 'Face', 'x': 0, 'y': 5, 'liveness': 0.9})
+    assert entry.template is None and entry.template_base64 is None
+    assert entry.quality_metrics is None and entry.biometric_points is None
+    assert entry.to_dict() == {'biometric_type': 'Face', 'x': 0, 'y': 5, 'liveness': 0.9}
+    assert repr(entry) == "FaceEntry(biometric_type='Face', x=0, y=5, width=None, height=None)"
+
+
+def test_process_many_as_entries(server, loop):
+    """
+    Test that process_many_async yields FaceEntry objects.
+    """
+    async def process_many():
+        async with YKF.YKFaceClient(server.base_url) as client:
+            return [result async for result in
+                    client.face.process_many_async([IMAGE] * 3, as_entries=True)]
+
+    results = loop.run_until_complete(process_many())
+    assert sorted(index for index, _ in results) == [0, 1, 2]
+    assert all(isinstance(entry, FaceEntry) for _, entries in results for entry in entries)
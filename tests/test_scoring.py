@@ -0,0 +1,104 @@
+""" Local Scoring Tests """
+import asyncio
+import base64
+import math
+import pytest
+import yk_face as YKF
+from yk_face.util import FaceException
+
+np = pytest.importorskip('numpy')
+from yk_face.scoring import LocalScoring, validate_backend  # noqa: E402 pylint: disable=C0413
+
+
+def _template(vector) -> str:
+    return base64.b64encode(np.asarray(vector, dtype='<f4').tobytes()).decode()
+
+
+def _server_score(first: str, second: str) -> float:
+    """ Stand-in for the server scoring: cosine similarity computed in plain python. """
+    first = np.frombuffer(base64.b64decode(first), dtype='<f4').tolist()
+    second = np.frombuffer(base64.b64decode(second), dtype='<f4').tolist()
+    dot = sum(a * b for a, b in zip(first, second))
+    return dot / (math.sqrt(sum(a * a for a in first)) * math.sqrt(sum(b * b for b in second)))
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """ Replaces the transport of the face module with a local stand-in of `face/verify`. """
+    calls = []
+
+    def request(method, url, json=None, **kwargs):
+        calls.append(url)
+        return {'score': _server_score(json['first_template'], json['second_template'])}
+
+    async def request_async(method, url, json=None, **kwargs):
+        return request(method, url, json=json)
+
+    monkeypatch.setattr(YKF.face, 'request', request)
+    monkeypatch.setattr(YKF.face, 'request_async', request_async)
+    yield calls
+    YKF.face.set_scoring_backend(None)
+
+
+@pytest.fixture
+def templates():
+    rng = np.random.default_rng(7)
+    return [_template(vector) for vector in rng.normal(size=(16, 128))]
+
+
+def test_local_scoring_matches_server(server, templates):
+    """
+    Test that local scores match the scores of the server stand-in.
+    """
+    pairs = list(zip(templates, templates[1:] + templates[:1]))
+    assert validate_backend(LocalScoring(), pairs) < 1e-5
+
+
+def test_local_scoring_detects_deviation(server, templates):
+    """
+    Test that a backend that does not match the server is reported.
+    """
+    with pytest.raises(FaceException):
+        validate_backend(LocalScoring(scale=2.0), [(templates[0], templates[1])])
+
+
+def test_verify_uses_scoring_backend(server, templates, loop: asyncio.AbstractEventLoop):
+    """
+    Test that verify and verify_many do not perform requests when a backend is set.
+    """
+    remote_scores = YKF.face.verify_many(templates[0], templates)
+    remote_scores_async = loop.run_until_complete(
+        YKF.face.verify_many_async(templates[0], templates, concurrency=4)
+    )
+    assert len(server) == 2 * len(templates)
+
+    YKF.face.set_scoring_backend(LocalScoring())
+    local_scores = YKF.face.verify_many(templates[0], templates)
+    local_score = YKF.face.verify(templates[0], templates[3])
+    local_score_async = loop.run_until_complete(YKF.face.verify_async(templates[0], templates[3]))
+
+    assert len(server) == 2 * len(templates)
+    assert remote_scores_async == pytest.approx(remote_scores)
+    assert local_scores == pytest.approx(remote_scores, abs=1e-5)
+    assert local_score == pytest.approx(remote_scores[3], abs=1e-5)
+    assert local_score_async == local_score
+    assert isinstance(local_score, float)
+
+
+def test_local_scoring_with_templates_of_different_lengths():
+    """
+    Test that templates of different lengths are rejected.
+    """
+    with pytest.raises(FaceException):
+        LocalScoring().verify(_template([1, 2, 3]), _template([1, 2]))
+    with pytest.raises(FaceException):
+        LocalScoring().verify_many(_template([1, 2, 3]), [_template([1, 2]), _template([3, 4])])
+
+
+def test_local_verify_many_without_templates(server, templates):
+    """
+    Test that scoring against no templates returns no scores, like the server path.
+    """
+    assert YKF.face.verify_many(templates[0], []) == []
+    YKF.face.set_scoring_backend(LocalScoring())
+    assert YKF.face.verify_many(templates[0], []) == []
@@ -0,0 +1,109 @@
+""" Fast Serialization Tests """
+import asyncio
+import json
+import warnings
+import pytest
+import yk_utils.apis
+import yk_face as YKF
+from yk_face import serialization, transport
+from yk_face_api_models import ProcessRequestConfig
+from benchmarks.fake_server import FakeYouFace
+
+CONFIGURATIONS = [
+    ProcessRequestConfig(name="config1", value="12490812.523"),
+    ProcessRequestConfig(name="config2", bvalue=True),
+]
+
+
+@pytest.fixture
+def fast():
+    serialization.set_fast_serialization(True)
+    yield
+    serialization.set_fast_serialization(False)
+
+
+def _build_all() -> list:
+    return [
+        serialization.process_request('aW1hZ2U=', ['detect', 'templify'], CONFIGURATIONS),
+        serialization.verify_request('first', 'second'),
+        serialization.verify_id_request('template', 'person', 'group'),
+        serialization.verify_id_request('template', 'person', None),
+        serialization.identify_request('template', 'group', -1, 3),
+        serialization.template_request('template'),
+    ]
+
+
+def test_fast_payloads_match_models():
+    """
+    Test that fast payloads are equal to the pydantic model dumps.
+    """
+    expected = _build_all()
+    serialization.set_fast_serialization(True)
+    try:
+        payloads = _build_all()
+    finally:
+        serialization.set_fast_serialization(False)
+
+    expected[0]['processings'] = sorted(expected[0]['processings'])
+    payloads[0]['processings'] = sorted(payloads[0]['processings'])
+    assert payloads == expected
+    assert [json.loads(serialization.dumps(payload)) for payload in payloads] == expected
+
+
+@pytest.mark.parametrize('build', [
+    lambda: serialization.process_request('image', ['detect', 'unknown'], []),
+    lambda: serialization.process_request(None, ['detect'], []),
+    lambda: serialization.verify_request('template', 1),
+    lambda: serialization.identify_request('template', 'group', -2, 1),
+    lambda: serialization.identify_request('template', 'group', 0.5, 0),
+    lambda: serialization.template_request(None),
+])
+def test_fast_payloads_validation(build, fast):
+    """
+    Test that fast payloads keep the validations of the models.
+    """
+    with pytest.raises(ValueError):
+        build()
+
+
+def test_fast_serialization_encodes_once(fast, monkeypatch):
+    """
+    Test that with fast serialization the transport sends the encoded payload.
+    """
+    sent = {}
+
+    def request(method, url, data=None, json=None, headers=None, params=None):
+        sent.update(data=data, json=json, headers=headers)
+        return {'score': 0.25}
+
+    monkeypatch.setattr(transport, '_request_encoded', request)
+    assert YKF.face.verify('first', 'second') == 0.25
+    assert sent['json'] is None
+    assert json.loads(sent['data']) == {'first_template': 'first', 'second_template': 'second'}
+    assert sent['headers']['Content-Type'] == 'application/json'
+
+
+def test_fast_serialization_without_client(fast, monkeypatch):
+    """
+    Test that encoded requests performed without a client are sent as raw content, without
+    httpx deprecation warnings, and that their responses are decoded by serialization.loads.
+    """
+    decoded = []
+
+    def loads(document):
+        decoded.append(document)
+        return json.loads(document)
+
+    monkeypatch.setattr(serialization, 'loads', loads)
+    with FakeYouFace(template_size=64) as server:
+        monkeypatch.setattr(yk_utils.apis.BaseUrl, 'base_url', server.base_url, raising=False)
+        loop = asyncio.new_event_loop()
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', DeprecationWarning)
+                faces = loop.run_until_complete(YKF.face.process_async('aW1hZ2U='))
+                score = YKF.face.verify(faces[0]['template'], faces[0]['template'])
+        finally:
+            loop.close()
+    assert isinstance(score, float)
+    assert len(decoded) == 2
@@ -0,0 +1,106 @@
+""" Single-Flight Coalescing Tests """
+import asyncio
+import threading
+import time
+import pytest
+import yk_utils.apis
+from yk_utils.apis import YoonikApiException
+import yk_face as YKF
+from yk_face import transport
+from yk_face.singleflight import SingleFlight
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """ Replaces yk_utils.apis with a slow fake server that records the requests it receives. """
+    sent = []
+
+    def respond(url, json):
+        sent.append((url, json))
+        if json.get('first_template') == 'error':
+            raise YoonikApiException(400, 'invalid template')
+        return {'score': 0.5, 'payload': dict(json)}
+
+    def request(method, url, json=None, **kwargs):
+        time.sleep(0.05)
+        return respond(url, json)
+
+    async def request_async(method, url, json=None, **kwargs):
+        await asyncio.sleep(0.05)
+        return respond(url, json)
+
+    monkeypatch.setattr(yk_utils.apis, 'request', request)
+    monkeypatch.setattr(yk_utils.apis, 'request_async', request_async)
+    single_flight = SingleFlight()
+    transport.set_single_flight(single_flight)
+    yield sent, single_flight
+    transport.set_single_flight(None)
+
+
+def test_single_flight_coalesces_threads(server):
+    """
+    Test that identical concurrent requests from threads are sent once and that distinct ones
+    are not coalesced.
+    """
+    sent, single_flight = server
+    results = []
+
+    def verify(template):
+        results.append(YKF.face.verify(template, 'b'))
+
+    threads = [threading.Thread(target=verify, args=('a',)) for _ in range(5)]
+    threads.append(threading.Thread(target=verify, args=('c',)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [0.5] * 6
+    assert len(sent) == 2
+    assert single_flight.coalesced == 4
+
+    # nothing is kept once the request completes
+    YKF.face.verify('a', 'b')
+    assert len(sent) == 3
+
+
+def test_single_flight_coalesces_coroutines(server, loop):
+    """
+    Test that identical concurrent requests from coroutines are sent once, that every caller
+    gets its own copy of the result and that errors are shared.
+    """
+    sent, _ = server
+
+    async def run():
+        payloads = await asyncio.gather(
+            *(transport.request_async('POST', 'face/verify', json={'first_template': 'a'})
+              for _ in range(3))
+        )
+        errors = await asyncio.gather(
+            *(YKF.face.verify_async('error', 'b') for _ in range(3)), return_exceptions=True
+        )
+        return payloads, errors
+
+    payloads, errors = loop.run_until_complete(run())
+    assert len(sent) == 2
+    assert payloads[0] == payloads[1] == payloads[2]
+    payloads[0]['payload']['first_template'] = 'modified'
+    assert payloads[1]['payload']['first_template'] == 'a'
+    assert all(isinstance(error, YoonikApiException) for error in errors)
+
+
+def test_single_flight_cancellation(server, loop):
+    """
+    Test that a cancelled caller does not cancel the request shared with other callers.
+    """
+    sent, _ = server
+
+    async def run():
+        first = asyncio.ensure_future(YKF.face.verify_async('a', 'b'))
+        second = asyncio.ensure_future(YKF.face.verify_async('a', 'b'))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert loop.run_until_complete(run()) == 0.5
+    assert len(sent) == 1
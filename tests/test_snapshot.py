@@ -0,0 +1,64 @@
+""" Group Snapshot Tests """
+import asyncio
+import pytest
+import yk_face as YKF
+from yk_face.snapshot import Snapshot
+from yk_face.util import FaceException
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_group_export_import(use_async: bool, gallery, tmp_path, loop: asyncio.AbstractEventLoop):
+    """
+    Test sync and async export of a group and its import into an empty group.
+    """
+    path = str(tmp_path / 'group.snapshot')
+    persons = dict(gallery)
+    if use_async:
+        loop.run_until_complete(YKF.group.export_async('group', path, concurrency=4))
+    else:
+        YKF.group.export('group', path, concurrency=4)
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.person_ids == list(persons)
+        assert dict(snapshot) == persons
+        assert snapshot.templates('<f4').shape == (50, 64)
+
+    gallery.clear()
+    if use_async:
+        errors = loop.run_until_complete(YKF.group.import_async(path, 'group', concurrency=4))
+    else:
+        errors = YKF.group.import_(path, 'group', concurrency=4)
+    assert errors == {}
+    assert gallery == persons
+
+
+def test_mirror_from_snapshot(gallery, tmp_path):
+    """
+    Test that a mirror loaded from a snapshot identifies like a mirror loaded from the group.
+    """
+    np = pytest.importorskip('numpy')
+    from yk_face.mirror import GroupMirror  # pylint: disable=import-outside-toplevel
+
+    path = str(tmp_path / 'group.snapshot')
+    YKF.group.export('group', path)
+    with GroupMirror.from_snapshot(path, 'group') as mirror, GroupMirror.load('group') as loaded:
+        assert len(mirror) == 50
+        assert isinstance(mirror._matrix.base, np.memmap)  # pylint: disable=protected-access
+        for person_id in ('person0', 'person31'):
+            candidates = mirror.identify(gallery[person_id], candidate_list_length=3)
+            expected = loaded.identify(gallery[person_id], candidate_list_length=3)
+            assert [c['template_id'] for c in candidates] == [c['template_id'] for c in expected]
+            assert [c['score'] for c in candidates] == \
+                pytest.approx([c['score'] for c in expected], abs=1e-5)
+    with Snapshot(path) as snapshot:
+        assert np.all(np.isfinite(snapshot.templates('<f4')))
+
+
+def test_snapshot_with_invalid_file(tmp_path):
+    """
+    Test that files that are not snapshots are rejected.
+    """
+    path = tmp_path / 'invalid.snapshot'
+    path.write_bytes(b'not a snapshot' * 10)
+    with pytest.raises(FaceException):
+        Snapshot(str(path))
@@ -0,0 +1,145 @@
+""" Person Template Cache and Prefetch Tests """
+import base64
+import pytest
+import yk_face as YKF
+from yk_face import transport
+
+
+@pytest.fixture
+def template_cache(gallery, monkeypatch):
+    """ Sets a template cache and counts the requests sent to the gallery and face endpoints. """
+    sent = []
+    gallery_request = YKF.group.request
+
+    def request(method, url, json=None, **kwargs):
+        sent.append((method, url))
+        return gallery_request(method, url, json=json)
+
+    async def request_async(method, url, json=None, **kwargs):
+        return request(method, url, json=json)
+
+    def face_request(method, url, json=None, **kwargs):
+        sent.append((method, url))
+        return {'score': 0.5 if url == 'face/verify' else 0.25}
+
+    async def face_request_async(method, url, json=None, **kwargs):
+        return face_request(method, url, json=json)
+
+    monkeypatch.setattr(YKF.group, 'request', request)
+    monkeypatch.setattr(YKF.group, 'request_async', request_async)
+    monkeypatch.setattr(YKF.face, 'request', face_request)
+    monkeypatch.setattr(YKF.face, 'request_async', face_request_async)
+    cache = YKF.LRUCache(maxsize=100, ttl=60)
+    YKF.group.set_template_cache(cache)
+    yield cache, sent
+    YKF.group.set_template_cache(None)
+
+
+def _key(group_id: str, person_id: str) -> tuple:
+    return transport.server_identity(), group_id, person_id
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_prefetch_warms_template_cache(use_async: bool, template_cache, gallery, loop):
+    """
+    Test that prefetched templates are served without requests, and that errors are collected.
+    """
+    cache, sent = template_cache
+    person_ids = ['person0', 'person1', 'missing']
+    if use_async:
+        errors = loop.run_until_complete(YKF.group.prefetch_async('group', person_ids))
+        template = loop.run_until_complete(YKF.group.get_person_template_async('group', 'person1'))
+        score = loop.run_until_complete(
+            YKF.face.verify_id_async('face', 'person0', 'group', use_template_cache=True)
+        )
+    else:
+        errors = YKF.group.prefetch('group', person_ids)
+        template = YKF.group.get_person_template('group', 'person1')
+        score = YKF.face.verify_id('face', 'person0', 'group', use_template_cache=True)
+
+    assert list(errors) == ['missing']
+    assert template == gallery['person1']
+    assert score == 0.5
+    assert len(sent) == 4
+    assert sent[-1] == ('POST', 'face/verify')
+
+    # a template that is not cached falls back to a verify id request
+    assert YKF.face.verify_id('face', 'person2', 'group', use_template_cache=True) == 0.25
+
+
+def test_template_cache_invalidated_by_mutations(template_cache, gallery):
+    """
+    Test that add_person, remove_person and delete invalidate the cached templates.
+    """
+    cache, _ = template_cache
+    YKF.group.prefetch('group', ['person0', 'person1', 'person2'])
+    YKF.group.prefetch('other', ['person0'])
+    other_template = gallery['person0']
+    YKF.group.add_person('group', 'person0', 'new_template')
+    assert YKF.group.cached_person_template('group', 'person0') is None
+    assert YKF.group.get_person_template('group', 'person0') == 'new_template'
+
+    YKF.group.remove_person('group', 'person1')
+    assert _key('group', 'person1') not in cache
+    assert _key('group', 'person2') in cache
+
+    YKF.group.delete('group')
+    assert len(cache) == 1
+    assert YKF.group.cached_person_template('other', 'person0') == other_template
+
+
+def test_prefetch_requires_cache():
+    """
+    Test that prefetch fails without a template cache.
+    """
+    with pytest.raises(ValueError):
+        YKF.group.prefetch('group', ['person0'])
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_reloads_bypass_template_cache(use_async: bool, template_cache, gallery, tmp_path, loop):
+    """
+    Test that mirror refreshes and snapshot exports request the templates instead of using the
+    possibly stale cached ones.
+    """
+    np = pytest.importorskip('numpy')
+    from yk_face.mirror import GroupMirror  # pylint: disable=import-outside-toplevel
+    from yk_face.snapshot import Snapshot  # pylint: disable=import-outside-toplevel
+    cache, _ = template_cache
+    stale = gallery['person1']
+    cache.put(_key('group', 'person0'), stale)
+    path = str(tmp_path / 'group.snapshot')
+    mirror = GroupMirror('group', track_mutations=False)
+    if use_async:
+        loop.run_until_complete(mirror.refresh_async())
+        loop.run_until_complete(YKF.group.export_async('group', path))
+    else:
+        mirror.refresh()
+        YKF.group.export('group', path)
+    assert mirror.identify(gallery['person0'])[0]['template_id'] == 'person0'
+    # the reloaded gallery is not stored in the cache, which still holds its working set
+    assert len(cache) == 1
+    with Snapshot(path) as snapshot:
+        row = list(snapshot.person_ids).index('person0')
+        expected = np.frombuffer(base64.b64decode(gallery['person0']), dtype='<f4')
+        assert np.array_equal(snapshot.templates('<f4')[row], expected)
+
+
+def test_template_cache_is_not_shared_between_servers(template_cache, gallery):
+    """
+    Test that the templates fetched through a client are not used by the clients of other
+    servers or API keys.
+    """
+    first = YKF.YKFaceClient('http://first', key='a')
+    second = YKF.YKFaceClient('http://second', key='a')
+    other_key = YKF.YKFaceClient('http://first', key='b')
+    first.group.prefetch('group', ['person0'])
+    assert first.group.cached_person_template('group', 'person0') == gallery['person0']
+    assert second.group.cached_person_template('group', 'person0') is None
+    assert other_key.group.cached_person_template('group', 'person0') is None
+    assert second.face.verify_id('face', 'person0', 'group', use_template_cache=True) == 0.25
+
+    second.group.prefetch('group', ['person0'])
+    first.group.delete('group')
+    assert first.group.cached_person_template('group', 'person0') is None
+    assert second.group.cached_person_template('group', 'person0') == gallery['person0']
@@ -0,0 +1,79 @@
+""" Tracing Tests """
+import base64
+import types
+import pytest
+import yk_utils.apis
+import yk_face as YKF
+from yk_face import transport
+from yk_face.tracing import RecordingTracer
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    """ Replaces yk_utils.apis with a fake server and sets a recording tracer. """
+    def request(method, url, **kwargs):
+        return [{'template': 'template'}] if url == 'face/process' else {'score': 0.5}
+
+    async def request_async(method, url, **kwargs):
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(yk_utils.apis, 'request', request)
+    monkeypatch.setattr(yk_utils.apis, 'request_async', request_async)
+    tracer = RecordingTracer()
+    transport.set_tracer(tracer)
+    yield tracer
+    transport.set_tracer(None)
+
+
+def _tree(tracer: RecordingTracer, span=None) -> list:
+    return [(child.name, _tree(tracer, child)) for child in tracer.children(span)]
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_tracing_composite_calls(use_async: bool, tracer, loop):
+    """
+    Test that composite calls have child spans for the functions they call and the stages of
+    their requests.
+    """
+    image = base64.b64encode(b'image').decode()
+    if use_async:
+        loop.run_until_complete(YKF.face.verify_images_async(image, image))
+        suffix = '_async'
+    else:
+        YKF.face.verify_images(image, image)
+        suffix = ''
+
+    process = (f'yk_face.face.process{suffix}', [
+        ('yk_face.parse_image', []),
+        ('yk_face.serialize', []),
+        ('yk_face.http', []),
+    ])
+    assert _tree(tracer) == [(f'yk_face.face.verify_images{suffix}', [
+        process,
+        process,
+        (f'yk_face.face.verify{suffix}', [('yk_face.http', [])]),
+    ])]
+    http = tracer.children(tracer.children(tracer.children(None)[0])[2])[0]
+    assert http.attributes == {'http.request.method': 'POST', 'yk_face.endpoint': 'verify'}
+    assert all(span.duration >= 0 for span in tracer.spans)
+
+
+def test_tracing_decode_and_errors():
+    """
+    Test that responses decoded by a client have a decode span, and that errors are recorded.
+    """
+    tracer = RecordingTracer()
+    client = YKF.YKFaceClient(base_url='http://localhost:1', tracer=tracer)
+    client._session.request = lambda *args, **kwargs: types.SimpleNamespace(
+        status_code=200, headers={'Content-Type': 'application/json'}, content=b'{"score":0.5}'
+    )
+    assert client.face.verify('a', 'b') == 0.5
+    with pytest.raises(ValueError):
+        client.group.create(None)
+
+    assert _tree(tracer) == [
+        ('yk_face.face.verify', [('yk_face.http', [('yk_face.decode', [])])]),
+        ('yk_face.group.create', []),
+    ]
+    assert isinstance(tracer.children(None)[1].error, ValueError)
+    assert transport.get_tracer() is None
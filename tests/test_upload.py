@@ -0,0 +1,144 @@
+""" Binary Upload Tests """
+import asyncio
+import base64
+import json
+import os
+import pytest
+import yk_utils.apis
+import yk_face as YKF
+from yk_face import transport
+from yk_face.cache import LRUCache
+from yk_face.singleflight import SingleFlight
+from yk_face.upload import BinaryUpload
+from benchmarks.fake_server import FakeYouFace
+
+IMAGE = os.urandom(3000)
+
+
+@pytest.fixture(scope='module')
+def server():
+    with FakeYouFace(template_size=64) as server:
+        yield server
+
+
+@pytest.fixture(scope='module')
+def rejecting_server():
+    with FakeYouFace(template_size=64, binary_upload=False) as server:
+        yield server
+
+
+def _process(client, use_async: bool, loop, image=IMAGE):
+    if not use_async:
+        return client.face.process(image, processings=['detect', 'templify'])
+
+    async def process():
+        try:
+            return await client.face.process_async(image, processings=['detect', 'templify'])
+        finally:
+            await client.aclose()
+    return loop.run_until_complete(process())
+
+
+def test_encode_formats():
+    """
+    Test the multipart and octet-stream bodies of binary uploads.
+    """
+    options = {'processings': ['detect'], 'configuration': []}
+    body, headers = BinaryUpload('octet-stream').encode(memoryview(IMAGE), options)
+    assert body == IMAGE
+    assert headers['Content-Type'] == 'application/octet-stream'
+    assert json.loads(headers['X-Process-Options']) == options
+
+    body, headers = BinaryUpload().encode(IMAGE, options)
+    boundary = headers['Content-Type'].split('boundary=')[1].encode()
+    parts = body.split(b'--' + boundary)
+    assert parts[0] == b'' and parts[-1] == b'--\r\n' and len(parts) == 4
+    assert parts[1].endswith(b'\r\n\r\n' + json.dumps(options, separators=(',', ':')).encode()
+                             + b'\r\n')
+    assert b'name="image"' in parts[2] and parts[2].endswith(b'\r\n\r\n' + IMAGE + b'\r\n')
+
+    with pytest.raises(ValueError):
+        BinaryUpload('base64')
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+@pytest.mark.parametrize('upload_format', ['multipart', 'octet-stream'])
+def test_client_uploads_binary_images(server, use_async, upload_format, loop):
+    """
+    Test that a server accepting binary uploads receives the images through a client.
+    """
+    upload = BinaryUpload(upload_format)
+    with YKF.YKFaceClient(server.base_url, binary_upload=upload) as client:
+        faces = _process(client, use_async, loop)
+    assert len(base64.b64decode(faces[0]['template'])) == 64
+    assert 'quality_metrics' in faces[0]
+    assert upload.accepted is True
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_client_falls_back_to_json(rejecting_server, use_async, loop):
+    """
+    Test that rejected binary uploads are sent again in the JSON form, which is then used for the
+    following requests.
+    """
+    upload = BinaryUpload()
+    with YKF.YKFaceClient(rejecting_server.base_url, binary_upload=upload) as client:
+        assert len(_process(client, use_async, loop)) == 1
+        assert upload.accepted is False
+        assert len(_process(client, use_async, loop, base64.b64encode(IMAGE).decode())) == 1
+
+
+def test_module_functions_upload_binary_images(monkeypatch):
+    """
+    Test binary uploads without a client: base64 images are decoded, invalid ones are sent in the
+    JSON form for the API to validate them, and results are cached by image content.
+    """
+    calls = []
+
+    def request(method, url, data=None, json=None, headers=None, params=None):
+        # pylint: disable=too-many-arguments,unused-argument
+        calls.append((data, json))
+        return [{'template': 'x'}]
+
+    monkeypatch.setattr(yk_utils.apis, 'request', request)
+    monkeypatch.setattr(transport, '_request_encoded', request)
+    transport.set_binary_upload(BinaryUpload('octet-stream'))
+    YKF.face.set_process_cache(LRUCache())
+    try:
+        assert YKF.face.process(base64.b64encode(IMAGE).decode()) == [{'template': 'x'}]
+        assert YKF.face.process(bytearray(IMAGE)) == [{'template': 'x'}]
+        YKF.face.process('not an image')
+    finally:
+        transport.set_binary_upload(None)
+        YKF.face.set_process_cache(None)
+    assert len(calls) == 2
+    assert calls[0] == (IMAGE, None)
+    assert calls[1][0] is None and calls[1][1]['image'] == 'not an image'
+
+
+@pytest.mark.parametrize('upload_format', ['multipart', 'octet-stream'])
+def test_single_flight_coalesces_binary_uploads_by_options(upload_format, loop):
+    """
+    Test that identical concurrent binary uploads are coalesced, and that uploads of the same
+    image with different process options are not.
+    """
+    single_flight = SingleFlight()
+    upload = BinaryUpload(upload_format)
+
+    async def process_all(client):
+        try:
+            return await asyncio.gather(
+                client.face.process_async(IMAGE, processings=['detect']),
+                client.face.process_async(IMAGE, processings=['templify']),
+                client.face.process_async(IMAGE, processings=['templify']),
+            )
+        finally:
+            await client.aclose()
+
+    with FakeYouFace(latency='fixed:0.2', template_size=64) as server:
+        client = YKF.YKFaceClient(server.base_url, binary_upload=upload,
+                                  single_flight=single_flight)
+        detected, templified, again = loop.run_until_complete(process_all(client))
+    assert 'template' not in detected[0]
+    assert 'template' in templified[0] and again == templified
+    assert single_flight.coalesced == 1
@@ -0,0 +1,73 @@
+""" Face verify_images_many Tests """
+import asyncio
+import base64
+import pytest
+import yk_face as YKF
+from yk_face.util import FaceException
+
+
+def _image(name: str) -> str:
+    return base64.b64encode(name.encode()).decode()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """ Replaces the face requests with a fake server. Images named 'none' have no face, and the
+    other images have one face whose template is the image name. """
+    processed = []
+
+    def respond(url, json):
+        if url == 'face/process':
+            name = base64.b64decode(json['image']).decode()
+            processed.append(name)
+            return [] if name == 'none' else [{'template': name}]
+        first, second = json['first_template'], json['second_template']
+        return {'score': 1.0 if first == second else 0.25}
+
+    def request(method, url, json=None, **kwargs):
+        return respond(url, json)
+
+    async def request_async(method, url, json=None, **kwargs):
+        await asyncio.sleep(0)
+        return respond(url, json)
+
+    monkeypatch.setattr(YKF.face, 'request', request)
+    monkeypatch.setattr(YKF.face, 'request_async', request_async)
+    return processed
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_verify_images_many(use_async: bool, server, loop):
+    """
+    Test that the reference is processed once and that every candidate gets a score or an error.
+    """
+    candidates = [_image(name) for name in ('ref', 'other', 'none', 'ref')]
+    if use_async:
+        results = loop.run_until_complete(
+            YKF.face.verify_images_many_async(_image('ref'), candidates, concurrency=2)
+        )
+    else:
+        results = YKF.face.verify_images_many(_image('ref'), candidates, concurrency=2)
+
+    assert results[0] == 1.0
+    assert results[1] == 0.25
+    assert isinstance(results[2], FaceException)
+    assert str(results[2]).startswith("Candidate image")
+    assert results[3] == 1.0
+    assert server.count('ref') == 3
+    assert len(server) == 5
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_verify_images_many_invalid_reference(use_async: bool, server, loop):
+    """
+    Test that no candidate is processed when the reference has no face.
+    """
+    with pytest.raises(FaceException, match="Reference image"):
+        if use_async:
+            loop.run_until_complete(
+                YKF.face.verify_images_many_async(_image('none'), [_image('ref')])
+            )
+        else:
+            YKF.face.verify_images_many(_image('none'), [_image('ref')])
+    assert server == ['none']
@@ -2,3 +2,5 @@ from . import face
 from . import group
 from .util import Key
 from .util import BaseUrl
+from .client import YKFaceClient
+from .cache import LRUCache
@@ -0,0 +1,124 @@
+"""Cache module of the Python SDK of the YouFace API.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Callable
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'size', 'maxsize'])
+
+
+class LRUCache:
+    """Thread-safe cache bounded to `maxsize` entries, evicting the least recently used one.
+    With a `ttl`, entries also expire `ttl` seconds after they were stored.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        """Class initializer.
+        :param maxsize:
+            Maximum number of entries.
+        :param ttl:
+            Time to live of the entries, in seconds, or None for entries that do not expire.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be greater than 0.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key, default=None):
+        """Get the value stored for `key`, marking it as the most recently used.
+        :param key:
+            Entry key.
+        :param default:
+            Value returned when there is no entry for `key`.
+        :return:
+            The stored value or `default`.
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            if self.ttl is not None:
+                value, expires_at = value
+                if expires_at <= time.monotonic():
+                    del self._entries[key]
+                    self._misses += 1
+                    return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store `value` for `key`, evicting the least recently used entry if the cache is full.
+        :param key:
+            Entry key.
+        :param value:
+            Value to be stored.
+        :return:
+        """
+        if self.ttl is not None:
+            value = (value, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove the entry for `key`.
+        :param key:
+            Entry key.
+        :param default:
+            Value returned when there is no entry for `key`.
+        :return:
+            The removed value or `default`.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries.pop(key)
+        return value[0] if self.ttl is not None else value
+
+    def pop_if(self, predicate: Callable[[object], bool]) -> int:
+        """Remove the entries whose key satisfies `predicate`.
+        :param predicate:
+            Callable invoked with each key.
+        :return:
+            The number of removed entries.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        """Remove all entries. The counters are kept.
+        :return:
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> CacheInfo:
+        """Get the cache counters.
+        :return:
+            CacheInfo with the number of hits, misses and evictions, the current size and maxsize.
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, len(self._entries),
+                             self.maxsize)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
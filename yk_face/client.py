@@ -0,0 +1,347 @@
+"""Client module of the Python SDK of the YouFace API.
+"""
+import asyncio
+import functools
+import inspect
+from typing import Optional
+import httpx
+import requests
+try:
+    import h2
+except ImportError:  # pragma: no cover
+    h2 = None
+from requests.adapters import HTTPAdapter
+from yk_utils.apis import BaseUrl, Key, YoonikApiException
+from yk_face import face, group, serialization
+from yk_face.policy import IDEMPOTENT_ENDPOINTS
+from yk_face.transport import endpoint_name, record_response_size, stage, use_client
+
+JSON_CONTENT_TYPE = 'application/json'
+# errors raised when an HTTP/1.1 server answers the HTTP/2 preface (RemoteProtocolError) or closes
+# the connection while it is being sent (WriteError), before any response is read
+_HTTP2_REJECTED_ERRORS = (httpx.RemoteProtocolError, httpx.WriteError)
+
+
+class _BoundModule:
+    """ Exposes the functions of a module, performing their requests through a client. """
+    def __init__(self, client, module):
+        self._client = client
+        self._module = module
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._module, name)
+        if name.startswith('_') or not inspect.isfunction(attribute):
+            return attribute
+        return self._client.bind(attribute)
+
+    def __dir__(self):
+        return [name for name in dir(self._module) if not name.startswith('_')]
+
+
+class YKFaceClient:
+    """YouFace API client that keeps its HTTP connections alive and reuses them between requests.
+
+    The `face` and `group` attributes expose the functions of the `face` and `group` modules,
+    performing their requests through this client:
+
+        with YKFaceClient(base_url, key) as client:
+            faces = client.face.process(image)
+            client.group.add_person(group_id, person_id, faces[0]['template'])
+    """
+    def __init__(
+            self,
+            base_url: str = None,
+            key: str = None,
+            pool_size: int = 10,
+            timeout: float = 10.0,
+            connect_timeout: float = 5.0,
+            retry_policy=None,
+            rate_limiter=None,
+            concurrency_limiter=None,
+            single_flight=None,
+            metrics=None,
+            tracer=None,
+            http2: bool = False,
+            compression=None,
+            binary_upload=None):
+        # pylint: disable=too-many-arguments
+        """Class initializer.
+        :param base_url:
+            YouFace API base URL. If None, the URL set with `BaseUrl.set` is used.
+        :param key:
+            Subscription Key. If None, the key set with `Key.set` is used.
+        :param pool_size:
+            Maximum number of connections kept alive.
+        :param timeout:
+            Timeout, in seconds, to wait for the response of a request.
+        :param connect_timeout:
+            Timeout, in seconds, to establish a connection.
+        :param retry_policy:
+            `policy.RetryPolicy` of the requests of this client. If None, the policy set with
+            `transport.set_retry_policy` is used.
+        :param rate_limiter:
+            `ratelimit.RateLimiter` of the requests of this client. If None, the rate limiter set
+            with `transport.set_rate_limiter` is used.
+        :param concurrency_limiter:
+            `concurrency.AdaptiveConcurrencyLimiter` of the asynchronous requests of this client.
+            If None, the limiter set with `transport.set_concurrency_limiter` is used.
+        :param single_flight:
+            `singleflight.SingleFlight` coalescing the identical requests of this client. If None,
+            the one set with `transport.set_single_flight` is used.
+        :param metrics:
+            `metrics.MetricsCollector` of the requests of this client. If None, the collector set
+            with `transport.set_metrics` is used.
+        :param tracer:
+            OpenTelemetry-compatible tracer of the requests of this client (check the `tracing`
+            module). If None, the tracer set with `transport.set_tracer` is used.
+        :param http2:
+            Perform the asynchronous requests over HTTP/2, multiplexed over a single connection
+            (`pip install yk_face[http2]`). Over https, HTTP/2 is negotiated with the server and
+            HTTP/1.1 is used if it is not supported. Over http, HTTP/2 is used with prior
+            knowledge, and the client falls back to HTTP/1.1 if the server rejects it.
+        :param compression:
+            `compression.RequestCompression` of the request bodies of this client. If None, the
+            compression set with `transport.set_compression` is used.
+        :param binary_upload:
+            `upload.BinaryUpload` of the images of this client. If None, the binary upload set
+            with `transport.set_binary_upload` is used.
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        if http2 and h2 is None:
+            raise ImportError("HTTP/2 requires the h2 package: pip install yk_face[http2]")
+        if base_url is not None and not base_url.endswith('/'):
+            base_url += '/'
+        self.base_url = base_url
+        self.key = key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.concurrency_limiter = concurrency_limiter
+        self.single_flight = single_flight
+        self.metrics = metrics
+        self.tracer = tracer
+        self.http2 = http2
+        self.compression = compression
+        self.binary_upload = binary_upload
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._async_client = None
+        self._async_client_loop = None
+        self._http2_rejected = False
+        self._http2_confirmed = False
+        self._retired_clients = []
+
+        self.face = _BoundModule(self, face)
+        self.group = _BoundModule(self, group)
+
+    def bind(self, func):
+        """Wrap a function so that the requests it performs go through this client.
+        :param func:
+            A function, coroutine function or async generator function.
+        :return:
+            The wrapped function.
+        """
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                with use_client(self):
+                    async for item in func(*args, **kwargs):
+                        yield item
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with use_client(self):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with use_client(self):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _url(self, url: str) -> str:
+        return (self.base_url or BaseUrl.get()) + url
+
+    def _headers(self, method: str, headers: dict = None) -> dict:
+        headers = dict(headers or {})
+        if 'Content-Type' not in headers and method != 'GET':
+            headers['Content-Type'] = JSON_CONTENT_TYPE
+        api_key = self.key or Key.get()
+        if api_key:
+            headers['x-api-key'] = api_key
+        return headers
+
+    @staticmethod
+    def _parse_response(status_code: int, content_type: str, content: bytes, parse_json):
+        record_response_size(len(content))
+        if not 200 <= status_code < 300:
+            raise YoonikApiException(status_code, content.decode('utf-8', 'replace'))
+        if status_code == 204:
+            return None
+        if JSON_CONTENT_TYPE in content_type:
+            if not content:
+                return {}
+            with stage('decode'):
+                return parse_json()
+        return content.decode('utf-8', 'replace')
+
+    def _http2_prior_knowledge(self) -> bool:
+        """ Over plain http, HTTP/2 can only be used if the client knows the server supports it. """
+        return self.http2 and not self._http2_rejected and self._url('').startswith('http://')
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """ The async connection pool is bound to the event loop where it was created. """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._retire_async_client(self._async_client)
+            self._async_client = httpx.AsyncClient(
+                http1=not self._http2_prior_knowledge(),
+                http2=self.http2 and not self._http2_rejected,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _retire_async_client(self, async_client: Optional[httpx.AsyncClient]):
+        """ Replaces the async pool by a new one on the next request. Retired pools are kept
+            until `aclose`, except those of closed event loops, which can not be closed anymore:
+            they are dropped, so that the garbage collector releases their connections. """
+        if async_client is not None and self._async_client is async_client:
+            self._retired_clients.append((async_client, self._async_client_loop))
+            self._async_client = None
+        self._retired_clients = [
+            (retired, loop) for retired, loop in self._retired_clients if not loop.is_closed()
+        ]
+
+    def _reject_http2(self, async_client: httpx.AsyncClient):
+        """ Falls back to HTTP/1.1 for the following asynchronous requests. """
+        self._http2_rejected = True
+        self._retire_async_client(async_client)
+
+    def request(self, method: str, url: str, data=None, json: dict = None, headers: dict = None,
+                params=None):
+        # pylint: disable=too-many-arguments
+        """ Universal interface for request."""
+        response = self._session.request(
+            method,
+            self._url(url),
+            params=params,
+            data=data,
+            json=json,
+            headers=self._headers(method, headers),
+            timeout=(self.connect_timeout, self.timeout)
+        )
+        return self._parse_response(
+            response.status_code,
+            response.headers.get('Content-Type', ''),
+            response.content,
+            lambda: serialization.loads(response.content)
+        )
+
+    async def request_async(self, method: str, url: str, data=None, json: dict = None,
+                            headers: dict = None, params=None):
+        # pylint: disable=too-many-arguments
+        """ Universal interface for asynchronous request."""
+        content = data if isinstance(data, (bytes, bytearray)) else None
+        arguments = dict(
+            method=method,
+            url=self._url(url),
+            params=params,
+            content=content,
+            data=None if content is not None else data,
+            json=json,
+            headers=self._headers(method, headers)
+        )
+        prior_knowledge = self._http2_prior_knowledge()
+        async_client = self._get_async_client()
+        try:
+            response = await async_client.request(**arguments)
+        except _HTTP2_REJECTED_ERRORS as exception:
+            if not prior_knowledge or self._http2_confirmed:
+                raise
+            if endpoint_name(method, url) not in IDEMPOTENT_ENDPOINTS:
+                # the request may have been processed: it is not sent again, but a server that
+                # answered in HTTP/1.1 gets the following requests over HTTP/1.1
+                if isinstance(exception, httpx.RemoteProtocolError):
+                    self._reject_http2(async_client)
+                raise
+            # the server may not speak HTTP/2: retry the request over HTTP/1.1
+            self._reject_http2(async_client)
+            http1_client = self._get_async_client()
+            try:
+                response = await http1_client.request(**arguments)
+            except httpx.TransportError:
+                # the server is failing rather than rejecting HTTP/2: keep trying HTTP/2
+                self._http2_rejected = False
+                self._retire_async_client(http1_client)
+                raise
+        else:
+            if prior_knowledge:
+                self._http2_confirmed = True
+        return self._parse_response(
+            response.status_code,
+            response.headers.get('Content-Type', ''),
+            response.content,
+            lambda: serialization.loads(response.content)
+        )
+
+    def close(self):
+        """Close the connections of the synchronous pool.
+        Use `aclose` to also close the connections of the asynchronous pool.
+        :return:
+        """
+        self._session.close()
+
+    async def aclose(self):
+        """Close the connections of both connection pools, including the asynchronous pools
+        replaced when the client was used from another event loop, as long as that loop is not
+        closed.
+        :return:
+        """
+        self.close()
+        self._retire_async_client(self._async_client)
+        self._async_client_loop = None
+        await self._close_retired_clients()
+
+    async def _close_retired_clients(self):
+        """ Closes the pools replaced by `_get_async_client` or `_reject_http2`. The connections
+            of a pool can only be closed in the event loop where they were opened: in the
+            current loop, in the loop's own thread if it is running elsewhere, or in a worker
+            thread if it is stopped. Pools of closed loops are dropped (check
+            `_retire_async_client`). """
+        loop = asyncio.get_running_loop()
+        retired, self._retired_clients = self._retired_clients, []
+        for async_client, client_loop in retired:
+            if client_loop is loop:
+                await async_client.aclose()
+            elif client_loop.is_running():
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(async_client.aclose(), client_loop))
+            elif not client_loop.is_closed():
+                await loop.run_in_executor(
+                    None, client_loop.run_until_complete, async_client.aclose())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,77 @@
+"""Request compression module of the Python SDK of the YouFace API.
+Compresses the request bodies larger than a threshold with gzip or zstd (`pip install
+yk_face[zstd]`), sending them with a `Content-Encoding` header. Responses are decompressed by
+the HTTP libraries, which advertise the encodings they accept.
+
+Servers that do not accept compressed bodies answer them with 415 Unsupported Media Type
+(RFC 7694) or, less helpfully, 400 Bad Request. Until a compressed request succeeds, such an
+error causes the request to be sent again uncompressed, and if that succeeds, compression is
+disabled for the following requests (check `util.ServerCapability`).
+"""
+import gzip
+from typing import Optional, Tuple
+from yk_face.util import ServerCapability
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+ENCODINGS = ('gzip', 'zstd')
+JSON_CONTENT_TYPE = 'application/json'
+
+
+class RequestCompression(ServerCapability):
+    """Compression of the request bodies sent to one YouFace API, which remembers whether the
+    server accepts them (check `transport.set_compression` and the `compression` argument of
+    `YKFaceClient`).
+    """
+    def __init__(self, encoding: str = 'gzip', threshold: int = 1024, level: int = None):
+        """Class initializer.
+        :param encoding:
+            'gzip' or 'zstd'.
+        :param threshold:
+            Minimum size, in bytes, of the bodies to compress.
+        :param level:
+            Compression level, or None for the default level of the encoding.
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError("encoding must be 'gzip' or 'zstd'.")
+        if encoding == 'zstd' and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package: "
+                              "pip install yk_face[zstd]")
+        super().__init__()
+        self.encoding = encoding
+        self.threshold = threshold
+        self.level = level
+
+    def compress(self, body: bytes) -> bytes:
+        """Compress a body.
+        :param body:
+            Request body.
+        :return:
+            The compressed body.
+        """
+        if self.encoding == 'zstd':
+            return zstandard.ZstdCompressor(level=3 if self.level is None else self.level) \
+                .compress(body)
+        return gzip.compress(body, compresslevel=6 if self.level is None else self.level, mtime=0)
+
+    def encode(self, data, headers: dict) -> Optional[Tuple[bytes, dict]]:
+        """Compress a request body, if it should be.
+        :param data:
+            Request body.
+        :param headers:
+            Request headers.
+        :return:
+            (compressed body, headers) tuple, or None if the body is not to be compressed: it is
+            not encoded yet, it is not JSON (binary uploads of already compressed images), it is
+            smaller than the threshold, or the server does not accept compressed bodies.
+        """
+        if self.accepted is False or not isinstance(data, (bytes, bytearray)) \
+                or len(data) < self.threshold \
+                or (headers or {}).get('Content-Type', JSON_CONTENT_TYPE) != JSON_CONTENT_TYPE:
+            return None
+        headers = dict(headers or {})
+        headers['Content-Encoding'] = self.encoding
+        return self.compress(data), headers
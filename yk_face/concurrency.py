@@ -0,0 +1,175 @@
+"""Adaptive concurrency module of the Python SDK of the YouFace API.
+Limits the number of in-flight asynchronous requests, adjusting the limit from their latency and
+errors (additive increase, multiplicative decrease), and queues or sheds the excess requests.
+"""
+import asyncio
+import time
+from collections import deque, namedtuple
+from typing import Callable, Iterable
+from yk_utils.apis import YoonikApiException
+from yk_face.policy import RETRY_STATUS_CODES, _TRANSPORT_ERRORS
+from yk_face.util import FaceException
+
+ConcurrencyInfo = namedtuple('ConcurrencyInfo', ['limit', 'in_flight', 'queued', 'shed'])
+
+
+class LoadShedError(FaceException):
+    """ Raised when a request is rejected because the queue of the concurrency limiter is full. """
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limiter applied to every asynchronous request of the `face` and `group` modules
+    (check `transport.set_concurrency_limiter` and the `concurrency_limiter` argument of
+    `YKFaceClient`).
+
+    The limit grows by one request per round trip while requests succeed with the limit in use,
+    and is multiplied by `backoff_ratio`, at most once per round trip, when a request fails with
+    an overload error (transport errors, timeouts and `overload_status_codes`) or takes longer
+    than `latency_tolerance` times the lowest recent latency. Requests above the limit wait in
+    a FIFO queue of up to `max_queue` requests; further requests raise `LoadShedError`.
+
+    The limiter must be used from a single event loop.
+    """
+    def __init__(
+            self,
+            initial_limit: int = 10,
+            min_limit: int = 1,
+            max_limit: int = 200,
+            backoff_ratio: float = 0.5,
+            latency_tolerance: float = 2.0,
+            max_queue: int = 1000,
+            window: int = 100,
+            min_samples: int = 10,
+            overload_status_codes: Iterable[int] = RETRY_STATUS_CODES):
+        # pylint: disable=too-many-arguments
+        """Class initializer.
+        :param initial_limit:
+            Initial number of concurrent requests.
+        :param min_limit:
+            Minimum number of concurrent requests.
+        :param max_limit:
+            Maximum number of concurrent requests.
+        :param backoff_ratio:
+            Factor applied to the limit on overload, between 0 and 1.
+        :param latency_tolerance:
+            Latency, relative to the lowest recent latency, above which a request counts as
+            an overload.
+        :param max_queue:
+            Maximum number of requests waiting for a slot, or None for an unbounded queue.
+        :param window:
+            Number of recent latencies kept to compute the lowest one.
+        :param min_samples:
+            Number of latencies needed before latency is taken into account.
+        :param overload_status_codes:
+            HTTP status codes that count as an overload.
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit.")
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.min_samples = min_samples
+        self.overload_status_codes = frozenset(overload_status_codes)
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._shed = 0
+        self._waiters = deque()
+        self._latencies = deque(maxlen=window)
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Current number of concurrent requests allowed."""
+        return int(self._limit)
+
+    def info(self) -> ConcurrencyInfo:
+        """Get the limiter statistics.
+        :return:
+            ConcurrencyInfo(limit, in_flight, queued, shed).
+        """
+        return ConcurrencyInfo(self.limit, self._in_flight, len(self._waiters), self._shed)
+
+    def is_overload(self, exception: BaseException) -> bool:
+        """Check whether a failed request signals that the API is overloaded.
+        :param exception:
+            Exception raised by the request.
+        :return:
+            True for transport errors, timeouts and responses with one of `overload_status_codes`.
+        """
+        if isinstance(exception, YoonikApiException):
+            return exception.status_code in self.overload_status_codes
+        return isinstance(exception, _TRANSPORT_ERRORS + (asyncio.TimeoutError,))
+
+    async def call(self, send: Callable):
+        """Perform an asynchronous request within the concurrency limit.
+        :param send:
+            Function that returns an awaitable performing the request.
+        :return:
+            The response of the request.
+        :raises LoadShedError:
+            If the queue is full.
+        """
+        await self._acquire()
+        start = time.monotonic()
+        try:
+            response = await send()
+        except asyncio.CancelledError:
+            self._release(start, overloaded=None)
+            raise
+        except Exception as exc:
+            self._release(start, overloaded=self.is_overload(exc))
+            raise
+        self._release(start, overloaded=False)
+        return response
+
+    async def _acquire(self):
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        if self.max_queue is not None and len(self._waiters) >= self.max_queue:
+            self._shed += 1
+            raise LoadShedError(
+                f"Request shed: {len(self._waiters)} requests are waiting for "
+                f"{self.limit} slots."
+            )
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over before the cancellation
+                self._in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _wake(self):
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def _release(self, start: float, overloaded):
+        """ `overloaded` is None for cancelled requests, which do not change the limit. """
+        now = time.monotonic()
+        latency = now - start
+        if overloaded is False:
+            self._latencies.append(latency)
+            overloaded = len(self._latencies) >= self.min_samples and \
+                latency > self.latency_tolerance * min(self._latencies)
+        if overloaded:
+            # requests started before the last decrease belong to the same overload episode
+            if start >= self._last_decrease:
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                self._last_decrease = now
+        elif overloaded is False and 2 * self._in_flight >= self._limit:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        self._in_flight -= 1
+        self._wake()
@@ -1,12 +1,22 @@
 """Face module of the YouFace API.
 """
 import asyncio
-from typing import List, Dict
-from yk_utils.images import parse_image
-from yk_utils.apis import request, request_async
-from yk_face_api_models import ProcessRequest, VerifyRequest, VerifyIdRequest, IdentifyRequest, \
-    ProcessRequestConfig
-from yk_face.util import FaceException, face_process_validation
+import base64
+import binascii
+import copy
+import hashlib
+import json
+from typing import List, Dict, AsyncIterator, Optional, Sequence, Tuple, Union
+from yk_face.transport import request, request_async, stage, current_client, get_binary_upload, \
+    server_identity
+from yk_face_api_models import ProcessRequestConfig
+from yk_face import group, serialization
+from yk_face.cache import LRUCache
+from yk_face.images import ImagePreprocessor, encode_image, image_bytes
+from yk_face.results import FaceEntry, face_entries
+from yk_face.tracing import traced
+from yk_face.util import FaceException, face_process_validation, bounded_as_completed, \
+    bounded_as_completed_async, bounded_gather_async
 
 
 class FaceRouterEndpoints:
@@ -16,30 +26,229 @@ class FaceRouterEndpoints:
     identify = "face/identify"
 
 
+_process_cache: Optional[LRUCache] = None
+_verify_cache: Optional[LRUCache] = None
+_identify_cache: Optional[LRUCache] = None
+_group_versions: Dict[tuple, int] = {}
+_scoring_backend = None
+_image_preprocessor: Optional[ImagePreprocessor] = None
+
+
+def set_image_preprocessor(preprocessor: Optional[ImagePreprocessor]):
+    """Set the preprocessor applied to the images of `face.process` and `face.process_async`
+    before they are uploaded (check `images.ImagePreprocessor`).
+    :param preprocessor:
+        An ImagePreprocessor, or None to upload the images as they are.
+    :return:
+    """
+    global _image_preprocessor  # pylint: disable=global-statement
+    _image_preprocessor = preprocessor
+
+
+def get_image_preprocessor() -> Optional[ImagePreprocessor]:
+    """Get the preprocessor applied to the images before they are uploaded.
+    :return:
+        The ImagePreprocessor set with `face.set_image_preprocessor` or None.
+    """
+    return _image_preprocessor
+
+
+def set_scoring_backend(backend):
+    """Set the backend used to compute matching scores locally in `face.verify`,
+    `face.verify_async` and `face.verify_many`, instead of requesting them to the server.
+    :param backend:
+        A scoring backend, like `scoring.LocalScoring`, or None to request scores to the server.
+    :return:
+    """
+    global _scoring_backend  # pylint: disable=global-statement
+    _scoring_backend = backend
+
+
+def get_scoring_backend():
+    """Get the backend used to compute matching scores locally.
+    :return:
+        The backend set with `face.set_scoring_backend` or None.
+    """
+    return _scoring_backend
+
+
+def set_process_cache(cache: Optional[LRUCache]):
+    """Set the cache of `face.process` and `face.process_async` results.
+    Results are cached by the content of the image and the requested processings and
+    configurations, so the same image is only sent once while its entry is cached, and by the
+    server and subscription key of the request (`transport.server_identity`).
+    :param cache:
+        A LRUCache, or None to disable caching.
+    :return:
+    """
+    global _process_cache  # pylint: disable=global-statement
+    _process_cache = cache
+
+
+def get_process_cache() -> Optional[LRUCache]:
+    """Get the cache of `face.process` and `face.process_async` results.
+    :return:
+        The LRUCache set with `face.set_process_cache` or None if caching is disabled.
+    """
+    return _process_cache
+
+
+def set_verify_cache(cache: Optional[LRUCache]):
+    """Set the cache of the matching scores requested by `face.verify`, `face.verify_async` and
+    `face.verify_many`. Scores are cached by the unordered pair of template digests, so
+    `verify(a, b)` and `verify(b, a)` share an entry and templates are not kept in memory, and
+    by the server and subscription key of the request (`transport.server_identity`).
+    Scores computed by a scoring backend are not cached.
+    :param cache:
+        A LRUCache, or None to disable caching.
+    :return:
+    """
+    global _verify_cache  # pylint: disable=global-statement
+    _verify_cache = cache
+
+
+def get_verify_cache() -> Optional[LRUCache]:
+    """Get the cache of the matching scores requested by `face.verify` and its variants.
+    :return:
+        The LRUCache set with `face.set_verify_cache` or None if caching is disabled.
+    """
+    return _verify_cache
+
+
+def _verify_cache_key(face_template: str, another_face_template: str) -> Optional[tuple]:
+    """ Server identity and concatenation of the sorted digests of both templates, or None if
+        caching is disabled or a template is not a string. """
+    if _verify_cache is None or not isinstance(face_template, str) \
+            or not isinstance(another_face_template, str):
+        return None
+    digests = sorted(
+        hashlib.sha256(template.encode()).digest()
+        for template in (face_template, another_face_template)
+    )
+    return server_identity(current_client()), digests[0] + digests[1]
+
+
+def set_identify_cache(cache: Optional[LRUCache]):
+    """Set the cache of `face.identify` and `face.identify_async` results.
+    Results are cached by the server and subscription key of the request
+    (`transport.server_identity`), the digest of the template, the identify options and the
+    version of the group, which is bumped by every mutation of the group performed through this
+    SDK on that server (`group.create`, `group.delete`, `group.add_person` and
+    `group.remove_person`).
+    Mutations performed by other clients are not detected.
+    :param cache:
+        A LRUCache, or None to disable caching.
+    :return:
+    """
+    global _identify_cache  # pylint: disable=global-statement
+    _identify_cache = cache
+
+
+def get_identify_cache() -> Optional[LRUCache]:
+    """Get the cache of `face.identify` and `face.identify_async` results.
+    :return:
+        The LRUCache set with `face.set_identify_cache` or None if caching is disabled.
+    """
+    return _identify_cache
+
+
+def _on_group_mutation(event: str, group_id: str, person_id: str, face_template: str):
+    # pylint: disable=unused-argument
+    """ Bumps the version of a mutated group, so that its cached identify results are stale.
+        Mutations are notified in the context of their request, so the group is the one of the
+        server of the current client. """
+    version_key = server_identity(current_client()), group_id
+    _group_versions[version_key] = _group_versions.get(version_key, 0) + 1
+
+
+group.add_mutation_listener(_on_group_mutation)
+
+
+def _identify_cache_key(
+        face_template: str,
+        group_id: str,
+        minimum_score: float,
+        candidate_list_length: int) -> Optional[tuple]:
+    """ Server identity, group, group version, options and template digest of an identify
+        request, or None if caching is disabled or the template is not a string. """
+    if _identify_cache is None or not isinstance(face_template, str):
+        return None
+    version_key = server_identity(current_client()), group_id
+    return (
+        *version_key,
+        _group_versions.get(version_key, 0),
+        minimum_score,
+        candidate_list_length,
+        hashlib.sha256(face_template.encode()).digest()
+    )
+
+
+def _process_cache_key(process_request: Dict) -> Optional[tuple]:
+    """ Server identity and digest of the decoded image bytes, processings and configurations of
+        a process request. Returns None if the image is not a valid base64 string.
+    """
+    image = process_request['image']
+    if isinstance(image, str):
+        try:
+            image = base64.b64decode(image, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+    digest = hashlib.sha256(image)
+    options = [sorted(process_request['processings']), process_request['configuration']]
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    return server_identity(current_client()), digest.hexdigest()
+
+
+def _process_cache_lookup(process_request: Dict) -> Tuple[Optional[tuple], Optional[List[Dict]]]:
+    """ Returns the cache key of the process request and the cached result, if any. """
+    cache = _process_cache
+    if cache is None:
+        return None, None
+    key = _process_cache_key(process_request)
+    if key is None:
+        return None, None
+    cached = cache.get(key)
+    return key, copy.deepcopy(cached) if cached is not None else None
+
+
+def _process_cache_store(key: Optional[tuple], result: List[Dict]):
+    cache = _process_cache
+    if cache is not None and key is not None:
+        cache.put(key, copy.deepcopy(result))
+
+
 def __process_request_validation(
         image,
         processings: List[str] = None,
-        configurations: List[ProcessRequestConfig] = None
+        configurations: List[ProcessRequestConfig] = None,
+        binary: bool = False
 ) -> Dict:
     """ Validates the process endpoint request.
         :param configurations:
             A list of ProcessRequestConfig, for dynamic configurations.
         :param image:
-            A base64 string or a file path or a file-like object representing an image.
+            A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+            frame representing an image (check the `images` module).
         :param processings:
             List of desired processings (if None, it will perform all processings):
                 'detect'   - Perform face and landmarks detection.
                 'analyze'  - Perform quality analysis (brightness, contrast, sharpness, etc).
                 'templify' - Perform template extraction.
+        :param binary:
+            Keep the image as bytes, for a binary upload (check the `upload` module).
         :return:
-            dictionary of the payload to be sent in HTTP Request
+            dictionary of the payload to be sent in HTTP Request. With `binary`, its image is
+            a bytes-like object, unless the image is a string that is not valid base64.
         :raises:
             ValueError if image is not provided.
     """
     if image is None:
         raise ValueError("image must be provided")
 
-    image_b64 = parse_image(image)
+    with stage('parse_image'):
+        data = image_bytes(image, _image_preprocessor) if binary else None
+        if data is None:
+            data = encode_image(image, _image_preprocessor)
     configurations = configurations or []
     if processings is None:
         processings = ['detect', 'analyze', 'templify']
@@ -48,66 +257,220 @@ def __process_request_validation(
     elif len(processings) == 0:
         raise ValueError("The processings were not provided.")
 
-    process_request = ProcessRequest(
-        image=image_b64,
-        processings=processings,
-        configuration=configurations
-    ).model_dump(mode='json')
-    return process_request
+    with stage('serialize'):
+        if isinstance(data, str):
+            return serialization.process_request(data, processings, configurations)
+        return {'image': data, **serialization.process_options(processings, configurations)}
+
+
+def _binary_upload():
+    """ Binary upload of the current client, unless its server does not accept them. """
+    upload = get_binary_upload(current_client())
+    return None if upload is None or upload.accepted is False else upload
+
+
+def _json_process_request(process_request: Dict) -> Dict:
+    """ JSON form of a process request validated for a binary upload. """
+    image = process_request['image']
+    if isinstance(image, str):
+        return process_request
+    return {**process_request, 'image': base64.b64encode(image).decode('ascii')}
 
 
+def _binary_process_request(upload, process_request: Dict) -> Tuple[bytes, dict]:
+    options = {name: value for name, value in process_request.items() if name != 'image'}
+    with stage('serialize'):
+        return upload.encode(process_request['image'], options)
+
+
+@traced
 def process(
         image,
         processings: List[str] = None,
-        configurations: List[ProcessRequestConfig] = None
-) -> List[Dict]:
+        configurations: List[ProcessRequestConfig] = None,
+        as_entries: bool = False
+) -> Union[List[Dict], List[FaceEntry]]:
     """Process human faces in an image.
     :param configurations:
         A list of ProcessRequestConfig, for dynamic configurations.
     :param image:
-        A base64 string or a file path or a file-like object representing an image.
+        A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+        frame representing an image (check the `images` module).
     :param processings:
         List of desired processings (if None, it will perform all processings):
             'detect'   - Perform face and landmarks detection.
             'analyze'  - Perform quality analysis (brightness, contrast, sharpness, etc).
             'templify' - Perform template extraction.
+    :param as_entries:
+        Return compact `results.FaceEntry` objects instead of dictionaries.
     :return:
-        List of face entries in json format.
+        List of face entries in json format, or of FaceEntry with `as_entries`.
     :raises:
         ValueError if image is not provided.
     """
-    process_request = __process_request_validation(image, processings, configurations)
-    return request('POST', FaceRouterEndpoints.process, json=process_request)
-
-
+    upload = _binary_upload()
+    process_request = __process_request_validation(
+        image, processings, configurations, binary=upload is not None
+    )
+    key, cached = _process_cache_lookup(process_request)
+    if cached is not None:
+        return face_entries(cached) if as_entries else cached
+    if isinstance(process_request['image'], str):
+        result = request('POST', FaceRouterEndpoints.process, json=process_request)
+    else:
+        data, headers = _binary_process_request(upload, process_request)
+        result = upload.call(
+            lambda: request('POST', FaceRouterEndpoints.process, data=data, headers=headers),
+            lambda: request('POST', FaceRouterEndpoints.process,
+                            json=_json_process_request(process_request))
+        )
+    _process_cache_store(key, result)
+    return face_entries(result) if as_entries else result
+
+
+@traced
 async def process_async(
         image,
         processings: List[str] = None,
         configurations: List[ProcessRequestConfig] = None,
-) -> List[Dict]:
+        as_entries: bool = False
+) -> Union[List[Dict], List[FaceEntry]]:
     """
     Process human faces in an image.
     Performs the request asynchronously.
     :param configurations:
         A list of ProcessRequestConfig, for dynamic configurations.
     :param image:
-        A base64 string or a file path or a file-like object representing an image.
+        A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+        frame representing an image (check the `images` module).
     :param processings:
         List of desired processings (if None, it will perform all processings):
             'detect'   - Perform face and landmarks detection.
             'analyze'  - Perform quality analysis (brightness, contrast, sharpness, etc).
             'templify' - Perform template extraction.
+    :param as_entries:
+        Return compact `results.FaceEntry` objects instead of dictionaries.
     :return:
-        List of face entries in json format.
+        List of face entries in json format, or of FaceEntry with `as_entries`.
     :raises:
         ValueError if image is not provided.
     """
-    process_request = __process_request_validation(image, processings, configurations)
-    return await request_async('POST', FaceRouterEndpoints.process, json=process_request)
+    upload = _binary_upload()
+    process_request = __process_request_validation(
+        image, processings, configurations, binary=upload is not None
+    )
+    key, cached = _process_cache_lookup(process_request)
+    if cached is not None:
+        return face_entries(cached) if as_entries else cached
+    if isinstance(process_request['image'], str):
+        result = await request_async('POST', FaceRouterEndpoints.process, json=process_request)
+    else:
+        data, headers = _binary_process_request(upload, process_request)
+        result = await upload.call_async(
+            lambda: request_async('POST', FaceRouterEndpoints.process, data=data, headers=headers),
+            lambda: request_async('POST', FaceRouterEndpoints.process,
+                                  json=_json_process_request(process_request))
+        )
+    _process_cache_store(key, result)
+    return face_entries(result) if as_entries else result
+
+
+async def process_many_async(
+        images,
+        concurrency: int = 10,
+        processings: List[str] = None,
+        configurations: List[ProcessRequestConfig] = None,
+        as_entries: bool = False
+) -> AsyncIterator[Tuple[int, Union[List[Dict], List[FaceEntry], Exception]]]:
+    """
+    Process human faces in many images, with at most `concurrency` requests in flight.
+    Images are consumed lazily, so only the images being processed are held in memory.
+    :param images:
+        An iterable or an async iterable of images, of the types accepted by `face.process`.
+    :param concurrency:
+        Maximum number of concurrent process requests.
+    :param processings:
+        List of desired processings (if None, it will perform all processings).
+        Check `face.process` for the available processings.
+    :param configurations:
+        A list of ProcessRequestConfig, for dynamic configurations.
+    :param as_entries:
+        Return compact `results.FaceEntry` objects instead of dictionaries.
+    :return:
+        Async iterator of (index, result) tuples, in completion order. `index` is the position of
+        the image in `images` and `result` is either the list of face entries or the exception
+        raised while processing that image.
+    :raises:
+        ValueError if concurrency is lower than 1.
+    """
+    async def process_image(image) -> Union[List[Dict], List[FaceEntry]]:
+        result = await process_async(image, processings, configurations)
+        return face_entries(result) if as_entries else result
+
+    results = bounded_as_completed_async(process_image, images, concurrency)
+    try:
+        async for index, result in results:
+            yield index, result
+    finally:
+        await results.aclose()
+
+
+def _verify_cache_lookup(
+        face_template: str,
+        another_face_template: str) -> Tuple[Optional[tuple], Optional[float]]:
+    """ Returns the cache key of the verify request and the cached score, if any. """
+    cache = _verify_cache
+    key = _verify_cache_key(face_template, another_face_template)
+    if cache is None or key is None:
+        return None, None
+    return key, cache.get(key)
+
+
+def _verify_cache_store(key: Optional[tuple], score: float):
+    cache = _verify_cache
+    if cache is not None and key is not None:
+        cache.put(key, score)
+
+
+def _verify_remote(face_template: str, another_face_template: str) -> float:
+    """ Requests the matching score of two templates to the server. """
+    verify_request = serialization.verify_request(face_template, another_face_template)
+    json_response = request('POST', FaceRouterEndpoints.verify, json=verify_request)
+    return float(json_response['score'])
+
+
+async def _verify_remote_async(face_template: str, another_face_template: str) -> float:
+    """ Requests the matching score of two templates to the server, asynchronously. """
+    verify_request = serialization.verify_request(face_template, another_face_template)
+    json_response = await request_async('POST', FaceRouterEndpoints.verify, json=verify_request)
+    return float(json_response['score'])
+
+
+def _verify_cached(face_template: str, another_face_template: str) -> float:
+    """ Requests the matching score of two templates to the server, through the verify cache. """
+    key, score = _verify_cache_lookup(face_template, another_face_template)
+    if score is not None:
+        return score
+    score = _verify_remote(face_template, another_face_template)
+    _verify_cache_store(key, score)
+    return score
+
 
+async def _verify_cached_async(face_template: str, another_face_template: str) -> float:
+    """ Requests the matching score of two templates to the server, through the verify cache,
+        asynchronously. """
+    key, score = _verify_cache_lookup(face_template, another_face_template)
+    if score is not None:
+        return score
+    score = await _verify_remote_async(face_template, another_face_template)
+    _verify_cache_store(key, score)
+    return score
 
+
+@traced
 def verify(face_template: str, another_face_template: str) -> float:
     """Verify whether two faces belong to the same person.
+    If a scoring backend is set (`face.set_scoring_backend`), the score is computed locally.
     :param face_template:
         Biometric template of one face (obtained from `face.process`).
     :param another_face_template:
@@ -115,18 +478,18 @@ def verify(face_template: str, another_face_template: str) -> float:
     :return:
         The matching score.
     """
-    verify_request = VerifyRequest(
-        first_template=face_template,
-        second_template=another_face_template
-    ).model_dump(mode='json')
-    json_response = request('POST', FaceRouterEndpoints.verify, json=verify_request)
-    return float(json_response['score'])
+    backend = _scoring_backend
+    if backend is not None:
+        return float(backend.verify(face_template, another_face_template))
+    return _verify_cached(face_template, another_face_template)
 
 
+@traced
 async def verify_async(face_template: str, another_face_template: str) -> float:
     """
     Verify whether two faces belong to the same person.
     Performs the request asynchronously.
+    If a scoring backend is set (`face.set_scoring_backend`), the score is computed locally.
     :param face_template:
         Biometric template of one face (obtained from `face.process`).
     :param another_face_template:
@@ -134,15 +497,94 @@ async def verify_async(face_template: str, another_face_template: str) -> float:
     :return:
         The matching score.
     """
-    verify_request = VerifyRequest(
-        first_template=face_template,
-        second_template=another_face_template
-    ).model_dump(mode='json')
-    json_response = await request_async('POST', FaceRouterEndpoints.verify, json=verify_request)
-    return float(json_response['score'])
+    backend = _scoring_backend
+    if backend is not None:
+        return float(backend.verify(face_template, another_face_template))
+    return await _verify_cached_async(face_template, another_face_template)
 
 
-def verify_id(face_template: str, person_id: str, group_id: str) -> float:
+@traced
+def verify_remote(face_template: str, another_face_template: str) -> float:
+    """Request the matching score of two faces to the server, bypassing the scoring backend and
+    the verify cache (check `scoring.validate_backend`).
+    :param face_template:
+        Biometric template of one face (obtained from `face.process`).
+    :param another_face_template:
+        Biometric template of another face (obtained from `face.process`).
+    :return:
+        The matching score.
+    """
+    return _verify_remote(face_template, another_face_template)
+
+
+@traced
+async def verify_remote_async(face_template: str, another_face_template: str) -> float:
+    """
+    Request the matching score of two faces to the server, bypassing the scoring backend and
+    the verify cache.
+    Performs the request asynchronously.
+    :param face_template:
+        Biometric template of one face (obtained from `face.process`).
+    :param another_face_template:
+        Biometric template of another face (obtained from `face.process`).
+    :return:
+        The matching score.
+    """
+    return await _verify_remote_async(face_template, another_face_template)
+
+
+@traced
+def verify_many(face_template: str, face_templates: Sequence[str]) -> List[float]:
+    """Compute the matching scores of one face against many faces.
+    With a scoring backend set (`face.set_scoring_backend`), all scores are computed at once;
+    otherwise one verify request is performed per template.
+    :param face_template:
+        Biometric template of one face (obtained from `face.process`).
+    :param face_templates:
+        Biometric templates of the faces to be scored against `face_template`.
+    :return:
+        The matching scores, in the order of `face_templates`.
+    """
+    backend = _scoring_backend
+    if backend is not None:
+        return [float(score) for score in backend.verify_many(face_template, face_templates)]
+    return [_verify_cached(face_template, template) for template in face_templates]
+
+
+@traced
+async def verify_many_async(
+        face_template: str,
+        face_templates: Sequence[str],
+        concurrency: int = 10) -> List[float]:
+    """
+    Compute the matching scores of one face against many faces.
+    Performs the requests asynchronously, with at most `concurrency` requests in flight.
+    With a scoring backend set (`face.set_scoring_backend`), all scores are computed at once.
+    :param face_template:
+        Biometric template of one face (obtained from `face.process`).
+    :param face_templates:
+        Biometric templates of the faces to be scored against `face_template`.
+    :param concurrency:
+        Maximum number of concurrent verify requests.
+    :return:
+        The matching scores, in the order of `face_templates`.
+    """
+    backend = _scoring_backend
+    if backend is not None:
+        return [float(score) for score in backend.verify_many(face_template, face_templates)]
+
+    async def verify_template(template: str) -> float:
+        return await verify_async(face_template, template)
+
+    return await bounded_gather_async(verify_template, face_templates, concurrency)
+
+
+@traced
+def verify_id(
+        face_template: str,
+        person_id: str,
+        group_id: str,
+        use_template_cache: bool = False) -> float:
     """Verify whether one face belongs to a person.
     :param face_template:
         Biometric template of one face (obtained from `face.process`).
@@ -150,19 +592,28 @@ def verify_id(face_template: str, person_id: str, group_id: str) -> float:
         Specify a certain person in a group. `person_id` is created in `group.add_person`.
     :param group_id:
         Specify a certain group where the person is. `group_id` is created in `group.create`.
+    :param use_template_cache:
+        If the template of the person is in the template cache (check `group.prefetch`), score
+        against it with `face.verify`, locally when a scoring backend is set, instead of
+        requesting a verify id.
     :return:
         The matching score.
     """
-    verify_id_request = VerifyIdRequest(
-        template=face_template,
-        template_id=person_id,
-        gallery_id=group_id
-    ).model_dump(mode='json')
+    if use_template_cache:
+        person_template = group.cached_person_template(group_id, person_id)
+        if person_template is not None:
+            return verify(face_template, person_template)
+    verify_id_request = serialization.verify_id_request(face_template, person_id, group_id)
     json_response = request('POST', FaceRouterEndpoints.verify_id, json=verify_id_request)
     return float(json_response['score'])
 
 
-async def verify_id_async(face_template: str, person_id: str, group_id: str) -> float:
+@traced
+async def verify_id_async(
+        face_template: str,
+        person_id: str,
+        group_id: str,
+        use_template_cache: bool = False) -> float:
     """
     Verify whether one face belongs to a person.
     Performs the request asynchronously.
@@ -172,14 +623,18 @@ async def verify_id_async(face_template: str, person_id: str, group_id: str) ->
         Specify a certain person in a group. `person_id` is created in `group.add_person`.
     :param group_id:
         Specify a certain group where the person is. `group_id` is created in `group.create`.
+    :param use_template_cache:
+        If the template of the person is in the template cache (check `group.prefetch_async`),
+        score against it with `face.verify_async`, locally when a scoring backend is set, instead
+        of requesting a verify id.
     :return:
         The matching score.
     """
-    verify_id_request = VerifyIdRequest(
-        template=face_template,
-        template_id=person_id,
-        gallery_id=group_id
-    ).model_dump(mode='json')
+    if use_template_cache:
+        person_template = group.cached_person_template(group_id, person_id)
+        if person_template is not None:
+            return await verify_async(face_template, person_template)
+    verify_id_request = serialization.verify_id_request(face_template, person_id, group_id)
 
     json_response = await request_async(
         'POST',
@@ -189,12 +644,14 @@ async def verify_id_async(face_template: str, person_id: str, group_id: str) ->
     return float(json_response['score'])
 
 
+@traced
 def identify(
         face_template: str,
         group_id: str,
         minimum_score: float = -1.0,
         candidate_list_length: int = 1) -> List[Dict]:
     """Identify an unknown face in a group.
+    With an identify cache set (`face.set_identify_cache`), the result may come from the cache.
     :param face_template:
         Biometric template of the face to be identified (obtained from `face.process`).
     :param group_id:
@@ -206,15 +663,22 @@ def identify(
     :return:
         The identified candidates for the provided face template.
     """
-    identify_request = IdentifyRequest(
-        template=face_template,
-        candidate_list_length=candidate_list_length,
-        minimum_score=minimum_score,
-        gallery_id=group_id
-    ).model_dump(mode='json')
-    return request('POST', FaceRouterEndpoints.identify, json=identify_request)
-
-
+    identify_request = serialization.identify_request(
+        face_template, group_id, minimum_score, candidate_list_length
+    )
+    key = _identify_cache_key(face_template, group_id, minimum_score, candidate_list_length)
+    cache = _identify_cache
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+    candidates = request('POST', FaceRouterEndpoints.identify, json=identify_request)
+    if key is not None:
+        cache.put(key, copy.deepcopy(candidates))
+    return candidates
+
+
+@traced
 async def identify_async(
         face_template: str,
         group_id: str,
@@ -223,6 +687,7 @@ async def identify_async(
     """
     Identify an unknown face in a group.
     Performs the request asynchronously.
+    With an identify cache set (`face.set_identify_cache`), the result may come from the cache.
     :param face_template:
         Biometric template of the face to be identified (obtained from `face.process`).
     :param group_id:
@@ -234,23 +699,116 @@ async def identify_async(
     :return:
         The identified candidates for the provided face template.
     """
-    identify_request = IdentifyRequest(
-        template=face_template,
-        candidate_list_length=candidate_list_length,
-        minimum_score=minimum_score,
-        gallery_id=group_id
-    ).model_dump(mode='json')
-    return await request_async('POST', FaceRouterEndpoints.identify, json=identify_request)
+    identify_request = serialization.identify_request(
+        face_template, group_id, minimum_score, candidate_list_length
+    )
+    key = _identify_cache_key(face_template, group_id, minimum_score, candidate_list_length)
+    cache = _identify_cache
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+    candidates = await request_async('POST', FaceRouterEndpoints.identify, json=identify_request)
+    if key is not None:
+        cache.put(key, copy.deepcopy(candidates))
+    return candidates
+
+
+@traced
+def identify_many(
+        face_templates: Sequence[str],
+        group_id: str,
+        minimum_score: float = -1.0,
+        candidate_list_length: int = 1,
+        concurrency: int = 10) -> List[Union[List[Dict], Exception]]:
+    # pylint: disable=too-many-arguments
+    """Identify many unknown faces in a group, with at most `concurrency` requests in flight.
+    With an identify cache set (`face.set_identify_cache`), templates already identified in the
+    current version of the group are not sent again.
+    :param face_templates:
+        Biometric templates of the faces to be identified (obtained from `face.process`).
+    :param group_id:
+        Specify a certain group to perform the identification. `group_id` is created in `group.create`.
+    :param minimum_score:
+        Minimum matching score for candidates.
+    :param candidate_list_length:
+        Maximum length of the list of resulting candidates.
+    :param concurrency:
+        Maximum number of concurrent identify requests.
+    :return:
+        For each template, in the order of `face_templates`, the identified candidates or the
+        exception raised while identifying it.
+    """
+    if group_id is None:
+        raise ValueError("Group ID must be specified.")
+
+    def identify_template(face_template: str) -> List[Dict]:
+        return identify(face_template, group_id, minimum_score, candidate_list_length)
 
+    results = [None] * len(face_templates)
+    completed = bounded_as_completed(identify_template, face_templates, concurrency)
+    try:
+        for index, result in completed:
+            results[index] = result
+    finally:
+        completed.close()
+    return results
 
+
+@traced
+async def identify_many_async(
+        face_templates: Sequence[str],
+        group_id: str,
+        minimum_score: float = -1.0,
+        candidate_list_length: int = 1,
+        concurrency: int = 10) -> List[Union[List[Dict], Exception]]:
+    # pylint: disable=too-many-arguments
+    """
+    Identify many unknown faces in a group, with at most `concurrency` requests in flight.
+    Performs the requests asynchronously.
+    With an identify cache set (`face.set_identify_cache`), templates already identified in the
+    current version of the group are not sent again.
+    :param face_templates:
+        Biometric templates of the faces to be identified (obtained from `face.process`).
+    :param group_id:
+        Specify a certain group to perform the identification. `group_id` is created in `group.create`.
+    :param minimum_score:
+        Minimum matching score for candidates.
+    :param candidate_list_length:
+        Maximum length of the list of resulting candidates.
+    :param concurrency:
+        Maximum number of concurrent identify requests.
+    :return:
+        For each template, in the order of `face_templates`, the identified candidates or the
+        exception raised while identifying it.
+    """
+    if group_id is None:
+        raise ValueError("Group ID must be specified.")
+
+    async def identify_template(face_template: str) -> List[Dict]:
+        return await identify_async(face_template, group_id, minimum_score, candidate_list_length)
+
+    results = [None] * len(face_templates)
+    completed = bounded_as_completed_async(identify_template, face_templates, concurrency)
+    try:
+        async for index, result in completed:
+            results[index] = result
+    finally:
+        await completed.aclose()
+    return results
+
+
+@traced
 def verify_images(first_image, second_image) -> float:
     """
         Verifies if the face detected on the first image matches to the
         face detected on the second image.
     :param first_image:
-        A base64 string or a file path or a file-like object representing an image.
+        A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+        frame representing an image (check the `images` module).
     :param second_image:
-        A base64 string or a file path or a file-like object representing an image.
+        A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+        frame representing an image (check the `images` module).
     :return:
         Matching Score.
     """
@@ -268,15 +826,18 @@ def verify_images(first_image, second_image) -> float:
     return verify(first_face[0]["template"], second_face[0]["template"])
 
 
+@traced
 async def verify_images_async(first_image, second_image) -> float:
     """
         Verifies if the face detected on the first image matches to the
         face detected on the second image.
         Performs the requests asynchronously.
     :param first_image:
-        A base64 string or a file path or a file-like object representing an image.
+        A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+        frame representing an image (check the `images` module).
     :param second_image:
-        A base64 string or a file path or a file-like object representing an image.
+        A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+        frame representing an image (check the `images` module).
     :return:
         Matching Score.
     """
@@ -295,3 +856,86 @@ async def verify_images_async(first_image, second_image) -> float:
         raise FaceException(f"Second image: {error_message}")
 
     return await verify_async(first_face[0]["template"], second_face[0]["template"])
+
+
+def _face_template(faces: List[Dict], image_name: str) -> str:
+    """ Gets the template of the single face of a process result. """
+    error_message = face_process_validation(faces)
+    if error_message:
+        raise FaceException(f"{image_name}: {error_message}")
+    return faces[0]["template"]
+
+
+@traced
+def verify_images_many(
+        reference_image,
+        candidate_images: Sequence,
+        concurrency: int = 10) -> List[Union[float, Exception]]:
+    """
+        Verifies if the face detected on a reference image matches to the face detected on each
+        candidate image. The reference image is processed once, and the candidate images are
+        processed and verified with at most `concurrency` requests in flight.
+    :param reference_image:
+        An image, of the types accepted by `face.process`.
+    :param candidate_images:
+        A sequence of images, of the types accepted by `face.process`.
+    :param concurrency:
+        Maximum number of candidate images processed and verified concurrently.
+    :return:
+        For each candidate image, in the order of `candidate_images`, the matching score or the
+        exception raised while processing or verifying it.
+    :raises:
+        FaceException if no single face is detected on the reference image.
+    """
+    reference_template = _face_template(process(reference_image), "Reference image")
+
+    def verify_candidate(candidate_image) -> float:
+        template = _face_template(process(candidate_image), "Candidate image")
+        return verify(reference_template, template)
+
+    results = [None] * len(candidate_images)
+    completed = bounded_as_completed(verify_candidate, candidate_images, concurrency)
+    try:
+        for index, result in completed:
+            results[index] = result
+    finally:
+        completed.close()
+    return results
+
+
+@traced
+async def verify_images_many_async(
+        reference_image,
+        candidate_images: Sequence,
+        concurrency: int = 10) -> List[Union[float, Exception]]:
+    """
+        Verifies if the face detected on a reference image matches to the face detected on each
+        candidate image. The reference image is processed once, and the candidate images are
+        processed and verified with at most `concurrency` requests in flight.
+        Performs the requests asynchronously.
+    :param reference_image:
+        An image, of the types accepted by `face.process`.
+    :param candidate_images:
+        A sequence of images, of the types accepted by `face.process`.
+    :param concurrency:
+        Maximum number of candidate images processed and verified concurrently.
+    :return:
+        For each candidate image, in the order of `candidate_images`, the matching score or the
+        exception raised while processing or verifying it.
+    :raises:
+        FaceException if no single face is detected on the reference image.
+    """
+    reference_template = _face_template(await process_async(reference_image), "Reference image")
+
+    async def verify_candidate(candidate_image) -> float:
+        template = _face_template(await process_async(candidate_image), "Candidate image")
+        return await verify_async(reference_template, template)
+
+    results = [None] * len(candidate_images)
+    completed = bounded_as_completed_async(verify_candidate, candidate_images, concurrency)
+    try:
+        async for index, result in completed:
+            results[index] = result
+    finally:
+        await completed.aclose()
+    return results
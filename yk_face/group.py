@@ -1,10 +1,111 @@
 """Group module of the YouFace API.
 """
-from typing import List
-from yk_face_api_models import Template
-from yk_utils.apis import request, request_async
+import logging
+from typing import Callable, Dict, Iterable, List, Mapping, Optional
+from yk_face import serialization
+from yk_face.cache import LRUCache
+from yk_face.snapshot import Snapshot, SnapshotWriter
+from yk_face.tracing import traced
+from yk_face.transport import current_client, request, request_async, server_identity
+from yk_face.util import bounded_as_completed, bounded_as_completed_async
+
+logger = logging.getLogger(__name__)
+_mutation_listeners: List[Callable] = []
+_template_cache: Optional[LRUCache] = None
+
+
+def add_mutation_listener(
+        listener: Callable[[str, str, Optional[str], Optional[str]], None]):
+    """Register a listener notified after every group mutation performed through this SDK.
+    The mutation has already been applied by the server, so errors raised by the listener are
+    logged instead of being raised to the caller of the mutation.
+    :param listener:
+        Callable invoked as `listener(event, group_id, person_id, face_template)`, where event is
+        one of 'create', 'delete', 'add_person' or 'remove_person'. `person_id` and
+        `face_template` are None when they do not apply to the event.
+    :return:
+    """
+    _mutation_listeners.append(listener)
+
+
+def remove_mutation_listener(listener: Callable):
+    """Unregister a listener registered with `group.add_mutation_listener`.
+    :param listener:
+        The registered listener.
+    :return:
+    """
+    if listener in _mutation_listeners:
+        _mutation_listeners.remove(listener)
+
+
+def _notify_mutation(event: str, group_id: str, person_id: str = None, face_template: str = None):
+    for listener in list(_mutation_listeners):
+        try:
+            listener(event, group_id, person_id, face_template)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Group mutation listener %r failed on %s of group %s.",
+                             listener, event, group_id)
+
+
+def set_template_cache(cache: Optional[LRUCache]):
+    """Set the cache of the person templates fetched with `group.get_person_template`
+    (check `group.prefetch`). Templates are cached per server and subscription key
+    (`transport.server_identity`). Entries are invalidated by the mutations performed through
+    this SDK; use a LRUCache with a `ttl` to bound how long mutations performed by other clients
+    go unseen.
+    :param cache:
+        A LRUCache, or None to disable caching.
+    :return:
+    """
+    global _template_cache  # pylint: disable=global-statement
+    _template_cache = cache
+
+
+def get_template_cache() -> Optional[LRUCache]:
+    """Get the cache of person templates.
+    :return:
+        The LRUCache set with `group.set_template_cache` or None if caching is disabled.
+    """
+    return _template_cache
+
+
+def _template_key(group_id: str, person_id: str) -> tuple:
+    """ Server identity of the current client, group and person of a cached template. """
+    return server_identity(current_client()), group_id, person_id
+
+
+def cached_person_template(group_id: str, person_id: str) -> Optional[str]:
+    """Get the biometric template of a person from the template cache, without any request.
+    Only the templates fetched from the server of the current client are returned.
+    :param group_id:
+          ID of the group where the person is (used in `group.add_person`).
+    :param person_id:
+        Person ID. `person_id` is created in `group.add_person`.
+    :return:
+        The cached biometric template, or None if it is not cached.
+    """
+    cache = _template_cache
+    return cache.get(_template_key(group_id, person_id)) if cache is not None else None
 
 
+def _invalidate_templates(event: str, group_id: str, person_id: str, face_template: str):
+    # pylint: disable=unused-argument
+    """ Removes the cached templates affected by a group mutation, which is notified in the
+        context of its request. """
+    cache = _template_cache
+    if cache is None:
+        return
+    if person_id is None:
+        identity = server_identity(current_client())
+        cache.pop_if(lambda key: key[:2] == (identity, group_id))
+    else:
+        cache.pop(_template_key(group_id, person_id))
+
+
+add_mutation_listener(_invalidate_templates)
+
+
+@traced
 def create(group_id: str):
     """Create a new group with specified `group_id`.
     :param group_id:
@@ -16,8 +117,10 @@ def create(group_id: str):
 
     url = f'gallery/{group_id}'
     request('POST', url)
+    _notify_mutation('create', group_id)
 
 
+@traced
 async def create_async(group_id: str):
     """
     Create a new group with specified `group_id`.
@@ -31,8 +134,10 @@ async def create_async(group_id: str):
 
     url = f'gallery/{group_id}'
     await request_async('POST', url)
+    _notify_mutation('create', group_id)
 
 
+@traced
 def delete(group_id: str):
     """Delete an existing group with specified `group_id`.
     :param group_id:
@@ -44,8 +149,10 @@ def delete(group_id: str):
 
     url = f'gallery/{group_id}'
     request('DELETE', url)
+    _notify_mutation('delete', group_id)
 
 
+@traced
 async def delete_async(group_id: str):
     """
     Delete an existing group with specified `group_id`.
@@ -59,8 +166,10 @@ async def delete_async(group_id: str):
 
     url = f'gallery/{group_id}'
     await request_async('DELETE', url)
+    _notify_mutation('delete', group_id)
 
 
+@traced
 def list_ids(group_id: str) -> List[str]:
     """List all person ids in a specified `group_id`.
     :param group_id:
@@ -75,6 +184,7 @@ def list_ids(group_id: str) -> List[str]:
     return request('GET', url)
 
 
+@traced
 async def list_ids_async(group_id: str) -> List[str]:
     """
     List all person ids in a specified `group_id`.
@@ -91,6 +201,7 @@ async def list_ids_async(group_id: str) -> List[str]:
     return await request_async('GET', url)
 
 
+@traced
 def add_person(group_id: str, person_id: str, face_template: str):
     """Add a person to a group.
     :param group_id:
@@ -107,10 +218,12 @@ def add_person(group_id: str, person_id: str, face_template: str):
         raise ValueError("Person ID must be specified.")
 
     url = f'gallery/{group_id}/{person_id}'
-    template_request = Template(template=face_template).model_dump(mode='json')
+    template_request = serialization.template_request(face_template)
     request('POST', url, json=template_request)
+    _notify_mutation('add_person', group_id, person_id, face_template)
 
 
+@traced
 async def add_person_async(group_id: str, person_id: str, face_template: str):
     """
     Add a person to a group.
@@ -129,16 +242,108 @@ async def add_person_async(group_id: str, person_id: str, face_template: str):
         raise ValueError("Person ID must be specified.")
 
     url = f'gallery/{group_id}/{person_id}'
-    template_request = Template(template=face_template).model_dump(mode='json')
+    template_request = serialization.template_request(face_template)
     await request_async('POST', url, json=template_request)
+    _notify_mutation('add_person', group_id, person_id, face_template)
+
+
+@traced
+def add_persons(
+        group_id: str,
+        persons: Mapping[str, str],
+        concurrency: int = 10,
+        progress: Callable[[int, int], None] = None) -> Dict[str, Exception]:
+    """Add many persons to a group, with at most `concurrency` requests in flight.
+    A failed person does not abort the others.
+    :param group_id:
+         ID of the group. `group_id` is created in `group.create`.
+    :param persons:
+        Mapping of person IDs to their biometric templates (obtained from `face.process`).
+    :param concurrency:
+        Maximum number of concurrent add person requests.
+    :param progress:
+        Optional callable invoked as `progress(completed, total)` after each person.
+    :return:
+        Mapping of the person IDs that could not be added to the raised exception.
+    """
+    if group_id is None:
+        raise ValueError("Group ID must be specified.")
 
+    def add(person):
+        add_person(group_id, *person)
+
+    person_ids = list(persons)
+    errors = {}
+    completed = bounded_as_completed(add, persons.items(), concurrency)
+    try:
+        for count, (index, result) in enumerate(completed, 1):
+            if isinstance(result, Exception):
+                errors[person_ids[index]] = result
+            if progress:
+                progress(count, len(person_ids))
+    finally:
+        completed.close()
+    return errors
+
+
+@traced
+async def add_persons_async(
+        group_id: str,
+        persons: Mapping[str, str],
+        concurrency: int = 10,
+        progress: Callable[[int, int], None] = None) -> Dict[str, Exception]:
+    """
+    Add many persons to a group, with at most `concurrency` requests in flight.
+    A failed person does not abort the others.
+    Performs the requests asynchronously.
+    :param group_id:
+         ID of the group. `group_id` is created in `group.create`.
+    :param persons:
+        Mapping of person IDs to their biometric templates (obtained from `face.process`).
+    :param concurrency:
+        Maximum number of concurrent add person requests.
+    :param progress:
+        Optional callable invoked as `progress(completed, total)` after each person.
+    :return:
+        Mapping of the person IDs that could not be added to the raised exception.
+    """
+    if group_id is None:
+        raise ValueError("Group ID must be specified.")
 
-def get_person_template(group_id: str, person_id: str) -> str:
+    async def add(person):
+        await add_person_async(group_id, *person)
+
+    person_ids = list(persons)
+    errors = {}
+    count = 0
+    completed = bounded_as_completed_async(add, persons.items(), concurrency)
+    try:
+        async for index, result in completed:
+            count += 1
+            if isinstance(result, Exception):
+                errors[person_ids[index]] = result
+            if progress:
+                progress(count, len(person_ids))
+    finally:
+        await completed.aclose()
+    return errors
+
+
+@traced
+def get_person_template(
+        group_id: str,
+        person_id: str,
+        use_cache: bool = True) -> str:
     """Get the biometric template of a specified `person_id` in `group_id`.
+    With a template cache set (`group.set_template_cache`), the template may come from the cache.
     :param group_id:
           ID of the group where the person is (used in `group.add_person`).
     :param person_id:
         Person ID. `person_id` is created in `group.add_person`.
+    :param use_cache:
+        Look the template up in the template cache and store the fetched one. Set to False to
+        always request the template without touching the cache, e.g. when reloading a whole
+        gallery that would evict the cached working set.
     :return:
         The biometric template of this person.
     """
@@ -147,19 +352,43 @@ def get_person_template(group_id: str, person_id: str) -> str:
     if person_id is None:
         raise ValueError("Person ID must be specified.")
 
-    url = f'gallery/{group_id}/{person_id}'
-    json_response = request('GET', url)
-    return json_response['template']
+    if not use_cache:
+        return _fetch_person_template(group_id, person_id, store=False)
+    template = cached_person_template(group_id, person_id)
+    if template is not None:
+        return template
+    return _fetch_person_template(group_id, person_id)
 
 
-async def get_person_template_async(group_id: str, person_id: str) -> str:
+def _fetch_person_template(group_id: str, person_id: str, store: bool = True) -> str:
+    """ Requests the template of a person and stores it in the template cache, unless `store` is
+        False. """
+    url = f'gallery/{group_id}/{person_id}'
+    json_response = request('GET', url)
+    template = json_response['template']
+    cache = _template_cache
+    if store and cache is not None:
+        cache.put(_template_key(group_id, person_id), template)
+    return template
+
+
+@traced
+async def get_person_template_async(
+        group_id: str,
+        person_id: str,
+        use_cache: bool = True) -> str:
     """
     Get the biometric template of a specified `person_id` in `group_id`.
     Performs the request asynchronously.
+    With a template cache set (`group.set_template_cache`), the template may come from the cache.
     :param group_id:
           ID of the group where the person is (used in `group.add_person`).
     :param person_id:
         Person ID. `person_id` is created in `group.add_person`.
+    :param use_cache:
+        Look the template up in the template cache and store the fetched one. Set to False to
+        always request the template without touching the cache, e.g. when reloading a whole
+        gallery that would evict the cached working set.
     :return:
         The biometric template of this person.
     """
@@ -168,11 +397,98 @@ async def get_person_template_async(group_id: str, person_id: str) -> str:
     if person_id is None:
         raise ValueError("Person ID must be specified.")
 
+    if not use_cache:
+        return await _fetch_person_template_async(group_id, person_id, store=False)
+    template = cached_person_template(group_id, person_id)
+    if template is not None:
+        return template
+    return await _fetch_person_template_async(group_id, person_id)
+
+
+async def _fetch_person_template_async(group_id: str, person_id: str, store: bool = True) -> str:
+    """ Requests the template of a person and stores it in the template cache, unless `store` is
+        False. """
     url = f'gallery/{group_id}/{person_id}'
     json_response = await request_async('GET', url)
-    return json_response['template']
+    template = json_response['template']
+    cache = _template_cache
+    if store and cache is not None:
+        cache.put(_template_key(group_id, person_id), template)
+    return template
+
+
+@traced
+def prefetch(group_id: str, person_ids: Iterable[str], concurrency: int = 10) \
+        -> Dict[str, Exception]:
+    """Fetch the templates of many persons into the template cache (check
+    `group.set_template_cache`), with at most `concurrency` requests in flight.
+    Templates already cached are fetched again, which renews their time to live.
+    :param group_id:
+          ID of the group where the persons are (used in `group.add_person`).
+    :param person_ids:
+        IDs of the persons.
+    :param concurrency:
+        Maximum number of concurrent requests.
+    :return:
+        Mapping of the person IDs that could not be fetched to the raised exception.
+    """
+    if group_id is None:
+        raise ValueError("Group ID must be specified.")
+    if _template_cache is None:
+        raise ValueError("Template cache must be set.")
+
+    person_ids = list(person_ids)
+    errors = {}
+    completed = bounded_as_completed(
+        lambda person_id: _fetch_person_template(group_id, person_id), person_ids, concurrency
+    )
+    try:
+        for index, result in completed:
+            if isinstance(result, Exception):
+                errors[person_ids[index]] = result
+    finally:
+        completed.close()
+    return errors
+
+
+@traced
+async def prefetch_async(group_id: str, person_ids: Iterable[str], concurrency: int = 10) \
+        -> Dict[str, Exception]:
+    """
+    Fetch the templates of many persons into the template cache (check
+    `group.set_template_cache`), with at most `concurrency` requests in flight.
+    Templates already cached are fetched again, which renews their time to live.
+    Performs the requests asynchronously.
+    :param group_id:
+          ID of the group where the persons are (used in `group.add_person`).
+    :param person_ids:
+        IDs of the persons.
+    :param concurrency:
+        Maximum number of concurrent requests.
+    :return:
+        Mapping of the person IDs that could not be fetched to the raised exception.
+    """
+    if group_id is None:
+        raise ValueError("Group ID must be specified.")
+    if _template_cache is None:
+        raise ValueError("Template cache must be set.")
+
+    async def fetch(person_id: str) -> str:
+        return await _fetch_person_template_async(group_id, person_id)
+
+    person_ids = list(person_ids)
+    errors = {}
+    completed = bounded_as_completed_async(fetch, person_ids, concurrency)
+    try:
+        async for index, result in completed:
+            if isinstance(result, Exception):
+                errors[person_ids[index]] = result
+    finally:
+        await completed.aclose()
+    return errors
 
 
+@traced
 def remove_person(group_id: str, person_id: str):
     """Remove a person from a group.
     :param group_id:
@@ -188,8 +504,10 @@ def remove_person(group_id: str, person_id: str):
 
     url = f'gallery/{group_id}/{person_id}'
     request('DELETE', url)
+    _notify_mutation('remove_person', group_id, person_id)
 
 
+@traced
 async def remove_person_async(group_id: str, person_id: str):
     """
     Remove a person from a group.
@@ -207,3 +525,117 @@ async def remove_person_async(group_id: str, person_id: str):
 
     url = f'gallery/{group_id}/{person_id}'
     await request_async('DELETE', url)
+    _notify_mutation('remove_person', group_id, person_id)
+
+
+@traced
+def export(group_id: str, path: str, concurrency: int = 10):
+    """Export all persons of a group into a snapshot file (check the `snapshot` module).
+    Templates are requested concurrently, bypassing the template cache, and streamed into the
+    file as they arrive.
+    :param group_id:
+         ID of the group to be exported. `group_id` is created in `group.create`.
+    :param path:
+        Path of the snapshot file.
+    :param concurrency:
+        Maximum number of concurrent get person template requests.
+    :return:
+    """
+    if group_id is None:
+        raise ValueError("Group ID must be specified.")
+
+    person_ids = list_ids(group_id)
+    with SnapshotWriter(path, person_ids) as writer:
+        completed = bounded_as_completed(
+            lambda person_id: get_person_template(group_id, person_id, use_cache=False),
+            person_ids,
+            concurrency
+        )
+        try:
+            for row, result in completed:
+                if isinstance(result, Exception):
+                    raise result
+                writer.write(row, result)
+        finally:
+            completed.close()
+
+
+@traced
+async def export_async(group_id: str, path: str, concurrency: int = 10):
+    """
+    Export all persons of a group into a snapshot file (check the `snapshot` module).
+    Templates are requested concurrently, bypassing the template cache, and streamed into the
+    file as they arrive.
+    Performs the requests asynchronously.
+    :param group_id:
+         ID of the group to be exported. `group_id` is created in `group.create`.
+    :param path:
+        Path of the snapshot file.
+    :param concurrency:
+        Maximum number of concurrent get person template requests.
+    :return:
+    """
+    if group_id is None:
+        raise ValueError("Group ID must be specified.")
+
+    async def get_template(person_id: str) -> str:
+        return await get_person_template_async(group_id, person_id, use_cache=False)
+
+    person_ids = await list_ids_async(group_id)
+    with SnapshotWriter(path, person_ids) as writer:
+        completed = bounded_as_completed_async(get_template, person_ids, concurrency)
+        try:
+            async for row, result in completed:
+                if isinstance(result, Exception):
+                    raise result
+                writer.write(row, result)
+        finally:
+            await completed.aclose()
+
+
+@traced
+def import_(
+        path: str,
+        group_id: str,
+        concurrency: int = 10,
+        progress: Callable[[int, int], None] = None) -> Dict[str, Exception]:
+    """Add all persons of a snapshot file (created by `group.export`) to a group.
+    The group must already exist.
+    :param path:
+        Path of the snapshot file.
+    :param group_id:
+         ID of the group. `group_id` is created in `group.create`.
+    :param concurrency:
+        Maximum number of concurrent add person requests.
+    :param progress:
+        Optional callable invoked as `progress(completed, total)` after each person.
+    :return:
+        Mapping of the person IDs that could not be added to the raised exception.
+    """
+    with Snapshot(path) as snapshot:
+        return add_persons(group_id, snapshot, concurrency, progress)
+
+
+@traced
+async def import_async(
+        path: str,
+        group_id: str,
+        concurrency: int = 10,
+        progress: Callable[[int, int], None] = None) -> Dict[str, Exception]:
+    """
+    Add all persons of a snapshot file (created by `group.export`) to a group.
+    The group must already exist.
+    Performs the requests asynchronously.
+    :param path:
+        Path of the snapshot file.
+    :param group_id:
+         ID of the group. `group_id` is created in `group.create`.
+    :param concurrency:
+        Maximum number of concurrent add person requests.
+    :param progress:
+        Optional callable invoked as `progress(completed, total)` after each person.
+    :return:
+        Mapping of the person IDs that could not be added to the raised exception.
+    """
+    with Snapshot(path) as snapshot:
+        return await add_persons_async(group_id, snapshot, concurrency, progress)
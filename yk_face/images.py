@@ -0,0 +1,251 @@
+"""Image module of the Python SDK of the YouFace API.
+Turns the images given to `face.process` into the base64 string sent to the API, optionally
+downscaling and re-encoding them first (requires Pillow: `pip install yk_face[images]`).
+
+Besides base64 strings, file paths and file-like objects, images can be given as encoded
+image buffers (`bytes`, `bytearray`, `memoryview` or 1-D uint8 numpy arrays) or as decoded
+frames (PIL images, or HxW / HxWx3 / HxWx4 uint8 numpy arrays, wrapped in `Frame` when their
+channels are not in RGB order). Frames are JPEG-encoded without intermediate copies.
+"""
+import base64
+import binascii
+import io
+import os
+import threading
+from collections import namedtuple
+from yk_utils.images import parse_image
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover
+    Image = ImageOps = None
+
+FRAME_JPEG_QUALITY = 90
+_BUFFER_TYPES = (bytes, bytearray, memoryview)
+_FRAME_MODES = {
+    # (channels, channel order): (PIL mode, raw decoder mode)
+    (1, 'RGB'): ('L', 'L'),
+    (1, 'BGR'): ('L', 'L'),
+    (3, 'RGB'): ('RGB', 'RGB'),
+    (3, 'BGR'): ('RGB', 'BGR'),
+    (4, 'RGB'): ('RGBA', 'RGBA'),
+    (4, 'BGR'): ('RGBA', 'BGRA'),
+}
+
+PreprocessStats = namedtuple(
+    'PreprocessStats', ['images', 'reencoded', 'bytes_before', 'bytes_after']
+)
+
+
+class ImagePreprocessor:
+    """Downscales images so that their longest edge is at most `max_edge` pixels and re-encodes
+    them as JPEG, applying the EXIF orientation and dropping the remaining metadata.
+    Images that need neither downscaling nor rotation are sent as they are.
+    """
+    def __init__(self, max_edge: int = 1280, jpeg_quality: int = 90, exif_transpose: bool = True,
+                 report=None):
+        """Class initializer.
+        :param max_edge:
+            Maximum length, in pixels, of the longest edge of the image.
+        :param jpeg_quality:
+            Quality (1-95) of the re-encoded JPEG images.
+        :param exif_transpose:
+            Rotate the image according to its EXIF orientation before downscaling it.
+        :param report:
+            Optional callable invoked as `report(bytes_before, bytes_after)` for every image.
+        """
+        if Image is None:
+            raise ImportError("Image preprocessing requires Pillow: pip install yk_face[images]")
+        if max_edge < 1:
+            raise ValueError("max_edge must be at least 1.")
+        if not 1 <= jpeg_quality <= 95:
+            raise ValueError("jpeg_quality must be between 1 and 95.")
+        self.max_edge = max_edge
+        self.jpeg_quality = jpeg_quality
+        self.exif_transpose = exif_transpose
+        self.report = report
+        self._lock = threading.Lock()
+        self._stats = PreprocessStats(0, 0, 0, 0)
+
+    def __call__(self, data) -> bytes:
+        """Preprocess an encoded image.
+        :param data:
+            Encoded image (JPEG, PNG, ...), as a bytes-like object.
+        :return:
+            The preprocessed encoded image, or `data` if it does not need preprocessing.
+        """
+        try:
+            result = self._reencode(data)
+        except OSError:  # Not an image Pillow can decode: let the API validate it.
+            result = data
+
+        self._count(len(data), len(result), result is not data)
+        return result
+
+    def encode_frame(self, image: 'Image.Image', size: int) -> memoryview:
+        """Downscale and JPEG-encode a decoded frame.
+        :param image:
+            A PIL image.
+        :param size:
+            Size of the frame in bytes, for the counters.
+        :return:
+            The encoded image.
+        """
+        result = self._encode(image)
+        self._count(size, len(result), True)
+        return result
+
+    def _reencode(self, data: bytes) -> bytes:
+        with Image.open(io.BytesIO(data)) as image:
+            orientation = image.getexif().get(0x0112, 1) if self.exif_transpose else 1
+            if max(image.size) <= self.max_edge and orientation in (None, 1):
+                return data
+            if orientation not in (None, 1):
+                image = ImageOps.exif_transpose(image)
+            return self._encode(image)
+
+    def _encode(self, image: 'Image.Image') -> memoryview:
+        width, height = image.size
+        scale = self.max_edge / max(width, height)
+        if scale < 1:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = image.resize(size, Image.LANCZOS)
+        return _jpeg(image, self.jpeg_quality)
+
+    def _count(self, before: int, after: int, reencoded: bool):
+        with self._lock:
+            images, count, total_before, total_after = self._stats
+            self._stats = PreprocessStats(
+                images + 1, count + reencoded, total_before + before, total_after + after
+            )
+        if self.report:
+            self.report(before, after)
+
+    def stats(self) -> PreprocessStats:
+        """Get the preprocessing counters.
+        :return:
+            PreprocessStats with the number of images and re-encoded images, and the total
+            number of bytes before and after preprocessing.
+        """
+        with self._lock:
+            return self._stats
+
+
+class Frame:
+    """Decoded frame whose channels are not in RGB order, e.g. an OpenCV BGR frame:
+    `face.process(Frame(frame, 'BGR'))`.
+    """
+    __slots__ = ('array', 'channel_order')
+
+    def __init__(self, array, channel_order: str = 'RGB'):
+        """Class initializer.
+        :param array:
+            HxW, HxWx3 or HxWx4 uint8 numpy array.
+        :param channel_order:
+            'RGB' or 'BGR'.
+        """
+        if channel_order not in ('RGB', 'BGR'):
+            raise ValueError("channel_order must be 'RGB' or 'BGR'.")
+        self.array = array
+        self.channel_order = channel_order
+
+
+def _jpeg(image: 'Image.Image', quality: int) -> memoryview:
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getbuffer()
+
+
+def _frame_image(frame: Frame) -> 'Image.Image':
+    """ Wraps the memory of a numpy frame in a PIL image, without copying it if contiguous. """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    array = np.ascontiguousarray(frame.array)
+    channels = 1 if array.ndim == 2 else array.shape[2] if array.ndim == 3 else 0
+    if array.dtype != np.uint8 or (channels, frame.channel_order) not in _FRAME_MODES:
+        raise TypeError("Frames must be HxW, HxWx3 or HxWx4 uint8 arrays.")
+    mode, raw_mode = _FRAME_MODES[(channels, frame.channel_order)]
+    height, width = array.shape[:2]
+    return Image.frombuffer(mode, (width, height), array, 'raw', raw_mode, 0, 1)
+
+
+def _as_frame(image):
+    """ Returns `image` as a Frame or a PIL image if it is a decoded frame, None otherwise. """
+    if isinstance(image, Frame):
+        return image
+    if Image is not None and isinstance(image, Image.Image):
+        return image
+    if hasattr(image, '__array_interface__') and getattr(image, 'ndim', 0) > 1:
+        return Frame(image)
+    return None
+
+
+def read_image(image):
+    """Read the encoded bytes of an image.
+    :param image:
+        A base64 string, a file path, a file-like object or an encoded image buffer.
+    :return:
+        The encoded image as a bytes-like object, or None if `image` is a string that is not
+        valid base64.
+    """
+    if isinstance(image, _BUFFER_TYPES):
+        return image
+    if hasattr(image, '__array_interface__'):  # 1-D uint8 numpy array of an encoded image.
+        return memoryview(image).cast('B')
+    if hasattr(image, 'read'):
+        return image.read()
+    if os.path.isfile(image):
+        with open(image, 'rb') as file:
+            return file.read()
+    if image.startswith('data:') and 'base64,' in image:
+        image = image.split('base64,', 1)[1]
+    try:
+        return base64.b64decode(image, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def image_bytes(image, preprocessor: ImagePreprocessor = None):
+    """Get the encoded bytes of an image, as uploaded to the API.
+    :param image:
+        A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+        frame (check the module documentation).
+    :param preprocessor:
+        Optional ImagePreprocessor applied to the image.
+    :return:
+        The encoded image as a bytes-like object, or None if `image` is a string that is neither
+        a file path nor valid base64.
+    """
+    frame = _as_frame(image)
+    if frame is None:
+        data = read_image(image)
+        return preprocessor(data) if data is not None and preprocessor is not None else data
+    if Image is None:
+        raise ImportError("Encoding frames requires Pillow: pip install yk_face[images]")
+    if isinstance(frame, Frame):
+        size = frame.array.nbytes
+        frame = _frame_image(frame)
+    else:
+        size = frame.width * frame.height * len(frame.getbands())
+    return preprocessor.encode_frame(frame, size) if preprocessor else \
+        _jpeg(frame, FRAME_JPEG_QUALITY)
+
+
+def encode_image(image, preprocessor: ImagePreprocessor = None) -> str:
+    """Encode an image as the base64 string sent to the API.
+    :param image:
+        A base64 string, a file path, a file-like object, an encoded image buffer or a decoded
+        frame (check the module documentation).
+    :param preprocessor:
+        Optional ImagePreprocessor applied to the image before encoding it.
+    :return:
+        Image as a base64 string.
+    """
+    if preprocessor is None and not isinstance(image, _BUFFER_TYPES) \
+            and not hasattr(image, '__array_interface__') and _as_frame(image) is None:
+        return parse_image(image)
+    data = image_bytes(image, preprocessor)
+    if data is None:
+        return image
+    return base64.b64encode(data).decode('ascii')
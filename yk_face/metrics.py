@@ -0,0 +1,282 @@
+"""Metrics module of the Python SDK of the YouFace API.
+Collects per-endpoint latency and payload size histograms, in-flight gauges, retry and error
+counters, and the duration of the client-side stages of the requests (image parsing,
+serialization and HTTP round trips). Metrics are reported to callbacks and exported in the
+Prometheus text format, without any dependency.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from yk_utils.apis import YoonikApiException
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0,
+)
+SIZE_BUCKETS = tuple(256 * 4 ** exponent for exponent in range(9))  # 256 B to 16 MiB
+
+RequestMetrics = namedtuple(
+    'RequestMetrics',
+    ['endpoint', 'duration', 'request_bytes', 'response_bytes', 'attempts', 'error_class']
+)
+
+
+def error_class(exception: BaseException) -> str:
+    """Get the class of an error, as used in the metric labels.
+    :param exception:
+        Exception raised by a request.
+    :return:
+        'http_<status code>' for API errors, or the name of the exception type.
+    """
+    if isinstance(exception, YoonikApiException):
+        return f'http_{exception.status_code}'
+    return type(exception).__name__
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket upper bounds."""
+    def __init__(self, buckets: Sequence[float]):
+        """Class initializer.
+        :param buckets:
+            Sorted bucket upper bounds.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record a value.
+        :param value:
+            Observed value.
+        :return:
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """Get the cumulative count of each bucket.
+        :return:
+            List of (upper bound, count) tuples, ending with ('+Inf', count).
+        """
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else repr(float(bound)), total))
+        return result
+
+
+class RequestTracker:
+    """Tracks one call of a `face` or `group` function through the transport: its attempts
+    (retries and hedged requests) and payload sizes.
+    """
+    __slots__ = ('collector', 'endpoint', 'request_bytes', 'response_bytes', 'attempts', 'start')
+
+    def __init__(self, collector, endpoint: str, request_bytes: Optional[int]):
+        self.collector = collector
+        self.endpoint = endpoint
+        self.request_bytes = request_bytes
+        self.response_bytes = None
+        self.attempts = 0
+        self.start = time.perf_counter()
+
+    def finish(self, error: BaseException = None):
+        """Record the call.
+        :param error:
+            Exception raised by the call, if any.
+        :return:
+        """
+        self.collector.record(RequestMetrics(
+            self.endpoint,
+            time.perf_counter() - self.start,
+            self.request_bytes,
+            self.response_bytes,
+            self.attempts,
+            None if error is None else error_class(error)
+        ))
+
+
+class MetricsCollector:
+    """Metrics of the requests of the `face` and `group` modules
+    (check `transport.set_metrics` and the `metrics` argument of `YKFaceClient`).
+
+    With a collector set, JSON payloads are encoded by the transport so that their size is known.
+    Response sizes are only known for the requests performed through a `YKFaceClient`.
+    """
+    def __init__(
+            self,
+            latency_buckets: Sequence[float] = LATENCY_BUCKETS,
+            size_buckets: Sequence[float] = SIZE_BUCKETS):
+        """Class initializer.
+        :param latency_buckets:
+            Bucket upper bounds of the latency histograms, in seconds.
+        :param size_buckets:
+            Bucket upper bounds of the payload size histograms, in bytes.
+        """
+        self.latency_buckets = tuple(latency_buckets)
+        self.size_buckets = tuple(size_buckets)
+        self._latencies: Dict[str, Histogram] = {}
+        self._request_sizes: Dict[str, Histogram] = {}
+        self._response_sizes: Dict[str, Histogram] = {}
+        self._stages: Dict[str, Histogram] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._retries: Dict[str, int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._callbacks: List[Callable[[RequestMetrics], None]] = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: Callable[[RequestMetrics], None]):
+        """Register a callback invoked with the RequestMetrics of every completed call.
+        The call has already completed, so errors raised by the callback are logged instead of
+        being raised to the caller of the request.
+        :param callback:
+            Callable invoked as `callback(request_metrics)`.
+        :return:
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[RequestMetrics], None]):
+        """Unregister a callback registered with `add_callback`.
+        :param callback:
+            The registered callback.
+        :return:
+        """
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def track(self, endpoint: str, request_bytes: Optional[int] = None) -> RequestTracker:
+        """Start tracking a call, counting it as in flight until it finishes.
+        :param endpoint:
+            Endpoint name (check `transport.endpoint_name`).
+        :param request_bytes:
+            Size of the request payload, if known.
+        :return:
+            The RequestTracker of the call.
+        """
+        with self._lock:
+            self._in_flight[endpoint] = self._in_flight.get(endpoint, 0) + 1
+        return RequestTracker(self, endpoint, request_bytes)
+
+    def record(self, request_metrics: RequestMetrics):
+        """Record a completed call and report it to the callbacks.
+        :param request_metrics:
+            RequestMetrics of the call.
+        :return:
+        """
+        endpoint = request_metrics.endpoint
+        with self._lock:
+            self._in_flight[endpoint] -= 1
+            self._histogram(self._latencies, endpoint, self.latency_buckets) \
+                .observe(request_metrics.duration)
+            if request_metrics.request_bytes is not None:
+                self._histogram(self._request_sizes, endpoint, self.size_buckets) \
+                    .observe(request_metrics.request_bytes)
+            if request_metrics.response_bytes is not None:
+                self._histogram(self._response_sizes, endpoint, self.size_buckets) \
+                    .observe(request_metrics.response_bytes)
+            if request_metrics.attempts > 1:
+                self._retries[endpoint] = \
+                    self._retries.get(endpoint, 0) + request_metrics.attempts - 1
+            if request_metrics.error_class is not None:
+                key = (endpoint, request_metrics.error_class)
+                self._errors[key] = self._errors.get(key, 0) + 1
+        for callback in list(self._callbacks):
+            try:
+                callback(request_metrics)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Metrics callback %r failed on a call to %s.",
+                                 callback, request_metrics.endpoint)
+
+    def observe_stage(self, stage: str, duration: float):
+        """Record the duration of a client-side stage of a request.
+        :param stage:
+            Stage name: 'parse_image', 'serialize', 'compress', 'http' or 'decode'.
+        :param duration:
+            Duration in seconds.
+        :return:
+        """
+        with self._lock:
+            self._histogram(self._stages, stage, self.latency_buckets).observe(duration)
+
+    @staticmethod
+    def _histogram(histograms: Dict[str, Histogram], name: str, buckets) -> Histogram:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram(buckets)
+        return histogram
+
+    def in_flight(self, endpoint: str) -> int:
+        """Get the number of calls in flight to an endpoint.
+        :param endpoint:
+            Endpoint name.
+        :return:
+            The number of calls in flight.
+        """
+        return self._in_flight.get(endpoint, 0)
+
+    def to_prometheus(self) -> str:
+        """Export the metrics in the Prometheus text exposition format.
+        :return:
+            The metrics, as text.
+        """
+        lines = []
+        with self._lock:
+            _histogram_lines(lines, 'yk_face_request_duration_seconds',
+                             'Duration of the calls, including retries.',
+                             'endpoint', self._latencies)
+            _histogram_lines(lines, 'yk_face_request_size_bytes',
+                             'Size of the request payloads.', 'endpoint', self._request_sizes)
+            _histogram_lines(lines, 'yk_face_response_size_bytes',
+                             'Size of the response payloads.', 'endpoint', self._response_sizes)
+            _histogram_lines(lines, 'yk_face_stage_duration_seconds',
+                             'Duration of the client-side stages of the requests.',
+                             'stage', self._stages)
+            _sample_lines(lines, 'yk_face_requests_in_flight', 'gauge',
+                          'Calls in flight.',
+                          {(('endpoint', name),): value for name, value in self._in_flight.items()})
+            _sample_lines(lines, 'yk_face_retries_total', 'counter',
+                          'Retried and hedged requests.',
+                          {(('endpoint', name),): value for name, value in self._retries.items()})
+            _sample_lines(lines, 'yk_face_errors_total', 'counter',
+                          'Failed calls, by error class.',
+                          {(('endpoint', endpoint), ('error_class', error)): value
+                           for (endpoint, error), value in self._errors.items()})
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+def _labels(labels) -> str:
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in labels
+    )
+
+
+def _histogram_lines(lines: List[str], name: str, help_text: str, label: str,
+                     histograms: Dict[str, Histogram]):
+    # pylint: disable=too-many-arguments
+    if not histograms:
+        return
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for value, histogram in sorted(histograms.items()):
+        labels = _labels(((label, value),))
+        for bound, count in histogram.cumulative_counts():
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram.sum!r}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+
+def _sample_lines(lines: List[str], name: str, metric_type: str, help_text: str,
+                  samples: Dict[tuple, float]):
+    # pylint: disable=too-many-arguments
+    if not samples:
+        return
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {metric_type}')
+    for labels, value in sorted(samples.items()):
+        lines.append(f'{name}{{{_labels(labels)}}} {value}')
@@ -0,0 +1,281 @@
+"""Group mirror module of the Python SDK of the YouFace API.
+Keeps a local copy of a group to identify faces in-process.
+Requires numpy (`pip install yk_face[numpy]`).
+"""
+import logging
+import threading
+from typing import Dict, List, Sequence
+from yk_face import group
+from yk_face.scoring import LocalScoring, np
+from yk_face.snapshot import Snapshot
+from yk_face.util import bounded_gather, bounded_gather_async
+
+logger = logging.getLogger(__name__)
+
+
+class GroupMirror:
+    """Local copy of a group, stored as a contiguous matrix of decoded templates, their row scales
+    (check `LocalScoring.row_scales`) and an array of person ids, that answers `identify`
+    in-process. Snapshot matrices are scored in place, without copying them into memory.
+
+    While tracking mutations, persons added or removed through `group.add_person` and
+    `group.remove_person` (and their async twins) are applied to the mirror. Changes performed
+    by other clients of the YouFace API are only picked up by `refresh`. A tracked mutation that
+    cannot be applied (e.g. a template of another size) marks the mirror as `stale` until the
+    next `refresh`.
+    """
+    def __init__(self, group_id: str, backend: LocalScoring = None, track_mutations: bool = True):
+        """Class initializer. The mirror starts empty: use `load`, `load_async` or `refresh`.
+        :param group_id:
+            ID of the mirrored group.
+        :param backend:
+            Local scoring backend used to decode and score templates. Defaults to LocalScoring().
+        :param track_mutations:
+            Apply the group mutations performed through this SDK to the mirror.
+        """
+        self.group_id = group_id
+        self.backend = backend or LocalScoring()
+        self._lock = threading.RLock()
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._ids = np.empty(0, dtype=object)
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+        self.stale = False
+        self._tracking = False
+        if track_mutations:
+            group.add_mutation_listener(self._on_mutation)
+            self._tracking = True
+
+    @classmethod
+    def load(cls, group_id: str, concurrency: int = 10, **kwargs) -> 'GroupMirror':
+        """Create a mirror of a group, fetching the person templates concurrently.
+        :param group_id:
+            ID of the group. `group_id` is created in `group.create`.
+        :param concurrency:
+            Maximum number of concurrent `group.get_person_template` requests.
+        :param kwargs:
+            Extra arguments of the GroupMirror initializer.
+        :return:
+            The loaded mirror.
+        """
+        mirror = cls(group_id, **kwargs)
+        mirror.refresh(concurrency)
+        return mirror
+
+    @classmethod
+    async def load_async(cls, group_id: str, concurrency: int = 10, **kwargs) -> 'GroupMirror':
+        """
+        Create a mirror of a group, fetching the person templates concurrently.
+        Performs the requests asynchronously.
+        :param group_id:
+            ID of the group. `group_id` is created in `group.create`.
+        :param concurrency:
+            Maximum number of concurrent `group.get_person_template_async` requests.
+        :param kwargs:
+            Extra arguments of the GroupMirror initializer.
+        :return:
+            The loaded mirror.
+        """
+        mirror = cls(group_id, **kwargs)
+        await mirror.refresh_async(concurrency)
+        return mirror
+
+    @classmethod
+    def from_snapshot(cls, path: str, group_id: str, dtype='<f4', **kwargs) -> 'GroupMirror':
+        """Create a mirror from a snapshot file (created by `group.export`), memory-mapping its
+        templates instead of requesting them. Float32 templates are scored from the file without
+        being copied into memory.
+        :param path:
+            Path of the snapshot file.
+        :param group_id:
+            ID of the mirrored group.
+        :param dtype:
+            Type of the template values.
+        :param kwargs:
+            Extra arguments of the GroupMirror initializer.
+        :return:
+            The loaded mirror.
+        """
+        mirror = cls(group_id, **kwargs)
+        with Snapshot(path) as snapshot:
+            mirror.replace(snapshot.person_ids, snapshot.templates(dtype))
+        return mirror
+
+    def refresh(self, concurrency: int = 10):
+        """Reload all the persons of the group from the server, bypassing the template cache.
+        :param concurrency:
+            Maximum number of concurrent `group.get_person_template` requests.
+        :return:
+        """
+        def get_person_template(person_id: str) -> str:
+            return group.get_person_template(self.group_id, person_id, use_cache=False)
+
+        person_ids = group.list_ids(self.group_id)
+        templates = bounded_gather(get_person_template, person_ids, concurrency)
+        self.replace(person_ids, self.backend.decode_many(templates))
+
+    async def refresh_async(self, concurrency: int = 10):
+        """
+        Reload all the persons of the group from the server, bypassing the template cache.
+        Performs the requests asynchronously.
+        :param concurrency:
+            Maximum number of concurrent `group.get_person_template_async` requests.
+        :return:
+        """
+        async def get_person_template(person_id: str) -> str:
+            return await group.get_person_template_async(self.group_id, person_id, use_cache=False)
+
+        person_ids = await group.list_ids_async(self.group_id)
+        templates = await bounded_gather_async(get_person_template, person_ids, concurrency)
+        self.replace(person_ids, self.backend.decode_many(templates))
+
+    def replace(self, person_ids: Sequence[str], matrix: 'np.ndarray'):
+        """Replace the content of the mirror.
+        :param person_ids:
+            Person ids, one per row of `matrix`.
+        :param matrix:
+            Decoded templates, one row per person (e.g. a memory-mapped snapshot), used without
+            copying them if they are float32.
+        :return:
+        """
+        if len(person_ids) != len(matrix):
+            raise ValueError("The number of person ids and templates must match.")
+        matrix = np.asarray(matrix, dtype=np.float32)
+        scales = self.backend.row_scales(matrix)
+        with self._lock:
+            self._matrix = matrix
+            self._scales = scales
+            self._ids = np.array(list(person_ids), dtype=object)
+            self._rows = {person_id: row for row, person_id in enumerate(self._ids)}
+            self._size = len(self._ids)
+            self.stale = False
+
+    def add(self, person_id: str, face_template: str):
+        """Add (or replace) a person in the mirror.
+        :param person_id:
+            Person ID.
+        :param face_template:
+            Biometric template of the person.
+        :return:
+        """
+        vector = self.backend.decode(face_template)
+        with self._lock:
+            row = self._rows.get(person_id)
+            if row is None:
+                row = self._size
+                self._reserve(row + 1, vector.shape[0])
+                self._ids[row] = person_id
+                self._rows[person_id] = row
+                self._size += 1
+            elif not self._matrix.flags.writeable:
+                self._matrix = self._matrix.copy()
+            self._matrix[row] = vector
+            self._scales[row] = self.backend.row_scales(vector[np.newaxis])[0]
+
+    def remove(self, person_id: str):
+        """Remove a person from the mirror. The last row is moved into the freed one.
+        :param person_id:
+            Person ID.
+        :return:
+        """
+        with self._lock:
+            row = self._rows.pop(person_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                if not self._matrix.flags.writeable:
+                    self._matrix = self._matrix.copy()
+                self._matrix[row] = self._matrix[last]
+                self._scales[row] = self._scales[last]
+                self._ids[row] = self._ids[last]
+                self._rows[self._ids[row]] = row
+            self._ids[last] = None
+            self._size = last
+
+    def _reserve(self, size: int, template_size: int):
+        """ Grows the matrix geometrically, so that adding persons is amortized O(1). """
+        if self._size and self._matrix.shape[1] != template_size:
+            raise ValueError("Template size does not match the templates of the mirror.")
+        capacity = len(self._matrix) if self._size else 0
+        if size <= capacity and self._matrix.flags.writeable:
+            return
+        capacity = max(size, 2 * capacity, 16)
+        matrix = np.zeros((capacity, template_size), dtype=np.float32)
+        scales = np.ones(capacity, dtype=np.float32)
+        ids = np.empty(capacity, dtype=object)
+        matrix[:self._size] = self._matrix[:self._size]
+        scales[:self._size] = self._scales[:self._size]
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._scales, self._ids = matrix, scales, ids
+
+    def identify(
+            self,
+            face_template: str,
+            minimum_score: float = -1.0,
+            candidate_list_length: int = 1) -> List[Dict]:
+        """Identify an unknown face in the mirrored group.
+        :param face_template:
+            Biometric template of the face to be identified (obtained from `face.process`).
+        :param minimum_score:
+            Minimum matching score for candidates.
+        :param candidate_list_length:
+            Maximum length of the list of resulting candidates.
+        :return:
+            The identified candidates, as returned by `face.identify`: a list of dictionaries with
+            `template_id` and `score`, sorted by descending score.
+        """
+        query = self.backend.decode_many([face_template])
+        with self._lock:
+            size = self._size
+            if not size or candidate_list_length < 1:
+                return []
+            scores = self.backend.score_matrix(
+                query, self._matrix[:size], self._scales[:size]
+            )[0]
+            ids = self._ids[:size].copy()
+
+        count = min(candidate_list_length, size)
+        best = np.argpartition(-scores, count - 1)[:count] if count < size else np.arange(size)
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [
+            {'template_id': ids[row], 'score': float(scores[row])}
+            for row in best
+            if scores[row] >= minimum_score
+        ]
+
+    def _on_mutation(self, event: str, group_id: str, person_id: str, face_template: str):
+        if group_id != self.group_id:
+            return
+        try:
+            if event == 'add_person':
+                self.add(person_id, face_template)
+            elif event == 'remove_person':
+                self.remove(person_id)
+            elif event in ('create', 'delete'):
+                self.replace([], np.empty((0, self._matrix.shape[1]), dtype=np.float32))
+        except Exception:  # pylint: disable=broad-except
+            self.stale = True
+            logger.warning("Could not apply %s of %s to the mirror of group %s, which is stale "
+                           "until refreshed.", event, person_id, group_id, exc_info=True)
+
+    def close(self):
+        """Stop tracking the group mutations performed through this SDK.
+        :return:
+        """
+        if self._tracking:
+            group.remove_mutation_listener(self._on_mutation)
+            self._tracking = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, person_id: str) -> bool:
+        return person_id in self._rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,337 @@
+"""Request policy module of the Python SDK of the YouFace API.
+Retries failed idempotent requests with jittered exponential backoff, capped by a retry budget,
+and optionally hedges read-only requests: when a request takes longer than the observed p95
+latency of its endpoint, a duplicate is sent and the first successful response is used.
+"""
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Optional
+import httpx
+import requests
+from yk_utils.apis import YoonikApiException
+
+IDEMPOTENT_ENDPOINTS = frozenset((
+    'process', 'verify', 'verify_id', 'identify', 'list_ids', 'get_person_template', 'delete',
+    'remove_person',
+))
+READ_ONLY_ENDPOINTS = frozenset((
+    'verify', 'verify_id', 'identify', 'list_ids', 'get_person_template',
+))
+RETRY_STATUS_CODES = frozenset((429, 502, 503, 504))
+_TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout, httpx.TransportError)
+# the hedge thread pool must not bound the requests in flight, nor delay them in its queue, which
+# would count toward the hedge delay; idle threads are reused, so it only grows to the peak
+# number of synchronous hedged requests
+_HEDGE_THREADS = 4096
+
+
+class RetryBudget:
+    """Caps retries (and hedged requests) to a fraction of the requests: every request deposits
+    `ratio` tokens, up to `maximum`, and every retry withdraws one token.
+    """
+    def __init__(self, ratio: float = 0.1, initial: float = 10.0, maximum: float = 100.0):
+        """Class initializer.
+        :param ratio:
+            Tokens deposited per request, i.e. the sustained ratio of retries to requests.
+        :param initial:
+            Tokens available at start, to allow retries before any request succeeded.
+        :param maximum:
+            Maximum number of tokens.
+        """
+        self.ratio = ratio
+        self.maximum = maximum
+        self._tokens = min(initial, maximum)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Account for a request.
+        :return:
+        """
+        with self._lock:
+            self._tokens = min(self.maximum, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take a token for a retry.
+        :return:
+            True if the retry is allowed.
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self) -> float:
+        """Available tokens."""
+        return self._tokens
+
+
+class LatencyTracker:
+    """Rolling window of the latencies of the successful requests of each endpoint."""
+    def __init__(self, window: int = 1000, min_samples: int = 20):
+        """Class initializer.
+        :param window:
+            Number of latencies kept per endpoint.
+        :param min_samples:
+            Number of latencies needed before quantiles are reported.
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float):
+        """Record the latency of a successful request.
+        :param endpoint:
+            Endpoint name.
+        :param latency:
+            Latency in seconds.
+        :return:
+        """
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(latency)
+
+    def quantile(self, endpoint: str, quantile: float) -> Optional[float]:
+        """Get a latency quantile of an endpoint.
+        :param endpoint:
+            Endpoint name.
+        :param quantile:
+            Quantile, between 0 and 1.
+        :return:
+            The latency in seconds, or None if there are not enough samples.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+
+class RetryPolicy:
+    """Retry and hedging policy applied to every request of the `face` and `group` modules
+    (check `transport.set_retry_policy` and the `retry_policy` argument of `YKFaceClient`).
+
+    Requests are retried when they fail with a transport error or one of `retry_status_codes`,
+    and only for `retry_endpoints` (idempotent ones by default: `create` and `add_person` are
+    never retried). With `hedge` enabled, requests to `hedge_endpoints` (read-only ones by
+    default) that take longer than the `hedge_quantile` latency get a duplicate request.
+    Synchronous hedged requests run in a thread pool, which is created on first use and shut
+    down by `close` (or by leaving the policy's `with` block).
+    """
+    def __init__(
+            self,
+            max_attempts: int = 3,
+            backoff: float = 0.05,
+            max_backoff: float = 1.0,
+            budget: RetryBudget = None,
+            retry_status_codes: Iterable[int] = RETRY_STATUS_CODES,
+            retry_endpoints: Iterable[str] = IDEMPOTENT_ENDPOINTS,
+            hedge: bool = False,
+            hedge_endpoints: Iterable[str] = READ_ONLY_ENDPOINTS,
+            hedge_quantile: float = 0.95,
+            min_hedge_delay: float = 0.005,
+            latencies: LatencyTracker = None):
+        # pylint: disable=too-many-arguments
+        """Class initializer.
+        :param max_attempts:
+            Maximum number of attempts of a request, including the first one.
+        :param backoff:
+            Base backoff in seconds. Retry `n` waits a random time up to `backoff * 2 ** (n - 1)`.
+        :param max_backoff:
+            Maximum backoff in seconds.
+        :param budget:
+            RetryBudget shared by retries and hedged requests. Defaults to RetryBudget().
+        :param retry_status_codes:
+            HTTP status codes that are retried.
+        :param retry_endpoints:
+            Names of the endpoints that are retried (check `transport.endpoint_name`).
+        :param hedge:
+            Enable hedged requests.
+        :param hedge_endpoints:
+            Names of the endpoints that are hedged.
+        :param hedge_quantile:
+            Latency quantile after which a hedged request is sent.
+        :param min_hedge_delay:
+            Minimum delay in seconds before a hedged request is sent.
+        :param latencies:
+            LatencyTracker of the endpoints. Defaults to LatencyTracker().
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget or RetryBudget()
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.retry_endpoints = frozenset(retry_endpoints)
+        self.hedge = hedge
+        self.hedge_endpoints = frozenset(hedge_endpoints)
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.latencies = latencies or LatencyTracker()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def is_retryable(self, exception: Exception) -> bool:
+        """Check whether a failed request can be retried.
+        :param exception:
+            Exception raised by the request.
+        :return:
+            True for transport errors and responses with one of `retry_status_codes`.
+        """
+        if isinstance(exception, YoonikApiException):
+            return exception.status_code in self.retry_status_codes
+        return isinstance(exception, _TRANSPORT_ERRORS)
+
+    def backoff_delay(self, retry: int) -> float:
+        """Get the delay before a retry (exponential backoff with full jitter).
+        :param retry:
+            Number of the retry, starting at 1.
+        :return:
+            Delay in seconds.
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (retry - 1)))
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Get the delay after which a request to `endpoint` is hedged.
+        :param endpoint:
+            Endpoint name.
+        :return:
+            Delay in seconds, or None if the request is not hedged.
+        """
+        if not self.hedge or endpoint not in self.hedge_endpoints:
+            return None
+        delay = self.latencies.quantile(endpoint, self.hedge_quantile)
+        return None if delay is None else max(delay, self.min_hedge_delay)
+
+    def _should_retry(self, endpoint: str, attempt: int, exception: Exception) -> bool:
+        return endpoint in self.retry_endpoints and attempt < self.max_attempts and \
+            self.is_retryable(exception) and self.budget.withdraw()
+
+    def call(self, endpoint: str, send: Callable):
+        """Perform a request, applying the policy.
+        :param endpoint:
+            Endpoint name.
+        :param send:
+            Function that performs the request.
+        :return:
+            The response of the request.
+        """
+        self.budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                return self._hedged(endpoint, send)
+            except Exception as exc:  # pylint: disable=broad-except
+                if not self._should_retry(endpoint, attempt, exc):
+                    raise
+            time.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    async def call_async(self, endpoint: str, send: Callable):
+        """Perform an asynchronous request, applying the policy.
+        :param endpoint:
+            Endpoint name.
+        :param send:
+            Function that returns an awaitable performing the request.
+        :return:
+            The response of the request.
+        """
+        self.budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                return await self._hedged_async(endpoint, send)
+            except Exception as exc:  # pylint: disable=broad-except
+                if not self._should_retry(endpoint, attempt, exc):
+                    raise
+            await asyncio.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    def _timed(self, endpoint: str, send: Callable):
+        start = time.perf_counter()
+        response = send()
+        self.latencies.record(endpoint, time.perf_counter() - start)
+        return response
+
+    async def _timed_async(self, endpoint: str, send: Callable):
+        start = time.perf_counter()
+        response = await send()
+        self.latencies.record(endpoint, time.perf_counter() - start)
+        return response
+
+    def close(self):
+        """Shut down the thread pool of the synchronous hedged requests, waiting for the requests
+        still in flight. The policy can still be used afterwards, with a new thread pool.
+        :return:
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=_HEDGE_THREADS, thread_name_prefix='yk_face_hedge'
+                )
+            return self._executor
+
+    def _hedged(self, endpoint: str, send: Callable):
+        delay = self.hedge_delay(endpoint)
+        if delay is None:
+            return self._timed(endpoint, send)
+
+        executor = self._get_executor()
+        futures = [executor.submit(contextvars.copy_context().run, self._timed, endpoint, send)]
+        done, _ = wait(futures, timeout=delay)
+        if not done and self.budget.withdraw():
+            futures.append(
+                executor.submit(contextvars.copy_context().run, self._timed, endpoint, send)
+            )
+        pending, error = set(futures), None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    return future.result()
+        raise error
+
+    async def _hedged_async(self, endpoint: str, send: Callable):
+        delay = self.hedge_delay(endpoint)
+        if delay is None:
+            return await self._timed_async(endpoint, send)
+
+        tasks = {asyncio.ensure_future(self._timed_async(endpoint, send))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.budget.withdraw():
+                tasks.add(asyncio.ensure_future(self._timed_async(endpoint, send)))
+            pending, error = tasks, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,106 @@
+"""Rate limiting module of the Python SDK of the YouFace API.
+Paces the requests of the `face` and `group` modules with token buckets, one global and one
+per endpoint, shared by threads and coroutines.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Tuple, Union
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations in arrival order.
+
+    Each call reserves the next free slot and returns how long the caller must wait for it, so
+    waiting callers are served first come, first served, whether they are threads or coroutines,
+    and bursts are smoothed to `rate` requests per second after the first `burst` requests.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        """Class initializer.
+        :param rate:
+            Sustained rate, in requests per second.
+        :param burst:
+            Number of requests that can be performed at once when the bucket is full.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0.")
+        if burst < 1:
+            raise ValueError("burst must be at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self._interval = 1.0 / rate
+        self._tolerance = burst * self._interval
+        self._theoretical_arrival = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve one request.
+        :return:
+            Time in seconds the caller must wait before performing the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._theoretical_arrival = max(self._theoretical_arrival, now) + self._interval
+            return max(0.0, self._theoretical_arrival - self._tolerance - now)
+
+
+class RateLimiter:
+    """Rate limiter applied to every request of the `face` and `group` modules
+    (check `transport.set_rate_limiter` and the `rate_limiter` argument of `YKFaceClient`).
+
+    A request waits for both the global bucket and the bucket of its endpoint (named as in
+    `transport.endpoint_name`, e.g. 'process' or 'add_person').
+    """
+    def __init__(
+            self,
+            rate: float = None,
+            burst: int = 1,
+            endpoint_rates: Dict[str, Union[float, Tuple[float, int]]] = None):
+        """Class initializer.
+        :param rate:
+            Global rate, in requests per second, or None for no global limit.
+        :param burst:
+            Global burst size.
+        :param endpoint_rates:
+            Mapping of endpoint names to their rate, or to a (rate, burst) tuple.
+        """
+        self.bucket = TokenBucket(rate, burst) if rate is not None else None
+        self.endpoint_buckets: Dict[str, TokenBucket] = {}
+        for endpoint, endpoint_rate in (endpoint_rates or {}).items():
+            if isinstance(endpoint_rate, tuple):
+                self.endpoint_buckets[endpoint] = TokenBucket(*endpoint_rate)
+            else:
+                self.endpoint_buckets[endpoint] = TokenBucket(endpoint_rate)
+
+    def reserve(self, endpoint: str) -> float:
+        """Reserve one request to `endpoint`.
+        :param endpoint:
+            Endpoint name.
+        :return:
+            Time in seconds the caller must wait before performing the request.
+        """
+        delay = self.bucket.reserve() if self.bucket else 0.0
+        endpoint_bucket = self.endpoint_buckets.get(endpoint)
+        if endpoint_bucket is not None:
+            delay = max(delay, endpoint_bucket.reserve())
+        return delay
+
+    def acquire(self, endpoint: str):
+        """Wait, blocking the thread, until a request to `endpoint` can be performed.
+        :param endpoint:
+            Endpoint name.
+        :return:
+        """
+        delay = self.reserve(endpoint)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, endpoint: str):
+        """Wait, without blocking the event loop, until a request to `endpoint` can be performed.
+        :param endpoint:
+            Endpoint name.
+        :return:
+        """
+        delay = self.reserve(endpoint)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,128 @@
+"""Results module of the Python SDK of the YouFace API.
+`FaceEntry` is a compact alternative to the face entry dictionaries returned by `face.process`
+(`face.process(image, as_entries=True)`), for applications that hold many results in memory:
+its fields are stored in slots, the template is kept as bytes instead of a base64 string, and
+the quality metrics and biometric points are kept JSON-encoded and only decoded when accessed.
+"""
+import base64
+import sys
+from typing import Dict, List, Optional
+from yk_face import serialization
+
+_FIELDS = ('biometric_type', 'x', 'y', 'width', 'height')
+
+
+def _encode(value) -> Optional[bytes]:
+    return None if value is None else serialization.dumps(value)
+
+
+def _decode(document: Optional[bytes]):
+    return None if document is None else serialization.loads(document)
+
+
+class FaceEntry:
+    """Face detected by `face.process`. Fields missing from the response are None."""
+    __slots__ = _FIELDS + ('template', '_quality_metrics', '_biometric_points', '_extra')
+
+    def __init__(
+            self,
+            biometric_type: str = None,
+            x: int = None,
+            y: int = None,
+            width: int = None,
+            height: int = None,
+            template: bytes = None,
+            quality_metrics: Dict = None,
+            biometric_points: Dict = None,
+            **extra):
+        # pylint: disable=too-many-arguments,invalid-name
+        """Class initializer.
+        :param biometric_type:
+            Biometric type of the entry, e.g. 'Face'.
+        :param x:
+            Horizontal position of the bounding box.
+        :param y:
+            Vertical position of the bounding box.
+        :param width:
+            Width of the bounding box.
+        :param height:
+            Height of the bounding box.
+        :param template:
+            Biometric template, as bytes.
+        :param quality_metrics:
+            Quality metrics of the face.
+        :param biometric_points:
+            Biometric points of the face.
+        :param extra:
+            Any other field of the face entry.
+        """
+        self.biometric_type = sys.intern(biometric_type) if isinstance(biometric_type, str) \
+            else biometric_type
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.template = template
+        self._quality_metrics = _encode(quality_metrics)
+        self._biometric_points = _encode(biometric_points)
+        self._extra = _encode(extra) if extra else None
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> 'FaceEntry':
+        """Build a FaceEntry from a face entry dictionary.
+        :param entry:
+            Face entry, as returned by `face.process`.
+        :return:
+            The FaceEntry.
+        """
+        entry = dict(entry)
+        template = entry.pop('template', None)
+        return cls(template=None if template is None else base64.b64decode(template), **entry)
+
+    @property
+    def quality_metrics(self) -> Optional[Dict]:
+        """Quality metrics of the face, decoded on every access."""
+        return _decode(self._quality_metrics)
+
+    @property
+    def biometric_points(self) -> Optional[Dict]:
+        """Biometric points of the face, decoded on every access."""
+        return _decode(self._biometric_points)
+
+    @property
+    def template_base64(self) -> Optional[str]:
+        """Biometric template as the base64 string taken by the `face` and `group` functions."""
+        return None if self.template is None else base64.b64encode(self.template).decode('ascii')
+
+    def to_dict(self) -> Dict:
+        """Get the face entry in the form returned by `face.process`.
+        :return:
+            The face entry dictionary, without the missing fields.
+        """
+        entry = {name: getattr(self, name) for name in _FIELDS}
+        entry['template'] = self.template_base64
+        entry['quality_metrics'] = self.quality_metrics
+        entry['biometric_points'] = self.biometric_points
+        entry.update(_decode(self._extra) or {})
+        return {name: value for name, value in entry.items() if value is not None}
+
+    def __eq__(self, other):
+        if not isinstance(other, FaceEntry):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in _FIELDS)
+        return f'FaceEntry({fields})'
+
+
+def face_entries(entries: List[Dict]) -> List[FaceEntry]:
+    """Build the FaceEntry objects of a `face.process` result.
+    :param entries:
+        List of face entry dictionaries.
+    :return:
+        List of FaceEntry.
+    """
+    return [FaceEntry.from_dict(entry) for entry in entries]
@@ -0,0 +1,195 @@
+"""Local scoring module of the Python SDK of the YouFace API.
+Scores biometric templates in-process instead of requesting `face/verify`.
+Requires numpy (`pip install yk_face[numpy]`).
+"""
+import base64
+from typing import Callable, List, Sequence, Tuple
+from yk_face.face import verify_remote
+from yk_face.util import FaceException
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Local scoring requires numpy: pip install yk_face[numpy]")
+
+
+def decode_template(template: str) -> 'np.ndarray':
+    """Decode a biometric template into a vector.
+    :param template:
+        Biometric template (obtained from `face.process`), a base64 string of little-endian
+        float32 values.
+    :return:
+        A float32 vector.
+    """
+    _require_numpy()
+    return np.frombuffer(base64.b64decode(template), dtype='<f4')
+
+
+class LocalScoring:
+    """Scoring backend that computes matching scores in-process.
+
+    The score of two templates is `scale * similarity + offset`, where similarity is the
+    cosine similarity of the decoded vectors (or their dot product if `normalize` is False).
+    Use `validate_backend` to check that the scores match the ones of the server.
+    """
+    def __init__(
+            self,
+            decoder: Callable[[str], 'np.ndarray'] = decode_template,
+            normalize: bool = True,
+            scale: float = 1.0,
+            offset: float = 0.0):
+        """Class initializer.
+        :param decoder:
+            Function that decodes a template string into a vector.
+        :param normalize:
+            Normalize vectors to unit length, so that scores are cosine similarities.
+        :param scale:
+            Multiplier applied to the similarity.
+        :param offset:
+            Value added to the scaled similarity.
+        """
+        _require_numpy()
+        self.decoder = decoder
+        self.normalize = normalize
+        self.scale = scale
+        self.offset = offset
+
+    def decode(self, template: str) -> 'np.ndarray':
+        """Decode a template into a (normalized) float32 vector.
+        :param template:
+            Biometric template.
+        :return:
+            A float32 vector.
+        """
+        return self.decode_many([template])[0]
+
+    def decode_many(self, templates: Sequence[str]) -> 'np.ndarray':
+        """Decode templates into a contiguous (normalized) float32 matrix, one row per template.
+        :param templates:
+            Biometric templates, all of the same length.
+        :return:
+            A float32 matrix of shape (len(templates), template_size).
+        :raises:
+            FaceException if the templates do not have the same length.
+        """
+        vectors = [np.asarray(self.decoder(template), dtype=np.float32) for template in templates]
+        if len({vector.shape for vector in vectors}) > 1:
+            raise FaceException("Templates of different lengths can not be scored together.")
+        return self.prepare(np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32))
+
+    def prepare(self, matrix: 'np.ndarray') -> 'np.ndarray':
+        """Turn a matrix of decoded vectors into the form used for scoring.
+        :param matrix:
+            A float matrix, one row per template.
+        :return:
+            A contiguous float32 matrix, with unit-length rows if `normalize` is set.
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if self.normalize and matrix.size:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+        return matrix
+
+    def row_scales(self, matrix: 'np.ndarray') -> 'np.ndarray':
+        """Compute the factors that scale the rows of a matrix to the form used for scoring, to
+        score a matrix that can not be prepared in place (e.g. a memory-mapped snapshot) without
+        copying it.
+        :param matrix:
+            A float32 matrix, one row per template.
+        :return:
+            A float32 vector with the inverse norm of each row if `normalize` is set, or ones.
+        """
+        if not self.normalize:
+            return np.ones(len(matrix), dtype=np.float32)
+        norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix, dtype=np.float32))
+        return (1 / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+    def score_matrix(
+            self,
+            queries: 'np.ndarray',
+            gallery: 'np.ndarray',
+            gallery_scales: 'np.ndarray' = None) -> 'np.ndarray':
+        """Score prepared vectors against each other.
+        :param queries:
+            Prepared matrix of shape (n, template_size).
+        :param gallery:
+            Prepared matrix of shape (m, template_size), or an unprepared one with its
+            `gallery_scales`.
+        :param gallery_scales:
+            Row scales of `gallery` (check `row_scales`), or None if it is prepared.
+        :return:
+            Matrix of scores of shape (n, m).
+        :raises:
+            FaceException if the queries and the gallery have templates of different lengths.
+        """
+        if gallery.shape[0] == 0:
+            return np.empty((len(queries), 0), dtype=np.float32)
+        if queries.shape[1] != gallery.shape[1]:
+            raise FaceException("Templates of different lengths can not be scored together.")
+        scores = queries @ gallery.T
+        if gallery_scales is not None:
+            scores *= gallery_scales
+        if self.scale != 1.0:
+            scores *= self.scale
+        if self.offset:
+            scores += self.offset
+        return scores
+
+    def verify(self, face_template: str, another_face_template: str) -> float:
+        """Compute the matching score of two templates.
+        :param face_template:
+            Biometric template of one face.
+        :param another_face_template:
+            Biometric template of another face.
+        :return:
+            The matching score.
+        """
+        matrix = self.decode_many([face_template, another_face_template])
+        return float(self.score_matrix(matrix[:1], matrix[1:])[0, 0])
+
+    def verify_many(self, face_template: str, face_templates: Sequence[str]) -> 'np.ndarray':
+        """Compute the matching scores of one template against many templates at once.
+        :param face_template:
+            Biometric template of one face.
+        :param face_templates:
+            Biometric templates to be scored against `face_template`.
+        :return:
+            A float32 vector with one score per template of `face_templates`.
+        :raises:
+            FaceException if the templates do not have the same length.
+        """
+        query = self.decode_many([face_template])
+        return self.score_matrix(query, self.decode_many(face_templates))[0]
+
+
+def validate_backend(
+        backend,
+        template_pairs: Sequence[Tuple[str, str]],
+        tolerance: float = 1e-4) -> float:
+    """Check that a scoring backend produces the same scores as the server (`face/verify`).
+    :param backend:
+        A scoring backend, like LocalScoring.
+    :param template_pairs:
+        Pairs of biometric templates to be scored by both the backend and the server.
+    :param tolerance:
+        Maximum accepted absolute difference between scores.
+    :return:
+        The maximum absolute difference between scores.
+    :raises:
+        FaceException if the difference of any pair is above `tolerance`.
+    """
+    deviations: List[float] = [
+        abs(backend.verify(first, second) - verify_remote(first, second))
+        for first, second in template_pairs
+    ]
+    deviation = max(deviations, default=0.0)
+    if deviation > tolerance:
+        raise FaceException(
+            f"Scoring backend deviates {deviation} from the server (tolerance {tolerance})."
+        )
+    return deviation
@@ -0,0 +1,213 @@
+"""Serialization module of the Python SDK of the YouFace API.
+
+Builds the JSON payloads of the requests. By default they are validated and dumped by the
+`yk_face_api_models` pydantic models. With fast serialization enabled
+(`serialization.set_fast_serialization(True)`), payloads are built as plain dictionaries with
+equivalent validations and encoded once by the transport, using orjson when it is installed
+(`pip install yk_face[fast]`), which also decodes the responses of the encoded requests, with or
+without a `YKFaceClient`.
+"""
+import json
+from typing import Dict, List
+from pydantic import BaseModel
+from yk_face_api_models import ProcessRequest, VerifyRequest, VerifyIdRequest, IdentifyRequest, \
+    Template, ProcessRequestConfig
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+PROCESSINGS = frozenset(('detect', 'analyze', 'templify', 'none'))
+_fast_serialization = False
+
+
+def set_fast_serialization(enabled: bool):
+    """Enable or disable fast serialization.
+    :param enabled:
+        Build payloads without the pydantic models and encode them in a single step.
+    :return:
+    """
+    global _fast_serialization  # pylint: disable=global-statement
+    _fast_serialization = enabled
+
+
+def is_fast_serialization() -> bool:
+    """Check whether fast serialization is enabled.
+    :return:
+        True if fast serialization is enabled.
+    """
+    return _fast_serialization
+
+
+def dumps(payload) -> bytes:
+    """Encode a payload as JSON.
+    :param payload:
+        JSON-serializable object.
+    :return:
+        UTF-8 encoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def loads(document):
+    """Decode a JSON document.
+    :param document:
+        JSON document, as str or bytes.
+    :return:
+        Decoded object.
+    """
+    if orjson is not None:
+        return orjson.loads(document)
+    return json.loads(document)
+
+
+def _check_str(name: str, value):
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string.")
+
+
+def _config(configuration) -> Dict:
+    if isinstance(configuration, BaseModel):
+        return configuration.model_dump(mode='json')
+    return ProcessRequestConfig(**configuration).model_dump(mode='json')
+
+
+def process_request(image: str, processings: List[str], configurations: List) -> Dict:
+    """Build the payload of a process request.
+    :param image:
+        Image as a base64 string.
+    :param processings:
+        List of processings.
+    :param configurations:
+        List of ProcessRequestConfig.
+    :return:
+        The payload.
+    """
+    if not _fast_serialization:
+        return ProcessRequest(
+            image=image,
+            processings=processings,
+            configuration=configurations
+        ).model_dump(mode='json')
+    _check_str('image', image)
+    return {'image': image, **process_options(processings, configurations)}
+
+
+def process_options(processings: List[str], configurations: List) -> Dict:
+    """Build the options of a process request, sent along with the image in binary uploads.
+    :param processings:
+        List of processings.
+    :param configurations:
+        List of ProcessRequestConfig.
+    :return:
+        The 'processings' and 'configuration' of the payload.
+    """
+    if not _fast_serialization:
+        options = process_request('', processings, configurations)
+        del options['image']
+        return options
+    if not PROCESSINGS.issuperset(processings):
+        raise ValueError(f"Processings must be in {sorted(PROCESSINGS)}.")
+    return {
+        'processings': list(dict.fromkeys(processings)),
+        'configuration': [_config(configuration) for configuration in configurations],
+    }
+
+
+def verify_request(face_template: str, another_face_template: str) -> Dict:
+    """Build the payload of a verify request.
+    :param face_template:
+        Biometric template of one face.
+    :param another_face_template:
+        Biometric template of another face.
+    :return:
+        The payload.
+    """
+    if not _fast_serialization:
+        return VerifyRequest(
+            first_template=face_template,
+            second_template=another_face_template
+        ).model_dump(mode='json')
+    _check_str('face_template', face_template)
+    _check_str('another_face_template', another_face_template)
+    return {'first_template': face_template, 'second_template': another_face_template}
+
+
+def verify_id_request(face_template: str, person_id: str, group_id: str) -> Dict:
+    """Build the payload of a verify id request.
+    :param face_template:
+        Biometric template of one face.
+    :param person_id:
+        Person ID.
+    :param group_id:
+        Group ID.
+    :return:
+        The payload.
+    """
+    if not _fast_serialization:
+        return VerifyIdRequest(
+            template=face_template,
+            template_id=person_id,
+            gallery_id=group_id
+        ).model_dump(mode='json')
+    _check_str('face_template', face_template)
+    _check_str('person_id', person_id)
+    if group_id is not None:
+        _check_str('group_id', group_id)
+    return {'template': face_template, 'template_id': person_id, 'gallery_id': group_id}
+
+
+def identify_request(
+        face_template: str,
+        group_id: str,
+        minimum_score: float,
+        candidate_list_length: int) -> Dict:
+    """Build the payload of an identify request.
+    :param face_template:
+        Biometric template of the face to be identified.
+    :param group_id:
+        Group ID.
+    :param minimum_score:
+        Minimum matching score for candidates.
+    :param candidate_list_length:
+        Maximum length of the list of resulting candidates.
+    :return:
+        The payload.
+    """
+    if not _fast_serialization:
+        return IdentifyRequest(
+            template=face_template,
+            candidate_list_length=candidate_list_length,
+            minimum_score=minimum_score,
+            gallery_id=group_id
+        ).model_dump(mode='json')
+    _check_str('face_template', face_template)
+    _check_str('group_id', group_id)
+    if isinstance(candidate_list_length, bool) or not isinstance(candidate_list_length, int) \
+            or candidate_list_length < 1:
+        raise ValueError("candidate_list_length must be an integer greater than 0.")
+    if isinstance(minimum_score, bool) or not isinstance(minimum_score, (int, float)) \
+            or minimum_score < -1:
+        raise ValueError("minimum_score must be a number greater than or equal to -1.")
+    return {
+        'template': face_template,
+        'candidate_list_length': candidate_list_length,
+        'minimum_score': float(minimum_score),
+        'gallery_id': group_id,
+    }
+
+
+def template_request(face_template: str) -> Dict:
+    """Build the payload of an add person request.
+    :param face_template:
+        Biometric template of the person.
+    :return:
+        The payload.
+    """
+    if not _fast_serialization:
+        return Template(template=face_template).model_dump(mode='json')
+    _check_str('face_template', face_template)
+    return {'template': face_template, 'duplicate_check': False}
@@ -0,0 +1,124 @@
+"""Single-flight module of the Python SDK of the YouFace API.
+Coalesces identical requests that are in flight at the same time: the first caller performs the
+request and the others, threads or coroutines, wait for and share its result. Nothing is kept
+once the request completes.
+"""
+import asyncio
+import copy
+import threading
+from typing import Callable, Hashable, Iterable
+
+COALESCED_ENDPOINTS = frozenset(('process', 'verify', 'verify_id', 'identify'))
+
+
+class _Call:
+    """ A synchronous request in flight. """
+    __slots__ = ('event', 'followers', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.followers = 0
+        self.result = None
+        self.error = None
+
+
+class _Flight:
+    """ An asynchronous request in flight. """
+    __slots__ = ('task', 'waiters', 'callers')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.callers = 0
+
+
+class SingleFlight:
+    """Coalescing of identical in-flight requests, applied to the requests of the `face` module
+    (check `transport.set_single_flight` and the `single_flight` argument of `YKFaceClient`).
+
+    When a request is shared, every caller gets its own copy of the result, so callers can
+    modify it freely. Synchronous and asynchronous requests are coalesced separately, and
+    asynchronous requests only with requests of the same event loop.
+    """
+    def __init__(self, endpoints: Iterable[str] = COALESCED_ENDPOINTS):
+        """Class initializer.
+        :param endpoints:
+            Names of the endpoints whose requests are coalesced (check `transport.endpoint_name`).
+        """
+        self.endpoints = frozenset(endpoints)
+        self.coalesced = 0
+        self._calls = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def call(self, key: Hashable, func: Callable):
+        """Perform a request, or wait for the identical request in flight.
+        :param key:
+            Key identifying the request.
+        :param func:
+            Function that performs the request.
+        :return:
+            The response of the request.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        # followers copy the original result, which the leader must not modify
+        return copy.deepcopy(call.result) if call.followers else call.result
+
+    async def call_async(self, key: Hashable, func: Callable):
+        """Perform an asynchronous request, or wait for the identical request in flight.
+        :param key:
+            Key identifying the request.
+        :param func:
+            Function that returns an awaitable performing the request.
+        :return:
+            The response of the request.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(loop.create_task(func()))
+                flight.task.add_done_callback(lambda _: self._discard(key, flight))
+            else:
+                self.coalesced += 1
+            flight.waiters += 1
+            flight.callers += 1
+
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                flight.waiters -= 1
+                if not flight.waiters:
+                    flight.task.cancel()
+            raise
+        return copy.deepcopy(result) if flight.callers > 1 else result
+
+    def _discard(self, key, flight: _Flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
@@ -0,0 +1,210 @@
+"""Group snapshot module of the Python SDK of the YouFace API.
+
+A snapshot file stores the persons of a group in a compact binary layout that can be
+memory-mapped (all integers are little-endian):
+
+    header      64 bytes: magic b'YKGS', version (u16), reserved (u16), person count (u64),
+                template size in bytes (u32), id table size (u64), templates offset (u64)
+    id table    (count + 1) u64 offsets into the UTF-8 encoded ids that follow them
+    templates   at a 64-byte aligned offset, `count` rows of `template size` bytes each, holding
+                the base64-decoded biometric templates
+"""
+import base64
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from typing import Iterator, List, Sequence
+from yk_face.util import FaceException
+
+MAGIC = b'YKGS'
+VERSION = 1
+HEADER_SIZE = 64
+ALIGNMENT = 64
+_HEADER = struct.Struct('<4sHHQIQQ')
+_OFFSET = struct.Struct('<Q')
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class SnapshotWriter:
+    """Writes a snapshot file, accepting the templates in any order.
+    The file is written next to `path` and only moved into place by `close`.
+    """
+    def __init__(self, path: str, person_ids: Sequence[str]):
+        """Class initializer. Writes the id table.
+        :param path:
+            Path of the snapshot file.
+        :param person_ids:
+            Person ids, in the order of the template rows.
+        """
+        self.path = path
+        self.count = len(person_ids)
+        self.template_size = None
+        self._written = 0
+        self._temporary_path = f'{path}.tmp'
+        self._file = open(self._temporary_path, 'wb')  # pylint: disable=consider-using-with
+
+        encoded_ids = [person_id.encode('utf-8') for person_id in person_ids]
+        offsets, position = [], 0
+        for encoded_id in encoded_ids:
+            offsets.append(position)
+            position += len(encoded_id)
+        offsets.append(position)
+        self._id_table_size = _OFFSET.size * len(offsets) + position
+        self._templates_offset = _align(HEADER_SIZE + self._id_table_size)
+
+        self._file.seek(HEADER_SIZE)
+        self._file.write(b''.join(_OFFSET.pack(offset) for offset in offsets))
+        self._file.write(b''.join(encoded_ids))
+
+    def write(self, row: int, face_template: str):
+        """Write the template of the person in position `row` of the id table.
+        :param row:
+            Position of the person in the id table.
+        :param face_template:
+            Biometric template (a base64 string).
+        :return:
+        :raises:
+            FaceException if the template size differs from the previous templates.
+        """
+        data = base64.b64decode(face_template)
+        if self.template_size is None:
+            self.template_size = len(data)
+        elif len(data) != self.template_size:
+            raise FaceException(
+                f"Template of row {row} has {len(data)} bytes, expected {self.template_size}."
+            )
+        self._file.seek(self._templates_offset + row * self.template_size)
+        self._file.write(data)
+        self._written += 1
+
+    def close(self):
+        """Write the header and move the file into place.
+        :return:
+        :raises:
+            FaceException if not every template was written.
+        """
+        if self._written != self.count:
+            self.abort()
+            raise FaceException(f"Only {self._written} of {self.count} templates were written.")
+        template_size = self.template_size or 0
+        self._file.truncate(self._templates_offset + self.count * template_size)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(
+            MAGIC, VERSION, 0, self.count, template_size, self._id_table_size,
+            self._templates_offset
+        ).ljust(HEADER_SIZE, b'\0'))
+        self._file.close()
+        os.replace(self._temporary_path, self.path)
+
+    def abort(self):
+        """Discard the file being written.
+        :return:
+        """
+        self._file.close()
+        if os.path.exists(self._temporary_path):
+            os.remove(self._temporary_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class Snapshot(Mapping):
+    """Read-only, memory-mapped snapshot file.
+    Works as a mapping of person ids to their biometric templates (base64 strings), which are
+    only read from the file when accessed.
+    """
+    def __init__(self, path: str):
+        """Class initializer.
+        :param path:
+            Path of the snapshot file.
+        :raises:
+            FaceException if the file is not a valid snapshot.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < HEADER_SIZE:
+                raise FaceException(f"{path} is not a group snapshot.")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_tables()
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _read_tables(self):
+        magic, version, _, count, template_size, id_table_size, templates_offset = \
+            _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise FaceException(f"{self.path} is not a group snapshot.")
+        if version != VERSION:
+            raise FaceException(f"Unsupported group snapshot version {version}.")
+        self.count = count
+        self.template_size = template_size
+        self.templates_offset = templates_offset
+
+        ids_offset = HEADER_SIZE + _OFFSET.size * (count + 1)
+        offsets = struct.unpack_from(f'<{count + 1}Q', self._mmap, HEADER_SIZE)
+        if ids_offset + offsets[-1] != HEADER_SIZE + id_table_size:
+            raise FaceException(f"{self.path} has a corrupted id table.")
+        self.person_ids: List[str] = [
+            self._mmap[ids_offset + start:ids_offset + end].decode('utf-8')
+            for start, end in zip(offsets, offsets[1:])
+        ]
+        self._rows = {person_id: row for row, person_id in enumerate(self.person_ids)}
+
+    def template_bytes(self, row: int) -> bytes:
+        """Get the raw (base64-decoded) template of a row.
+        :param row:
+            Row of the template.
+        :return:
+            Template bytes.
+        """
+        start = self.templates_offset + row * self.template_size
+        return self._mmap[start:start + self.template_size]
+
+    def templates(self, dtype='u1'):
+        """Memory-map the template rows as a numpy matrix, without reading them.
+        :param dtype:
+            Type of the template values (e.g. '<f4' for float32 templates).
+        :return:
+            A read-only numpy memmap of shape (count, template_size / dtype size).
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        dtype = np.dtype(dtype)
+        if not self.count:
+            return np.empty((0, self.template_size // dtype.itemsize), dtype=dtype)
+        return np.memmap(
+            self.path, dtype=dtype, mode='r', offset=self.templates_offset,
+            shape=(self.count, self.template_size // dtype.itemsize)
+        )
+
+    def __getitem__(self, person_id: str) -> str:
+        return base64.b64encode(self.template_bytes(self._rows[person_id])).decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.person_ids)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        """Unmap the file.
+        :return:
+        """
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
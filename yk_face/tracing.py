@@ -0,0 +1,122 @@
+"""Tracing module of the Python SDK of the YouFace API.
+With a tracer set (`transport.set_tracer` or the `tracer` argument of `YKFaceClient`), every
+call of the `face` and `group` functions opens a span, with child spans for the functions it
+calls and for the stages of its requests: 'yk_face.parse_image', 'yk_face.serialize',
+'yk_face.compress', 'yk_face.http' (one per attempt) and 'yk_face.decode'.
+
+Any tracer with the `start_as_current_span(name, attributes=...)` method of the OpenTelemetry
+Tracer API can be used, e.g. `opentelemetry.trace.get_tracer('yk_face')`. `RecordingTracer` is a
+dependency-free tracer that keeps the spans in memory.
+"""
+import contextlib
+import functools
+import inspect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from yk_face import transport
+
+
+class Span:
+    """A span recorded by RecordingTracer."""
+    __slots__ = ('name', 'attributes', 'parent', 'start', 'end', 'error')
+
+    def __init__(self, name: str, attributes: Optional[Dict], parent: Optional['Span']):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Duration of the span in seconds, or None if it has not ended."""
+        return None if self.end is None else self.end - self.start
+
+    def set_attribute(self, key: str, value):
+        """Set an attribute of the span.
+        :param key:
+            Attribute name.
+        :param value:
+            Attribute value.
+        :return:
+        """
+        self.attributes[key] = value
+
+    def __repr__(self):
+        return f'Span({self.name!r}, parent={self.parent.name if self.parent else None!r})'
+
+
+class RecordingTracer:
+    """Tracer that records the spans in memory, for tests and debugging."""
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._current = ContextVar(f'yk_face_span_{id(self)}', default=None)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def start_as_current_span(self, name: str, attributes: Dict = None):
+        """Start a span, child of the current span, and make it the current span.
+        :param name:
+            Span name.
+        :param attributes:
+            Span attributes.
+        :return:
+            The span.
+        """
+        span = Span(name, attributes, self._current.get())
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = exc
+            raise
+        finally:
+            span.end = time.perf_counter()
+            self._current.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def children(self, span: Optional[Span]) -> List[Span]:
+        """Get the recorded children of a span, in start order.
+        :param span:
+            A span, or None for the root spans.
+        :return:
+            The child spans.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        return sorted((child for child in spans if child.parent is span),
+                      key=lambda child: child.start)
+
+
+def traced(func):
+    """Decorate a `face` or `group` function so that each call opens a span named after it,
+    e.g. 'yk_face.face.process'.
+    :param func:
+        A function or coroutine function.
+    :return:
+        The decorated function.
+    """
+    name = f"{func.__module__}.{func.__name__}"
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            tracer = transport.get_tracer(transport.current_client())
+            if tracer is None:
+                return await func(*args, **kwargs)
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tracer = transport.get_tracer(transport.current_client())
+        if tracer is None:
+            return func(*args, **kwargs)
+        with tracer.start_as_current_span(name):
+            return func(*args, **kwargs)
+    return wrapper
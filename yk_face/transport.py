@@ -0,0 +1,561 @@
+"""Transport module of the Python SDK of the YouFace API.
+Every request of the `face` and `group` modules goes through this module, which sends it
+through the active `YKFaceClient` or, when there is none, through `yk_utils.apis`.
+"""
+import contextlib
+import hashlib
+import time
+from contextvars import ContextVar
+from typing import Optional, Tuple
+import httpx
+import requests
+import yk_utils.apis
+from yk_face import serialization
+
+_active_client = ContextVar('yk_face_client', default=None)
+_active_tracker = ContextVar('yk_face_request_tracker', default=None)
+_default_client = None
+_retry_policy = None
+_rate_limiter = None
+_concurrency_limiter = None
+_single_flight = None
+_metrics = None
+_tracer = None
+_compression = None
+_binary_upload = None
+
+JSON_CONTENT_TYPE = 'application/json'
+# timeout of the asynchronous requests performed without a client, as in `yk_utils.apis`
+_ASYNC_TIMEOUT = 10
+
+_GALLERY_ENDPOINTS = {
+    # (method, has person id): endpoint name
+    ('POST', False): 'create',
+    ('DELETE', False): 'delete',
+    ('GET', False): 'list_ids',
+    ('POST', True): 'add_person',
+    ('GET', True): 'get_person_template',
+    ('DELETE', True): 'remove_person',
+}
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """Get the name of the endpoint of a request, as used by the request policies.
+    :param method:
+        HTTP method.
+    :param url:
+        URL relative to the base URL, e.g. 'face/verify' or 'gallery/{group_id}/{person_id}'.
+    :return:
+        The name of the `face` or `group` function of the endpoint, e.g. 'verify' or
+        'add_person', or the URL itself for unknown endpoints.
+    """
+    if url.startswith('face/'):
+        return url[5:]
+    if url.startswith('gallery/'):
+        name = _GALLERY_ENDPOINTS.get((method, url.count('/') > 1))
+        if name:
+            return name
+    return url
+
+
+def set_retry_policy(policy):
+    """Set the retry and hedging policy of the requests performed without a client, or through a
+    client without its own policy.
+    :param policy:
+        A `policy.RetryPolicy`, or None to disable retries.
+    :return:
+    """
+    global _retry_policy  # pylint: disable=global-statement
+    _retry_policy = policy
+
+
+def get_retry_policy(client=None):
+    """Get the retry and hedging policy applied to the requests of a client.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        The `policy.RetryPolicy` of the client, or the one set with `transport.set_retry_policy`.
+    """
+    return getattr(client, 'retry_policy', None) or _retry_policy
+
+
+def set_rate_limiter(limiter):
+    """Set the rate limiter of the requests performed without a client, or through a client
+    without its own rate limiter.
+    :param limiter:
+        A `ratelimit.RateLimiter`, or None to disable rate limiting.
+    :return:
+    """
+    global _rate_limiter  # pylint: disable=global-statement
+    _rate_limiter = limiter
+
+
+def get_rate_limiter(client=None):
+    """Get the rate limiter applied to the requests of a client.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        The `ratelimit.RateLimiter` of the client, or the one set with
+        `transport.set_rate_limiter`.
+    """
+    return getattr(client, 'rate_limiter', None) or _rate_limiter
+
+
+def set_concurrency_limiter(limiter):
+    """Set the concurrency limiter of the asynchronous requests performed without a client, or
+    through a client without its own concurrency limiter.
+    :param limiter:
+        A `concurrency.AdaptiveConcurrencyLimiter`, or None to disable it.
+    :return:
+    """
+    global _concurrency_limiter  # pylint: disable=global-statement
+    _concurrency_limiter = limiter
+
+
+def get_concurrency_limiter(client=None):
+    """Get the concurrency limiter applied to the asynchronous requests of a client.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        The `concurrency.AdaptiveConcurrencyLimiter` of the client, or the one set with
+        `transport.set_concurrency_limiter`.
+    """
+    return getattr(client, 'concurrency_limiter', None) or _concurrency_limiter
+
+
+def set_single_flight(single_flight):
+    """Set the coalescing of identical in-flight requests performed without a client, or through
+    a client without its own.
+    :param single_flight:
+        A `singleflight.SingleFlight`, or None to disable coalescing.
+    :return:
+    """
+    global _single_flight  # pylint: disable=global-statement
+    _single_flight = single_flight
+
+
+def get_single_flight(client=None):
+    """Get the coalescing of identical in-flight requests applied to the requests of a client.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        The `singleflight.SingleFlight` of the client, or the one set with
+        `transport.set_single_flight`.
+    """
+    return getattr(client, 'single_flight', None) or _single_flight
+
+
+def set_metrics(collector):
+    """Set the metrics collector of the requests performed without a client, or through a client
+    without its own collector.
+    :param collector:
+        A `metrics.MetricsCollector`, or None to disable metrics.
+    :return:
+    """
+    global _metrics  # pylint: disable=global-statement
+    _metrics = collector
+
+
+def get_metrics(client=None):
+    """Get the metrics collector of the requests of a client.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        The `metrics.MetricsCollector` of the client, or the one set with `transport.set_metrics`.
+    """
+    return getattr(client, 'metrics', None) or _metrics
+
+
+def set_tracer(tracer):
+    """Set the tracer of the requests performed without a client, or through a client without
+    its own tracer (check the `tracing` module).
+    :param tracer:
+        An OpenTelemetry-compatible tracer, or None to disable tracing.
+    :return:
+    """
+    global _tracer  # pylint: disable=global-statement
+    _tracer = tracer
+
+
+def get_tracer(client=None):
+    """Get the tracer of the requests of a client.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        The tracer of the client, or the one set with `transport.set_tracer`.
+    """
+    return getattr(client, 'tracer', None) or _tracer
+
+
+def set_compression(compression):
+    """Set the request body compression of the requests performed without a client, or through a
+    client without its own compression.
+    :param compression:
+        A `compression.RequestCompression`, or None to send the bodies uncompressed.
+    :return:
+    """
+    global _compression  # pylint: disable=global-statement
+    _compression = compression
+
+
+def get_compression(client=None):
+    """Get the request body compression of the requests of a client.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        The `compression.RequestCompression` of the client, or the one set with
+        `transport.set_compression`.
+    """
+    return getattr(client, 'compression', None) or _compression
+
+
+def set_binary_upload(binary_upload):
+    """Set the binary upload of the images of the requests performed without a client, or through
+    a client without its own binary upload.
+    :param binary_upload:
+        An `upload.BinaryUpload`, or None to send the images as base64 strings.
+    :return:
+    """
+    global _binary_upload  # pylint: disable=global-statement
+    _binary_upload = binary_upload
+
+
+def get_binary_upload(client=None):
+    """Get the binary upload of the images of the requests of a client.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        The `upload.BinaryUpload` of the client, or the one set with
+        `transport.set_binary_upload`.
+    """
+    return getattr(client, 'binary_upload', None) or _binary_upload
+
+
+def set_default_client(client):
+    """Set the client used by requests performed outside of `use_client`.
+    :param client:
+        A `YKFaceClient`, or None to use the `yk_utils.apis` module functions.
+    :return:
+    """
+    global _default_client  # pylint: disable=global-statement
+    _default_client = client
+
+
+def current_client():
+    """Get the client used by requests performed in the current context.
+    :return:
+        The active `YKFaceClient` or None if requests are sent through `yk_utils.apis`.
+    """
+    return _active_client.get() or _default_client
+
+
+def server_identity(client=None) -> Tuple[Optional[str], Optional[bytes]]:
+    """Identify the server and the subscription the requests of a client are sent to. Caches of
+    server results are keyed by it, so that clients of different servers or API keys do not
+    share results.
+    :param client:
+        A `YKFaceClient`, or None for the requests performed without a client.
+    :return:
+        (base URL, SHA-256 digest of the subscription key) tuple.
+    """
+    base_url = getattr(client, 'base_url', None) or yk_utils.apis.BaseUrl.get()
+    key = getattr(client, 'key', None) or yk_utils.apis.Key.get()
+    return base_url, None if key is None else hashlib.sha256(key.encode()).digest()
+
+
+@contextlib.contextmanager
+def use_client(client):
+    """Perform the requests of the current context (thread or task) through `client`.
+    :param client:
+        A `YKFaceClient`.
+    :return:
+    """
+    token = _active_client.set(client)
+    try:
+        yield client
+    finally:
+        _active_client.reset(token)
+
+
+def _encode(data, json: dict, headers: dict, force: bool = False):
+    """ With fast serialization, or when `force` is set, encodes the JSON payload once, here,
+        instead of in the HTTP library. """
+    if json is None or not (force or serialization.is_fast_serialization()):
+        return data, json, headers
+    headers = dict(headers or {})
+    headers.setdefault('Content-Type', 'application/json')
+    with stage('serialize'):
+        return serialization.dumps(json), None, headers
+
+
+def _compress(compression, data, headers: dict) -> Optional[tuple]:
+    """ Compresses the body once, for all the attempts of the request. """
+    if compression is None:
+        return None
+    with stage('compress'):
+        return compression.encode(data, headers)
+
+
+def _flight_key(client, method: str, url: str, data, json: dict, headers: dict, params) -> tuple:
+    # pylint: disable=too-many-arguments
+    """ Requests are identical when they are sent through the same client with the same
+        payload and headers (binary uploads send the process options in a header). """
+    body = data if isinstance(data, (bytes, bytearray)) else serialization.dumps(json)
+    return client, method, url, repr(params), repr(sorted((headers or {}).items())), \
+        hashlib.sha256(body).digest()
+
+
+def _payload_size(data) -> Optional[int]:
+    return len(data) if isinstance(data, (bytes, bytearray)) else None
+
+
+@contextlib.contextmanager
+def stage(name: str, attributes: dict = None):
+    """Measure a client-side stage of a request (e.g. 'parse_image' or 'serialize') with the
+    metrics collector of the current client, and trace it as a 'yk_face.<name>' span with its
+    tracer, if any.
+    :param name:
+        Stage name.
+    :param attributes:
+        Span attributes.
+    :return:
+    """
+    client = current_client()
+    collector = get_metrics(client)
+    tracer = get_tracer(client)
+    if collector is None and tracer is None:
+        yield
+        return
+    with tracer.start_as_current_span(f'yk_face.{name}', attributes=attributes) \
+            if tracer is not None else contextlib.nullcontext():
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if collector is not None:
+                collector.observe_stage(name, time.perf_counter() - start)
+
+
+def _span_attributes(method: str, endpoint: str) -> dict:
+    return {'http.request.method': method, 'yk_face.endpoint': endpoint}
+
+
+def record_response_size(size: int):
+    """Record the size of the response of the request being performed, for its metrics.
+    Called by the clients that know it.
+    :param size:
+        Size of the response payload, in bytes.
+    :return:
+    """
+    tracker = _active_tracker.get()
+    if tracker is not None:
+        tracker.response_bytes = size
+
+
+def _api_headers(method: str, headers: dict) -> dict:
+    """ Default Content-Type and subscription key of the requests performed without a client. """
+    headers = dict(headers or {})
+    if 'Content-Type' not in headers and method != 'GET':
+        headers['Content-Type'] = JSON_CONTENT_TYPE
+    api_key = yk_utils.apis.Key.get()
+    if api_key:
+        headers['x-api-key'] = api_key
+    return headers
+
+
+def _api_response(status_code: int, content_type: str, content: bytes, text: str):
+    """ Result of a request performed without a client, as returned by `yk_utils.apis`, with the
+        JSON responses decoded by `serialization.loads`. """
+    record_response_size(len(content))
+    if not 200 <= status_code < 300:
+        raise yk_utils.apis.YoonikApiException(status_code, text)
+    if status_code == 204:
+        return None
+    if JSON_CONTENT_TYPE in content_type:
+        with stage('decode'):
+            return serialization.loads(content) if content else {}
+    return text
+
+
+def _request_encoded(method: str, url: str, data: bytes, headers: dict = None, params=None):
+    """ Sends an encoded body without a client. `yk_utils.apis` is not used, so that the response
+        is decoded by `serialization.loads`. """
+    response = requests.request(
+        method,
+        yk_utils.apis.BaseUrl.get() + url,
+        params=params,
+        data=data,
+        headers=_api_headers(method, headers)
+    )
+    return _api_response(
+        response.status_code, response.headers.get('Content-Type', ''), response.content,
+        response.text
+    )
+
+
+async def _request_encoded_async(
+        method: str,
+        url: str,
+        data: bytes,
+        headers: dict = None,
+        params=None):
+    """ Sends an encoded body without a client, asynchronously. `yk_utils.apis` is not used, as
+        it passes the body as `data`, which httpx deprecates for raw bytes, and so that the
+        response is decoded by `serialization.loads`. """
+    async with httpx.AsyncClient(timeout=_ASYNC_TIMEOUT) as async_client:
+        response = await async_client.request(
+            method,
+            yk_utils.apis.BaseUrl.get() + url,
+            params=params,
+            content=data,
+            headers=_api_headers(method, headers)
+        )
+    return _api_response(
+        response.status_code, response.headers.get('Content-Type', ''), response.content,
+        response.text
+    )
+
+
+def request(method: str, url: str, data=None, json: dict = None, headers: dict = None, params=None):
+    # pylint: disable=too-many-arguments
+    """ Universal interface for request."""
+    client = current_client()
+    collector = get_metrics(client)
+    compression = get_compression(client)
+    data, json, headers = _encode(
+        data, json, headers, force=collector is not None or compression is not None
+    )
+    compressed = _compress(compression, data, headers)
+    endpoint = endpoint_name(method, url)
+    limiter = get_rate_limiter(client)
+    tracker = None
+
+    def send():
+        if limiter is not None:
+            limiter.acquire(endpoint)
+        if tracker is not None:
+            tracker.attempts += 1
+        with stage('http', _span_attributes(method, endpoint)):
+            if compressed is None:
+                return post(data, headers)
+            return compression.call(lambda: post(*compressed), lambda: post(data, headers))
+
+    def post(body, body_headers: dict):
+        if client is None:
+            if isinstance(body, (bytes, bytearray)):
+                return _request_encoded(
+                    method, url, data=body, headers=body_headers, params=params
+                )
+            return yk_utils.apis.request(
+                method, url, data=body, json=json, headers=body_headers, params=params
+            )
+        return client.request(
+            method, url, data=body, json=json, headers=body_headers, params=params
+        )
+
+    policy = get_retry_policy(client)
+
+    def call():
+        nonlocal tracker
+        if collector is not None:
+            tracker = collector.track(endpoint, _payload_size(data))
+            token = _active_tracker.set(tracker)
+        try:
+            response = send() if policy is None else policy.call(endpoint, send)
+        except BaseException as exc:
+            if tracker is not None:
+                tracker.finish(exc)
+            raise
+        finally:
+            if tracker is not None:
+                _active_tracker.reset(token)
+        if tracker is not None:
+            tracker.finish()
+        return response
+
+    single_flight = get_single_flight(client)
+    if single_flight is None or endpoint not in single_flight.endpoints:
+        return call()
+    return single_flight.call(_flight_key(client, method, url, data, json, headers, params), call)
+
+
+async def request_async(
+        method: str,
+        url: str,
+        data=None,
+        json: dict = None,
+        headers: dict = None,
+        params=None):
+    # pylint: disable=too-many-arguments
+    """ Universal interface for asynchronous request."""
+    client = current_client()
+    collector = get_metrics(client)
+    compression = get_compression(client)
+    data, json, headers = _encode(
+        data, json, headers, force=collector is not None or compression is not None
+    )
+    compressed = _compress(compression, data, headers)
+    endpoint = endpoint_name(method, url)
+    limiter = get_rate_limiter(client)
+    concurrency_limiter = get_concurrency_limiter(client)
+    tracker = None
+
+    async def post(body, body_headers: dict):
+        if client is None:
+            if isinstance(body, (bytes, bytearray)):
+                return await _request_encoded_async(
+                    method, url, data=body, headers=body_headers, params=params
+                )
+            return await yk_utils.apis.request_async(
+                method, url, data=body, json=json, headers=body_headers, params=params
+            )
+        return await client.request_async(
+            method, url, data=body, json=json, headers=body_headers, params=params
+        )
+
+    async def perform():
+        if tracker is not None:
+            tracker.attempts += 1
+        with stage('http', _span_attributes(method, endpoint)):
+            if compressed is None:
+                return await post(data, headers)
+            return await compression.call_async(
+                lambda: post(*compressed), lambda: post(data, headers)
+            )
+
+    async def send():
+        if limiter is not None:
+            await limiter.acquire_async(endpoint)
+        if concurrency_limiter is not None:
+            return await concurrency_limiter.call(perform)
+        return await perform()
+
+    policy = get_retry_policy(client)
+
+    async def call():
+        nonlocal tracker
+        if collector is not None:
+            tracker = collector.track(endpoint, _payload_size(data))
+            token = _active_tracker.set(tracker)
+        try:
+            if policy is None:
+                response = await send()
+            else:
+                response = await policy.call_async(endpoint, send)
+        except BaseException as exc:
+            if tracker is not None:
+                tracker.finish(exc)
+            raise
+        finally:
+            if tracker is not None:
+                _active_tracker.reset(token)
+        if tracker is not None:
+            tracker.finish()
+        return response
+
+    single_flight = get_single_flight(client)
+    if single_flight is None or endpoint not in single_flight.endpoints:
+        return await call()
+    return await single_flight.call_async(
+        _flight_key(client, method, url, data, json, headers, params), call
+    )
@@ -0,0 +1,72 @@
+"""Binary upload module of the Python SDK of the YouFace API.
+Sends the images of `face.process` as raw bytes instead of base64 strings in the JSON payload,
+which are a third larger and have to be encoded by the client and decoded by the server.
+
+Upload formats:
+    'multipart'    - multipart/form-data body with an 'options' part, the JSON object of the
+                     'processings' and 'configuration' of the request, and an 'image' part.
+    'octet-stream' - application/octet-stream body with the image, and the options as a JSON
+                     object in the X-Process-Options header.
+
+Servers that do not support binary uploads answer them with 400, 405, 415 or 422. Until a
+binary upload succeeds, such an error causes the request to be sent again in the JSON form, and
+if that succeeds, the images are sent in the JSON form from then on (check
+`util.ServerCapability`).
+"""
+import hashlib
+from typing import Dict, Tuple
+from yk_face import serialization
+from yk_face.util import ServerCapability
+
+UPLOAD_FORMATS = ('multipart', 'octet-stream')
+OPTIONS_HEADER = 'X-Process-Options'
+
+
+class BinaryUpload(ServerCapability):
+    """Binary upload of the images sent to one YouFace API, which remembers whether the server
+    accepts them (check `transport.set_binary_upload` and the `binary_upload` argument of
+    `YKFaceClient`).
+    """
+    rejection_status_codes = frozenset((400, 405, 415, 422))
+
+    def __init__(self, upload_format: str = 'multipart'):
+        """Class initializer.
+        :param upload_format:
+            'multipart' or 'octet-stream'.
+        """
+        if upload_format not in UPLOAD_FORMATS:
+            raise ValueError("upload_format must be 'multipart' or 'octet-stream'.")
+        super().__init__()
+        self.upload_format = upload_format
+
+    def encode(self, image, options: Dict) -> Tuple[bytes, dict]:
+        """Build the body and headers of a binary process request.
+        :param image:
+            Encoded image, as a bytes-like object.
+        :param options:
+            Process options: the 'processings' and 'configuration' of the request.
+        :return:
+            (body, headers) tuple.
+        """
+        options = serialization.dumps(options)
+        if self.upload_format == 'octet-stream':
+            return bytes(image), {
+                'Content-Type': 'application/octet-stream',
+                OPTIONS_HEADER: options.decode('utf-8'),
+            }
+        # deterministic, so that identical uploads can be coalesced (check `singleflight`)
+        digest = hashlib.sha256(options)
+        digest.update(image)
+        boundary = digest.hexdigest()[:32]
+        body = b''.join((
+            f'--{boundary}\r\n'
+            'Content-Disposition: form-data; name="options"\r\n'
+            'Content-Type: application/json\r\n\r\n'.encode(),
+            options,
+            f'\r\n--{boundary}\r\n'
+            'Content-Disposition: form-data; name="image"; filename="image"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n'.encode(),
+            image,
+            f'\r\n--{boundary}--\r\n'.encode(),
+        ))
+        return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
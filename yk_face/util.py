@@ -1,5 +1,10 @@
 """ Utilities for the Python SDK of the YouFace API.
 """
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, List, Optional, \
+    Tuple
 import yk_utils.apis
 
 
@@ -26,6 +31,67 @@ class FaceException(Exception):
     pass
 
 
+class ServerCapability:
+    """Optional request format that the server may not support, e.g. compressed request bodies.
+    Until a request in that format succeeds, a response with one of `rejection_status_codes` causes
+    the request to be sent again in the standard format, and if that succeeds, the format is not
+    used anymore.
+    """
+    rejection_status_codes = frozenset((400, 415))
+
+    def __init__(self):
+        self.accepted: Optional[bool] = None
+
+    def _is_rejection(self, exception: yk_utils.apis.YoonikApiException) -> bool:
+        return not self.accepted and exception.status_code in self.rejection_status_codes
+
+    def call(self, send: Callable[[], Any], fallback: Callable[[], Any]):
+        """Perform a request in the optional format, falling back to the standard format if the
+        server rejects it.
+        :param send:
+            Function that performs the request in the optional format.
+        :param fallback:
+            Function that performs the request in the standard format.
+        :return:
+            The response of the request.
+        """
+        if self.accepted is False:
+            return fallback()
+        try:
+            response = send()
+        except yk_utils.apis.YoonikApiException as exc:
+            if not self._is_rejection(exc):
+                raise
+            response = fallback()
+            self.accepted = False
+            return response
+        self.accepted = True
+        return response
+
+    async def call_async(self, send: Callable[[], Awaitable], fallback: Callable[[], Awaitable]):
+        """Perform an asynchronous request in the optional format, falling back to the standard
+        format if the server rejects it.
+        :param send:
+            Function that returns an awaitable performing the request in the optional format.
+        :param fallback:
+            Function that returns an awaitable performing the request in the standard format.
+        :return:
+            The response of the request.
+        """
+        if self.accepted is False:
+            return await fallback()
+        try:
+            response = await send()
+        except yk_utils.apis.YoonikApiException as exc:
+            if not self._is_rejection(exc):
+                raise
+            response = await fallback()
+            self.accepted = False
+            return response
+        self.accepted = True
+        return response
+
+
 def face_process_validation(face_process: list) -> str:
     """
         Checks if the face process returned object has indeed an object (i.e it has a detected face)
@@ -41,3 +107,198 @@ def face_process_validation(face_process: list) -> str:
     if len(face_process) > 1:
         return "multiple faces detected"
     return ""
+
+
+async def _iterate(items) -> AsyncIterator:
+    """ Iterates over an iterable or an async iterable. """
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def bounded_as_completed_async(
+        func: Callable[[Any], Awaitable],
+        items,
+        concurrency: int
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+        Applies the coroutine function `func` to every item, keeping at most `concurrency` calls
+        in flight. Items are consumed lazily, only when a slot is free, and a slot is only freed
+        once its result has been consumed, so memory stays bounded by `concurrency`.
+    :param func:
+        Coroutine function to be called with each item.
+    :param items:
+        An iterable or an async iterable of items.
+    :param concurrency:
+        Maximum number of calls in flight.
+    :return:
+        Async iterator of (index, result_or_exception) tuples, in completion order.
+    :raises:
+        ValueError if concurrency is lower than 1.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1.")
+
+    semaphore = asyncio.BoundedSemaphore(concurrency)
+    completed = asyncio.Queue()
+    pending = set()
+    feed_done = object()
+
+    async def run(index: int, item):
+        try:
+            result = await func(item)
+        except Exception as exc:  # pylint: disable=broad-except
+            result = exc
+        completed.put_nowait((index, result))
+
+    async def feed():
+        count = 0
+        iterator = _iterate(items)
+        try:
+            while True:
+                # the slot is taken before the item is pulled, so no more than `concurrency`
+                # items are held at any time
+                await semaphore.acquire()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    semaphore.release()
+                    break
+                task = asyncio.ensure_future(run(count, item))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                count += 1
+        except Exception as exc:  # pylint: disable=broad-except
+            completed.put_nowait((feed_done, exc))
+        else:
+            completed.put_nowait((feed_done, count))
+        finally:
+            await iterator.aclose()
+
+    feeder = asyncio.ensure_future(feed())
+    total, yielded = None, 0
+    try:
+        while total is None or yielded < total:
+            index, result = await completed.get()
+            if index is feed_done:
+                if isinstance(result, Exception):
+                    raise result
+                total = result
+                continue
+            semaphore.release()
+            yielded += 1
+            yield index, result
+    finally:
+        tasks = [feeder, *pending]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def bounded_gather_async(func: Callable[[Any], Awaitable], items, concurrency: int) -> List:
+    """
+        Applies the coroutine function `func` to every item, keeping at most `concurrency` calls
+        in flight (check `bounded_as_completed_async`).
+        Performs the calls asynchronously.
+    :param func:
+        Coroutine function to be called with each item.
+    :param items:
+        An iterable or an async iterable of items.
+    :param concurrency:
+        Maximum number of calls in flight.
+    :return:
+        List of results, in the order of `items`.
+    :raises:
+        The first exception raised by `func`. The calls still in flight are cancelled.
+    """
+    results = {}
+    completed = bounded_as_completed_async(func, items, concurrency)
+    try:
+        async for index, result in completed:
+            if isinstance(result, Exception):
+                raise result
+            results[index] = result
+    finally:
+        await completed.aclose()
+    return [results[index] for index in range(len(results))]
+
+
+def bounded_as_completed(
+        func: Callable[[Any], Any],
+        items: Iterable,
+        concurrency: int
+) -> Iterator[Tuple[int, Any]]:
+    """
+        Applies `func` to every item in a pool of `concurrency` threads. Items are consumed
+        lazily, only when a thread is free. Each call runs in a copy of the caller context, so
+        the active client (`transport.use_client`) is kept.
+    :param func:
+        Function to be called with each item.
+    :param items:
+        An iterable of items.
+    :param concurrency:
+        Maximum number of calls in flight.
+    :return:
+        Iterator of (index, result_or_exception) tuples, in completion order.
+    :raises:
+        ValueError if concurrency is lower than 1.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1.")
+
+    items = enumerate(items)
+    pending = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit_next():
+            entry = next(items, None)
+            if entry is not None:
+                index, item = entry
+                context = contextvars.copy_context()
+                pending[executor.submit(context.run, func, item)] = index
+
+        try:
+            for _ in range(concurrency):
+                submit_next()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as exc:  # pylint: disable=broad-except
+                        result = exc
+                    yield index, result
+                    submit_next()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def bounded_gather(func: Callable[[Any], Any], items: Iterable, concurrency: int) -> List:
+    """
+        Applies `func` to every item in a pool of `concurrency` threads
+        (check `bounded_as_completed`).
+    :param func:
+        Function to be called with each item.
+    :param items:
+        An iterable of items.
+    :param concurrency:
+        Maximum number of calls in flight.
+    :return:
+        List of results, in the order of `items`.
+    :raises:
+        The first exception raised by `func`. The calls not yet started are cancelled.
+    """
+    results = {}
+    completed = bounded_as_completed(func, items, concurrency)
+    try:
+        for index, result in completed:
+            if isinstance(result, Exception):
+                raise result
+            results[index] = result
+    finally:
+        completed.close()
+    return [results[index] for index in range(len(results))]